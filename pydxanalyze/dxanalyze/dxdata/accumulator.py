@@ -0,0 +1,89 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import numpy
+from pandas import pandas
+
+from dxanalyze.dxdata.histogram import concat_histograms
+from dxanalyze.dxdata.histogram import histograms_attr
+
+
+class ColumnAccumulator(object):
+    """
+    Collect pages of data as numpy column chunks and build a single dataframe at the end
+    Appending dataframes page by page is copying all collected data for every page
+    Latency histograms kept in dataframe attrs are joined as well, if all pages have them
+    """
+
+    def __init__(self, max_memory=None):
+        """
+        :param1 max_memory: max size of collected data in bytes or None for no limit
+        """
+        self.max_memory = max_memory
+        self.columns = []
+        self.chunks = []
+        self.histograms = []
+        self.rows = 0
+        self.memory = 0
+
+    @property
+    def empty(self):
+        return self.rows == 0
+
+    def add(self, dataframe):
+        """
+        Add page of data
+        :param1 dataframe: dataframe with page data, None or empty dataframe is ignored
+        Raise MemoryError if collected data are bigger than max_memory
+        """
+        if dataframe is None or dataframe.empty:
+            return
+
+        chunk = {}
+        for name in dataframe.columns:
+            if name not in self.columns:
+                self.columns.append(name)
+            chunk[name] = dataframe[name].values
+        self.chunks.append((len(dataframe), chunk))
+        self.histograms.append(dataframe.attrs.get(histograms_attr))
+        self.rows += len(dataframe)
+        self.memory += int(dataframe.memory_usage(index=False, deep=True).sum())
+        if self.histograms[-1] is not None:
+            self.memory += sum([h.nbytes for h in self.histograms[-1].values()])
+
+        if self.max_memory is not None and self.memory > self.max_memory:
+            raise MemoryError("Collected data size {} MB is bigger than limit {} MB".format(
+                              self.memory // 1024 // 1024, self.max_memory // 1024 // 1024))
+
+    def to_dataframe(self):
+        """
+        Build a dataframe from collected chunks. Columns missing in some pages are filled with NaN
+        return: dataframe with all collected data
+        """
+        data = {}
+        for name in self.columns:
+            arrays = []
+            for (rows, chunk) in self.chunks:
+                if name in chunk:
+                    arrays.append(chunk[name])
+                else:
+                    arrays.append(numpy.full(rows, numpy.nan))
+            data[name] = numpy.concatenate(arrays) if arrays else numpy.array([])
+        dataframe = pandas.DataFrame(data, columns=self.columns)
+        histograms = concat_histograms(self.histograms)
+        if histograms is not None:
+            dataframe.attrs[histograms_attr] = histograms
+        return dataframe
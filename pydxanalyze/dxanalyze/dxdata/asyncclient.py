@@ -0,0 +1,397 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import asyncio
+import http.client
+import json
+import logging
+import threading
+from urllib.parse import urlencode
+
+from delphixpy.v1_8_0.exceptions import HttpError, RequestError
+from delphixpy.v1_8_0.web.vo import ErrorResult
+
+from dxanalyze.dxdata.datapoints import decode_datapoint_set
+from dxanalyze.dxdata.httppool import TransferStats
+from dxanalyze.dxdata.httppool import add_accept_encoding
+from dxanalyze.dxdata.httppool import decode_body
+
+# max number of requests running concurrently through a connection pool, for all engines sharing it
+default_pool_size = 64
+# max number of requests running concurrently to a single engine
+default_engine_requests = 16
+# API version and client sent by session request, same as delphixpy v1_8_0
+api_session = { "type": "APISession", "client": "dxanalyze", "locale": "en-US",
+                "version": { "type": "APIVersion", "major": 1, "minor": 8, "micro": 0 } }
+api_prefix = "/resources/json/delphix"
+
+
+class AsyncConnection(object):
+    """
+    Persistent HTTP/1.1 connection to engine using asyncio streams
+    Connection is kept open after response, unless engine closed it or response
+    had no length, so next request can use it without a new TCP handshake
+    """
+
+    def __init__(self, address, reader, writer):
+        """
+        :param1 address: engine address in host or host:port format
+        :param2 reader: asyncio StreamReader
+        :param3 writer: asyncio StreamWriter
+        """
+        self.address = address
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    @classmethod
+    async def open(cls, address):
+        """
+        Open connection to engine
+        :param1 address: engine address in host or host:port format
+        return: AsyncConnection object
+        """
+        (host, _, port) = address.partition(":")
+        (reader, writer) = await asyncio.open_connection(host, int(port or 80))
+        return cls(address, reader, writer)
+
+    async def request(self, method, path, headers, body=b""):
+        """
+        Send request and read whole response
+        :param1 method: HTTP method
+        :param2 path: request path with query
+        :param3 headers: dict of request headers
+        :param4 body: request body as bytes
+        return: touple of HTTP status, dict of response headers with lower case names and response body
+        Raise http.client.HTTPException or OSError if connection failed
+        """
+        lines = [ "{} {} HTTP/1.1".format(method, path), "Host: {}".format(self.address),
+                  "Content-Length: {}".format(len(body)) ]
+        lines += [ "{}: {}".format(name, value) for (name, value) in headers.items() ]
+        self.writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await self.writer.drain()
+
+        try:
+            status_line = await self.reader.readline()
+            if not status_line:
+                raise http.client.RemoteDisconnected("Remote end closed connection without response")
+            parts = status_line.decode("latin-1").split(None, 2)
+            if len(parts) < 2 or not parts[1].isdigit():
+                raise http.client.BadStatusLine(status_line.decode("latin-1"))
+
+            response_headers = {}
+            while True:
+                line = await self.reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                (name, _, value) = line.decode("latin-1").partition(":")
+                response_headers[name.strip().lower()] = value.strip()
+
+            if response_headers.get("transfer-encoding", "").lower() == "chunked":
+                response_body = await self.read_chunked()
+            elif "content-length" in response_headers:
+                response_body = await self.reader.readexactly(int(response_headers["content-length"]))
+            else:
+                response_body = await self.reader.read()
+                self.reusable = False
+        except asyncio.IncompleteReadError as e:
+            raise http.client.IncompleteRead(e.partial)
+
+        if response_headers.get("connection", "").lower() == "close":
+            self.reusable = False
+        return (int(parts[1]), response_headers, response_body)
+
+    async def read_chunked(self):
+        """
+        Read body sent with chunked transfer encoding
+        return: response body
+        """
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # trailer headers are ignored
+                while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readexactly(2)
+
+    def close(self):
+        self.writer.close()
+
+
+class ConnectionPool(object):
+    """
+    Keep-alive connections shared by asyncio clients of one or many engines
+    Idle connections are kept per engine address and reused by next request.
+    Number of requests running concurrently through the pool is limited by max_connections
+    """
+
+    def __init__(self, max_connections=default_pool_size):
+        """
+        :param1 max_connections: max number of connections used concurrently
+        """
+        self.max_connections = max_connections
+        self.idle = {}
+        self.slots = None
+
+    async def acquire(self, address):
+        """
+        Get idle connection to engine or open a new one
+        :param1 address: engine address in host or host:port format
+        return: touple of AsyncConnection and True if connection was used before
+        """
+        # semaphore is created by first request, so it belongs to event loop running the pool
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.max_connections)
+        await self.slots.acquire()
+        idle = self.idle.get(address)
+        if idle:
+            return (idle.pop(), True)
+        try:
+            connection = await AsyncConnection.open(address)
+        except BaseException:
+            self.slots.release()
+            raise
+        return (connection, False)
+
+    def release(self, connection, reuse=True):
+        """
+        Return connection to pool after response was read
+        :param1 connection: AsyncConnection object
+        :param2 reuse: if False, connection is closed
+        """
+        if reuse and connection.reusable:
+            self.idle.setdefault(connection.address, []).append(connection)
+        else:
+            connection.close()
+        self.slots.release()
+
+    def close(self):
+        """
+        Close all idle connections
+        """
+        for connections in self.idle.values():
+            for connection in connections:
+                connection.close()
+        self.idle = {}
+
+
+class AsyncEngineClient(object):
+    """
+    Asyncio client for engine API endpoints used by dxanalyze - session, login,
+    service/time, system, analytics list and analytics getData
+    Login cookie is shared by all requests of client, concurrency is limited per engine
+    Responses are requested gzip compressed and requests and bytes are counted in stats
+    """
+
+    def __init__(self, engine_address, engine_username, engine_password, pool=None,
+                 max_requests=default_engine_requests):
+        """
+        :param1 engine_address: engine address in host or host:port format
+        :param2 engine_username: username to authenticate
+        :param3 engine_password: user's password
+        :param4 pool: ConnectionPool shared with other clients or None for own pool
+        :param5 max_requests: max number of requests running concurrently to engine
+        """
+        self.engine_address = engine_address
+        self.engine_username = engine_username
+        self.engine_password = engine_password
+        self.own_pool = pool is None
+        self.pool = ConnectionPool() if pool is None else pool
+        self.max_requests = max_requests
+        self.limit = None
+        self.login_lock = None
+        self.logins = 0
+        self.cookie = None
+        self.stats = TransferStats()
+
+    async def request(self, method, path, data=None):
+        """
+        Send request to engine. If a kept-alive connection was closed by engine,
+        request is sent once more using a new connection
+        :param1 method: HTTP method
+        :param2 path: path of API resource
+        :param3 data: dict posted as JSON
+        return: decompressed response body
+        Raise HttpError for other status than 200 or 202, http.client.HTTPException or OSError
+        if connection failed
+        """
+        logger = logging.getLogger()
+        if self.limit is None:
+            self.limit = asyncio.Semaphore(self.max_requests)
+
+        headers = add_accept_encoding({ "Content-Type": "application/json", "User-Agent": "dxanalyze" })
+        if self.cookie is not None:
+            headers["Cookie"] = self.cookie
+        body = json.dumps(data).encode("utf-8") if data is not None else b""
+
+        async with self.limit:
+            while True:
+                (connection, reused) = await self.pool.acquire(self.engine_address)
+                if not reused:
+                    self.stats.add_connection()
+                # connection is returned to pool for any error including cancelled request,
+                # connection with partially read response can't be used again
+                completed = False
+                try:
+                    (status, response_headers, response_body) = await connection.request(method, path, headers, body)
+                    completed = True
+                except (http.client.HTTPException, OSError) as e:
+                    if reused:
+                        logger.debug("Kept-alive connection to {} closed: {}".format(self.engine_address, repr(e)))
+                        continue
+                    raise
+                finally:
+                    self.pool.release(connection, reuse=completed)
+                break
+
+        if "set-cookie" in response_headers:
+            self.cookie = response_headers["set-cookie"].split(";")[0]
+        body = decode_body(response_headers, response_body)
+        self.stats.add_request(len(response_body), len(body))
+        logger.debug("{} {} received {} bytes, {} bytes decompressed".format(method, path, len(response_body), len(body)))
+        if status not in (200, 202):
+            raise HttpError("HTTP status was {} when doing {} to '{}': {}".format(status, method, path, body),
+                            status=status, data=body)
+        return body
+
+    async def call(self, method, path, data=None):
+        """
+        Call API resource and return result of response
+        :param1 method: HTTP method
+        :param2 path: path of API resource relative to API prefix
+        :param3 data: dict posted as JSON
+        return: result of response
+        Raise RequestError if engine returned an error
+        """
+        response = json.loads(await self.request(method, api_prefix + path, data), strict=False)
+        if response.get("type") == "ErrorResult" or response.get("status") == "ERROR":
+            raise RequestError(ErrorResult.from_dict(response).error)
+        return response.get("result")
+
+    async def login(self, expired_login=None):
+        """
+        Create API session and login. Concurrent requests with expired session
+        are doing a single login
+        :param1 expired_login: number of login which expired or None for first login
+        """
+        if self.login_lock is None:
+            self.login_lock = asyncio.Lock()
+        async with self.login_lock:
+            if expired_login is not None and expired_login != self.logins:
+                return
+            self.cookie = None
+            await self.call("POST", "/session", api_session)
+            await self.call("POST", "/login", { "type": "LoginRequest", "username": self.engine_username,
+                                                "password": self.engine_password, "target": "DOMAIN" })
+            self.logins += 1
+
+    async def get_time(self):
+        """
+        return: TimeConfig dict with systemTimeZone and currentTime
+        """
+        return await self.call("GET", "/service/time")
+
+    async def get_system(self):
+        """
+        return: SystemInfo dict with hostname
+        """
+        return await self.call("GET", "/system")
+
+    async def get_analytics(self):
+        """
+        return: list of StatisticSlice dicts with name and reference
+        """
+        return await self.call("GET", "/analytics")
+
+    async def get_data(self, ref, resolution=None, start_time=None, end_time=None):
+        """
+        Get data of analytic from engine and decode them into columns
+        :param1 ref: analytic reference
+        :param2 resolution: data resolution
+        :param3 start_time: start time in ISO format in UTC
+        :param4 end_time: end time in ISO format in UTC
+        return: DatapointColumns object
+        """
+        query_params = { "endTime": end_time, "resolution": resolution, "startTime": start_time }
+        url = "{}/analytics/{}/getData".format(api_prefix, ref)
+        query = { k: v for (k, v) in query_params.items() if v is not None }
+        if query:
+            url += "?{}".format(urlencode(query))
+        return decode_datapoint_set(await self.request("GET", url))
+
+    def close(self):
+        """
+        Close connections of own pool
+        """
+        if self.own_pool:
+            self.pool.close()
+
+
+class EventLoopThread(object):
+    """
+    Asyncio event loop running in a background thread, so synchronous code like
+    report generation can run coroutines and iterate async generators
+    Exceptions raised by coroutines are raised in calling thread
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def run(self, coroutine):
+        """
+        Run coroutine in event loop and wait for its result
+        :param1 coroutine: coroutine to run
+        return: result of coroutine
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def iterate(self, async_iterable):
+        """
+        Iterate async iterable in event loop. Next item is requested before an item is returned,
+        so it's produced in event loop while caller is processing previous item
+        :param1 async_iterable: async iterable
+        yield: items of async iterable
+        """
+        iterator = async_iterable.__aiter__()
+        future = asyncio.run_coroutine_threadsafe(next_item(iterator), self.loop)
+        try:
+            while True:
+                try:
+                    item = future.result()
+                except StopAsyncIteration:
+                    return
+                future = asyncio.run_coroutine_threadsafe(next_item(iterator), self.loop)
+                yield item
+        finally:
+            # caller stopped iteration, item requested in advance is not needed
+            future.cancel()
+
+    def close(self):
+        """
+        Stop event loop and its thread
+        """
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+async def next_item(iterator):
+    return await iterator.__anext__()
@@ -0,0 +1,103 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import json
+import logging
+import os
+import shutil
+import threading
+
+from dxanalyze.dxdata.pagecache import PageCache
+
+
+class Checkpoint(object):
+    """
+    Record of pages completed by an online run, so interrupted run can be resumed
+    without fetching completed pages again
+    Completed page windows are appended per analytic to checkpoint file, one JSON line per page,
+    and page data are kept in directory <checkpoint file>.pages. Unlike page cache,
+    checkpoint is never evicted and it is used even if cache is disabled or refreshed
+    """
+
+    def __init__(self, file_name):
+        """
+        :param1 file_name: name of checkpoint file, existing checkpoint is loaded
+        """
+        logger = logging.getLogger()
+        self.file_name = file_name
+        self.pages = PageCache(file_name + ".pages")
+        self.lock = threading.Lock()
+        self.completed = {}
+
+        try:
+            with open(file_name) as f:
+                for line in f:
+                    try:
+                        page = json.loads(line)
+                        self.completed.setdefault(page["analytic"], set()).add(tuple(page["key"]))
+                    except (ValueError, KeyError, TypeError):
+                        # last line can be incomplete if run was interrupted during write
+                        logger.debug("Invalid line in checkpoint {} skipped".format(file_name))
+            logger.debug("Checkpoint {} loaded with {} pages".format(file_name, len(self)))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error("Can't read checkpoint {}, all pages will be fetched: {}".format(file_name, str(e)))
+
+    def __len__(self):
+        return sum([len(keys) for keys in self.completed.values()])
+
+    def load(self, analytic_name, key):
+        """
+        Load completed page
+        :param1 analytic_name: analytic name
+        :param2 key: page key (see page_file of PageCache)
+        return: dataframe with page data or None if page is not completed
+        """
+        with self.lock:
+            if tuple(key) not in self.completed.get(analytic_name, ()):
+                return None
+        return self.pages.load(key)
+
+    def store(self, analytic_name, key, dataframe):
+        """
+        Save page data and record page as completed. Page is recorded after its data are saved,
+        so only pages with complete data are loaded by resumed run
+        :param1 analytic_name: analytic name
+        :param2 key: page key (see page_file of PageCache)
+        :param3 dataframe: page data
+        """
+        logger = logging.getLogger()
+        self.pages.store(key, dataframe)
+        with self.lock:
+            self.completed.setdefault(analytic_name, set()).add(tuple(key))
+            try:
+                with open(self.file_name, "a") as f:
+                    f.write(json.dumps({ "analytic": analytic_name, "key": list(key) }) + "\n")
+            except OSError as e:
+                logger.error("Can't save checkpoint {}: {}".format(self.file_name, str(e)))
+
+    def remove(self):
+        """
+        Remove checkpoint file and page data after run is completed
+        """
+        logger = logging.getLogger()
+        try:
+            os.remove(self.file_name)
+        except FileNotFoundError:
+            pass
+        shutil.rmtree(self.pages.directory, ignore_errors=True)
+        logger.debug("Checkpoint {} removed".format(self.file_name))
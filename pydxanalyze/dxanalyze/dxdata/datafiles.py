@@ -15,14 +15,23 @@
 #
 
 import re
-from os import listdir, remove
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from os import cpu_count, listdir, remove
 from sys import exit
 from os.path import isfile, join
-from pandas import pandas
 
 from dxanalyze.dxdata.dataprocessing import create_dataframes
+from dxanalyze.dxdata.rawreader import columns_dataframe
+from dxanalyze.dxdata.rawreader import compression_suffixes
+from dxanalyze.dxdata.rawreader import load_raw_columns
+from dxanalyze.dxdata.rawreader import load_raw_file
+from dxanalyze.dxdata.rawreader import timestamp_format
 
 
+# number of raw files parsed concurrently by worker processes
+default_file_parallel = min(cpu_count() or 1, 5)
+
 # dictionary to keep a graph type ( cpu, network ) and a file name
 files_mapping = {}
 # list to keep a list of analytics to process
@@ -57,14 +66,20 @@ def test_dir(directory_name):
 def detect_files(directory_name, engine_name):
     """
     Detect a data file in directory_name and populate a files_mapping dict
+    Raw files can be compressed (-raw.csv.gz, -raw.csv.xz or -raw.csv.zst), if both
+    uncompressed and compressed file exist, uncompressed file is used
     :param1 directory_name: Name of the directory to scan
     :param2 engine_name:    Name of the Delphix engine ( file name prefix )
     """
 
+    detected = set()
     try:
-        for name in listdir(directory_name):
-            reout = re.match(r'{0}-analytics-(\bcpu\b|\bnfs\b|\bnetwork\b|\bdisk\b|\biscsi\b)-raw\.csv'.format(engine_name), name) 
-            if reout is not None:
+        # uncompressed file name is shorter, so it is detected before compressed files
+        for name in sorted(listdir(directory_name), key=len):
+            reout = re.match(r'{0}-analytics-(\bcpu\b|\bnfs\b|\bnetwork\b|\bdisk\b|\biscsi\b)-raw\.csv({1})?$'.format(
+                             engine_name, "|".join([ re.escape(suffix) for suffix in compression_suffixes ])), name)
+            if reout is not None and reout.group(1) not in detected:
+                detected.add(reout.group(1))
                 files_mapping[reout.group(1)] = join(directory_name, name)
                 analytics_to_process.append(reout.group(1))
     except FileNotFoundError as e:
@@ -104,26 +119,110 @@ def get_files_mapping():
 def get_analytics_to_process():
     return analytics_to_process
 
-def process_file(analytic_name, files_mapping):
+def process_file(analytic_name, files_mapping, sidecar=True, start_time=None, end_time=None):
     """
     Function is reading a csv file and creating a list of statistics to process
+    Only columns used by statistics are read, file is parsed in chunks (see rawreader)
+    Parsed columns are kept in a sidecar next to the file and next run is memory-mapping them
     :param1 analytic_name: name of the analytic to process
     :param2 files_mapping: dict with files to analytic mapping
+    :param3 sidecar: if False, file is always parsed and sidecar is not used
+    :param4 start_time: start time in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    :param5 end_time: end time in '%Y-%m-%d %H:%M:%S' format or None for whole file
     Return a list of dict { stat: Pandas Dataframe}
     """
 
+    file_name = get_file_name(analytic_name, files_mapping)
+    try:
+        csvdata = load_raw_file(file_name, analytic_name, sidecar, start_time=start_time, end_time=end_time)
+    except (FileNotFoundError, ValueError) as e:
+        report_file_error(file_name, e)
+    stats = create_dataframes(analytic_name, csvdata)
+    return stats
+
+
+def process_files(analytic_list, files_mapping, sidecar=True, parallel=default_file_parallel, start_time=None, end_time=None):
+    """
+    Read csv files of many analytics concurrently in worker processes and create their statistics
+    Parsing is CPU bound, so each file is parsed by own process. Workers are returning numpy
+    columns or only a sidecar, which is memory-mapped by this process
+    :param1 analytic_list: list of analytics to process
+    :param2 files_mapping: dict with files to analytic mapping
+    :param3 sidecar: if False, files are always parsed and sidecars are not used
+    :param4 parallel: number of files parsed concurrently, 1 is parsing files in this process
+    :param5 start_time: start time in '%Y-%m-%d %H:%M:%S' format or None for whole files
+    :param6 end_time: end time in '%Y-%m-%d %H:%M:%S' format or None for whole files
+    yield: touple of analytic name and list of dict { stat: Pandas Dataframe}, in order files are parsed
+    """
+    if parallel <= 1 or len(analytic_list) <= 1:
+        for analytic_name in analytic_list:
+            yield (analytic_name, process_file(analytic_name, files_mapping, sidecar, start_time, end_time))
+        return
+
+    with ProcessPoolExecutor(max_workers=min(parallel, len(analytic_list))) as executor:
+        futures = {}
+        for analytic_name in analytic_list:
+            file_name = get_file_name(analytic_name, files_mapping)
+            future = executor.submit(load_raw_columns, file_name, analytic_name, sidecar,
+                                     start_time=start_time, end_time=end_time)
+            futures[future] = analytic_name
+
+        for future in as_completed(futures):
+            analytic_name = futures[future]
+            file_name = files_mapping[analytic_name]
+            try:
+                csvdata = columns_dataframe(file_name, analytic_name, future.result(), start_time, end_time)
+            except (FileNotFoundError, ValueError) as e:
+                for f in futures:
+                    f.cancel()
+                report_file_error(file_name, e)
+            yield (analytic_name, create_dataframes(analytic_name, csvdata))
+
+
+def check_time_range(start_time, end_time):
+    """
+    Check time range of offline analytics. Exit with error if time is not in
+    '%Y-%m-%d %H:%M:%S' format or start time is not before end time
+    :param1 start_time: start time or None for start of files
+    :param2 end_time: end time or None for end of files
+    """
+    try:
+        bounds = [ datetime.strptime(t, timestamp_format) for t in (start_time, end_time) if t is not None ]
+    except ValueError as e:
+        print("Wrong time format. Use YYYY-MM-DD HH24:MI:SS")
+        print(str(e))
+        exit(-1)
+    if len(bounds) == 2 and bounds[0] >= bounds[1]:
+        print("Start time {} has to be before end time {}".format(start_time, end_time))
+        exit(-1)
+
+
+def get_file_name(analytic_name, files_mapping):
+    """
+    Find a file of the analytic. Exit with error if there is no file
+    :param1 analytic_name: name of the analytic to process
+    :param2 files_mapping: dict with files to analytic mapping
+    Return a file name
+    """
     try:
-        file_name = files_mapping[analytic_name]
-        csvdata = pandas.read_csv(file_name)
-        stats = create_dataframes(analytic_name, csvdata)
-        return stats
+        return files_mapping[analytic_name]
     except KeyError as k:
         print("Can't find file mapping for analytics {}".format(analytic_name))
         print(str(k))
         exit(-1)
-    except FileNotFoundError as e:
+
+
+def report_file_error(file_name, e):
+    """
+    Print error of file which can't be read and exit
+    :param1 file_name: name of the file
+    :param2 e: FileNotFoundError or ValueError raised by reading
+    """
+    if isinstance(e, FileNotFoundError):
         print("Can't open a file {}".format(file_name))
-        print(str(e))
-        exit(-1)
+    else:
+        print("Can't parse a file {}".format(file_name))
+    print(str(e))
+    exit(-1)
 
 
@@ -0,0 +1,165 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import json
+from urllib.parse import urlencode
+
+import numpy
+from delphixpy.v1_8_0.exceptions import RequestError
+from delphixpy.v1_8_0.web.vo import ErrorResult
+
+from dxanalyze.dxdata.sessionadapter import authenticated_get
+
+
+class DatapointColumns(object):
+    """
+    Datapoint set returned by engine with datapoints of each stream decoded into columns
+    resolution: resolution of returned data
+    overflow: True if engine returned only part of data
+    datapoint_streams: list of stream dicts, where datapoints is a dict of numpy array per datapoint field
+    """
+
+    def __init__(self, resolution, overflow, datapoint_streams):
+        self.resolution = resolution
+        self.overflow = overflow
+        self.datapoint_streams = datapoint_streams
+
+
+class DatapointDecoder(object):
+    """
+    JSON object hook writing datapoints directly into columns of the stream they belong to.
+    Objects are decoded in document order, so all datapoints decoded before the end of a stream
+    are datapoints of this stream. No dict is created for a datapoint
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+
+    def __call__(self, pairs):
+        object_type = None
+        for (name, value) in pairs:
+            if name == "type":
+                object_type = value
+                break
+
+        if object_type is not None:
+            if object_type.endswith("Datapoint"):
+                self.add_datapoint(pairs)
+                return None
+            if object_type.endswith("DatapointStream"):
+                return self.close_stream(pairs)
+        return dict(pairs)
+
+    def add_datapoint(self, pairs):
+        """
+        Append datapoint fields to columns, missing fields are set to None
+        :param1 pairs: list of datapoint field names and values
+        """
+        rows = self.rows
+        fields = 0
+        for (name, value) in pairs:
+            if name == "type":
+                continue
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = [None] * rows
+            column.append(value)
+            fields += 1
+        self.rows = rows + 1
+        if fields != len(self.columns):
+            for column in self.columns.values():
+                if len(column) < self.rows:
+                    column.append(None)
+
+    def close_stream(self, pairs):
+        """
+        Replace datapoints of stream with columns decoded so far and start columns of next stream
+        :param1 pairs: list of stream field names and values
+        return: stream dict
+        """
+        stream = dict(pairs)
+        stream["datapoints"] = { name: to_array(column) for (name, column) in self.columns.items() }
+        self.columns = {}
+        self.rows = 0
+        return stream
+
+
+def to_array(column):
+    """
+    Convert list of values into typed numpy array. Values which are not numbers,
+    like timestamps or latency histograms, are kept in object array
+    :param1 column: list of values
+    return: numpy array
+    """
+    if column and isinstance(column[0], (int, float)):
+        array = numpy.array(column)
+        if array.dtype.kind in "iufb":
+            return array
+    array = numpy.empty(len(column), dtype=object)
+    array[:] = column
+    return array
+
+
+def decode_datapoint_set(body):
+    """
+    Decode getData response of analytics API or saved response like tests/nfs.json
+    :param1 body: response body as bytes or string
+    return: DatapointColumns object
+    Raise RequestError if engine returned an error
+    """
+    # tabs are allowed inside strings, like in delphixpy decoder
+    response = json.loads(body, object_pairs_hook=DatapointDecoder(), strict=False)
+
+    if response.get("type") == "ErrorResult" or response.get("status") == "ERROR":
+        raise RequestError(ErrorResult.from_dict(response).error)
+    if "result" in response:
+        response = response["result"]
+
+    return DatapointColumns(response.get("resolution"), response.get("overflow", False),
+                            response.get("datapointStreams", []))
+
+
+def read_datapoint_set(file_name):
+    """
+    Decode getData response saved in file, so decoding can be tested and measured without engine
+    :param1 file_name: name of file with saved response
+    return: DatapointColumns object
+    """
+    with open(file_name, "rb") as f:
+        return decode_datapoint_set(f.read())
+
+
+def get_data(engineobject, ref, resolution=None, start_time=None, end_time=None, pool=None):
+    """
+    Get data of analytic from engine and decode them into columns
+    Response is decoded without creating delphixpy objects for datapoints
+    :param1 engineobject: connected DelphixEngine object
+    :param2 ref: analytic reference
+    :param3 resolution: data resolution
+    :param4 start_time: start time in ISO format in UTC
+    :param5 end_time: end time in ISO format in UTC
+    :param6 pool: HttpConnectionPool used instead of connection of engine object, so keep-alive
+                  connections and compressed transfer are used. Login is still handled by engine object
+    return: DatapointColumns object
+    """
+    query_params = { "endTime": end_time, "resolution": resolution, "startTime": start_time }
+    url = "/resources/json/delphix/analytics/{}/getData".format(ref)
+    query = { k: v for (k, v) in query_params.items() if v is not None }
+    if query:
+        url += "?{}".format(urlencode(query))
+
+    return decode_datapoint_set(authenticated_get(engineobject, url, pool))
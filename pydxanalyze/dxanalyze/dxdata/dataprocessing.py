@@ -18,6 +18,7 @@ from datetime import datetime
 from datetime import timedelta
 
 from pandas import pandas
+from pandas.api.types import is_datetime64_any_dtype
 from sys import exit
 
 from matplotlib.dates import date2num
@@ -30,10 +31,23 @@ from dxanalyze.dxgraphs.dxmathplot import create_plot
 iocolumns = set(["#timestamp","read_throughput","write_throughput","ops_read","ops_write" \
                  ,"read_latency","write_latency"])
 
+# latency percentiles calculated from engine histograms, available only in online mode
+iopercentilecolumns = ["read_latency_p50", "read_latency_p95", "read_latency_p99",
+                       "write_latency_p50", "write_latency_p95", "write_latency_p99"]
+
+# statistics of per interface network columns collected with network_per_nic and column prefix
+nicstatistics = {
+    "nic_read_throughput": "outBytes_",
+    "nic_write_throughput": "inBytes_"
+}
+
 y_axis_max = {
     "global": {
         "throughput": 0,
-        "latency": 0
+        "latency": 0,
+        "latency_percentiles": 0,
+        "nic_read_throughput": 0,
+        "nic_write_throughput": 0
     }
 }
 
@@ -78,6 +92,16 @@ def create_dataframes(analytic_name, csvdata):
             stat_dict["outBytes"] = csvdata[["#timestamp", "outBytes"]]
             stat_list.append({"throughput": stat_dict})
 
+            for stat_name, prefix in nicstatistics.items():
+                stat_dict = {}
+                for column in csvdata.columns:
+                    if column.startswith(prefix):
+                        csvdata.loc[:, column] = csvdata.loc[:, column]/1024/1024
+                        # interface can be missing for some timestamps
+                        stat_dict[column] = csvdata[["#timestamp", column]].dropna()
+                if stat_dict:
+                    stat_list.append({stat_name: stat_dict})
+
     if analytic_name in ['disk','nfs','iscsi']:
         # check if dataframe has all required columns
 
@@ -95,6 +119,12 @@ def create_dataframes(analytic_name, csvdata):
             stat_dict["write_latency"] = csvdata[["#timestamp", "write_latency"]]
             stat_list.append({"latency": stat_dict})
 
+        if set(iopercentilecolumns).issubset(csvdata.columns):
+            stat_dict = {}
+            for column in iopercentilecolumns:
+                stat_dict[column] = csvdata[["#timestamp", column]]
+            stat_list.append({"latency_percentiles": stat_dict})
+
     return stat_list
 
 
@@ -156,6 +186,17 @@ def set_max_y_axis(y_axis, analitycs, stat_name, sync_y):
                 y_axis_max[analitycs][stat_name] = y_axis
 
 
+def reset_max_y_axis():
+    """
+    Remove y_axis values of previous report, so next engine report has own scale
+    """
+    for analitycs in list(y_axis_max.keys()):
+        if analitycs == "global":
+            for stat_name in y_axis_max["global"]:
+                y_axis_max["global"][stat_name] = 0
+        else:
+            del y_axis_max[analitycs]
+
 
 def create_serie(df):
     """
@@ -177,10 +218,22 @@ def convert_to_frame(input_serie):
     """  
     input_serie = input_serie.to_frame()
     input_serie = input_serie.reset_index(level=["#timestamp"])
-    input_serie["#timestamp"] = input_serie["#timestamp"] + " 00:00:00"
+    if not is_datetime64_any_dtype(input_serie["#timestamp"]):
+        input_serie["#timestamp"] = input_serie["#timestamp"] + " 00:00:00"
     return input_serie
 
 
+def timestamp_days(timestamps):
+    """
+    Date of timestamps used to group data by day
+    :param1 timestamps: timestamps as strings or datetime64 values read from raw files
+    Return a Pandas serie with date only ( 10 characters ) or midnight of the day for datetime64 values
+    """
+    if is_datetime64_any_dtype(timestamps):
+        return timestamps.dt.normalize()
+    return timestamps.str[:10]
+
+
 
 def generate_cpu_summary(df):
     """
@@ -195,13 +248,13 @@ def generate_cpu_summary(df):
         "85percentile": None
     }
 
-    ser = df.groupby([df.loc[: ,"#timestamp"].str[:10]])['util'].min()
+    ser = df.groupby([timestamp_days(df.loc[: ,"#timestamp"])])['util'].min()
     series["min"] = create_serie(convert_to_frame(ser))
 
-    ser = df.groupby([df.loc[: ,"#timestamp"].str[:10]])['util'].max()
+    ser = df.groupby([timestamp_days(df.loc[: ,"#timestamp"])])['util'].max()
     series["max"] = create_serie(convert_to_frame(ser))
 
-    ser = df.groupby([df.loc[: ,"#timestamp"].str[:10]])['util'].quantile(.85)
+    ser = df.groupby([timestamp_days(df.loc[: ,"#timestamp"])])['util'].quantile(.85)
     series["85percentile"] = create_serie(convert_to_frame(ser))
 
     return series
@@ -219,7 +272,7 @@ def generate_network_summary(stat_series):
         if not dataframe.empty:
             y_max = calculate_percentile(1, dataframe, series_name)
             set_max_y_axis(y_max, "network_summary", "throughput", False) 
-            ser = dataframe.groupby([dataframe.loc[: ,"#timestamp"].str[:10]])[series_name].quantile(.85)
+            ser = dataframe.groupby([timestamp_days(dataframe.loc[: ,"#timestamp"])])[series_name].quantile(.85)
             series[series_name + "85pct"] = create_serie(convert_to_frame(ser))
 
     return series
@@ -238,15 +291,16 @@ def generate_cache_hit_ratio(io_stats_dataframes):
     else:
         return pandas.DataFrame(columns = ['#timestamp', 'cachehit'])
         
+    # missing frames have same column types as disk, so timestamps parsed by offline mode can be merged
     if "read_throughput" in io_stats_dataframes["iscsi"]:
         df_iscsi = io_stats_dataframes["iscsi"]["read_throughput"]
     else:
-        df_iscsi = pandas.DataFrame(columns = ['#timestamp', 'read_throughput'])
+        df_iscsi = df_disk.iloc[:0]
     
     if "read_throughput" in io_stats_dataframes["nfs"]:
         df_nfs = io_stats_dataframes["nfs"]["read_throughput"]
     else:
-        df_nfs = pandas.DataFrame(columns = ['#timestamp', 'read_throughput'])
+        df_nfs = df_disk.iloc[:0]
 
     # merge NFS and iSCSI using a outer join so any of the data frame can be empty
     # NaN will be filled by zeros 
@@ -281,38 +335,11 @@ def generate_farmanalyze_data_summary(engine_cpufile_mapping,engine_networkfile_
     fmindate = None
     fmaxdate = None
     for keyC, valueC in engine_cpufile_mapping.items():
-        engine_dict = {}
-        engine_dict['engine'] = keyC
         dfc=pandas.read_csv(valueC)
-        maxcpu=round(dfc['utilization_85pct'].max(),0)
-        mindt=datetime.strptime(dfc['#time'].min(), '%Y-%m-%d')
-        maxdt=datetime.strptime(dfc['#time'].max(), '%Y-%m-%d')
-        if fmindate is None:
-            fmindate = mindt
-        if fmindate > mindt:
-            fmindate = mindt
-        if fmaxdate is None:
-            fmaxdate = maxdt
-        if fmaxdate < maxdt:
-            fmaxdate = maxdt
-        engine_dict['cpu'] = maxcpu
-        for keyN, valueN in engine_networkfile_mapping.items():
-            if keyC == keyN:
-                dfn=pandas.read_csv(valueN)
-                maxnetwork=(dfn['inBytes_85pct'] + dfn['outBytes_85pct']).max()
-                maxnetworkMB = round(maxnetwork / 1024 /1024 , 0 )
-                mindt=datetime.strptime(dfn['#time'].min(), '%Y-%m-%d')
-                maxdt=datetime.strptime(dfn['#time'].max(), '%Y-%m-%d')
-                if fmindate is None:
-                    fmindate = mindt
-                if fmindate > mindt:
-                    fmindate = mindt
-                if fmaxdate is None:
-                    fmaxdate = maxdt
-                if fmaxdate < maxdt:
-                    fmaxdate = maxdt
-                engine_dict['network'] = maxnetworkMB
-
+        dfn = None
+        if keyC in engine_networkfile_mapping:
+            dfn=pandas.read_csv(engine_networkfile_mapping[keyC])
+        engine_dict,fmindate,fmaxdate = generate_farmanalyze_engine_summary(keyC,dfc,dfn,fmindate,fmaxdate)
 
         dftt = pandas.DataFrame()
         dftr = pandas.DataFrame()
@@ -331,6 +358,104 @@ def generate_farmanalyze_data_summary(engine_cpufile_mapping,engine_networkfile_
         engine_dict_list.append(engine_dict)
     return engine_dict_list,fmindate,fmaxdate
 
+def generate_farmanalyze_engine_summary(engine_name, dfc, dfn, fmindate=None, fmaxdate=None):
+    """
+    Generate farmanalyze summary of one engine from daily 85 percentile data
+    :param1 engine_name: engine name
+    :param2 dfc: dataframe with #time and utilization_85pct columns or None
+    :param3 dfn: dataframe with #time, inBytes_85pct and outBytes_85pct columns [B/s] or None
+    :param4 fmindate: first date of farm data so far or None
+    :param5 fmaxdate: last date of farm data so far or None
+    Return engine summary dict, first and last date of farm data including this engine
+    """
+    engine_dict = {}
+    engine_dict['engine'] = engine_name
+    if dfc is not None and not dfc.empty:
+        engine_dict['cpu'] = round(dfc['utilization_85pct'].max(),0)
+        (fmindate, fmaxdate) = update_farmanalyze_dates(dfc, fmindate, fmaxdate)
+    if dfn is not None and not dfn.empty:
+        maxnetwork=(dfn['inBytes_85pct'] + dfn['outBytes_85pct']).max()
+        engine_dict['network'] = round(maxnetwork / 1024 /1024 , 0 )
+        (fmindate, fmaxdate) = update_farmanalyze_dates(dfn, fmindate, fmaxdate)
+    return engine_dict,fmindate,fmaxdate
+
+def update_farmanalyze_dates(df, fmindate, fmaxdate):
+    """
+    Extend farm date range by dates from #time column
+    Return first and last date
+    """
+    mindt=datetime.strptime(df['#time'].min(), '%Y-%m-%d')
+    maxdt=datetime.strptime(df['#time'].max(), '%Y-%m-%d')
+    if fmindate is None or fmindate > mindt:
+        fmindate = mindt
+    if fmaxdate is None or fmaxdate < maxdt:
+        fmaxdate = maxdt
+    return fmindate,fmaxdate
+
+def generate_daily_percentile(df, columns, percentile=0.85):
+    """
+    Calculate a daily percentile of columns like in aggregated analytic files
+    by grouping dataframe on timestamp column for date only ( 10 characters )
+    :param1 df: dataframe with #timestamp column
+    :param2 columns: dict of column name in df and column name in result
+    :param3 percentile: percentile to calculate
+    Return dataframe with #time column and one column per input column
+    """
+    grouped = df.groupby(df["#timestamp"].str[:10])[list(columns.keys())].quantile(percentile)
+    grouped = grouped.rename(columns=columns)
+    grouped.index.name = "#time"
+    return grouped.reset_index()
+
+class DailyPercentile(object):
+    """
+    Calculate a daily percentile of columns while data are collected, see generate_daily_percentile
+    Data have to be added in timestamp order, so a day is complete when data of a next day are added.
+    Only rows of the last day are kept, so memory is bounded by one day of data
+    """
+
+    def __init__(self, columns, percentile=0.85):
+        """
+        :param1 columns: dict of column name in data and column name in result
+        :param2 percentile: percentile to calculate
+        """
+        self.columns = columns
+        self.percentile = percentile
+        self.current = []
+        self.days = []
+
+    @property
+    def empty(self):
+        return not self.current and not self.days
+
+    def add(self, dataframe):
+        """
+        Add rows of data, percentile of days completed by them is calculated and their rows are released
+        :param1 dataframe: dataframe with #timestamp column, None or empty dataframe is ignored
+        """
+        if dataframe is None or dataframe.empty:
+            return
+        dataframe = dataframe[["#timestamp"] + list(self.columns.keys())]
+        last_day = dataframe["#timestamp"].iloc[-1][:10]
+        complete = dataframe["#timestamp"].str[:10] < last_day
+        # buffered days are complete as well if new data start with a later day
+        buffered_complete = bool(self.current) and self.current[-1]["#timestamp"].iloc[-1][:10] < last_day
+        if buffered_complete or complete.any():
+            self.current.append(dataframe[complete])
+            self.days.append(generate_daily_percentile(pandas.concat(self.current), self.columns, self.percentile))
+            self.current = [dataframe[~complete]]
+        else:
+            self.current.append(dataframe)
+
+    def to_dataframe(self):
+        """
+        Calculate percentile of the last day and return all days
+        return: dataframe with #time column and one column per input column
+        """
+        if self.current:
+            self.days.append(generate_daily_percentile(pandas.concat(self.current), self.columns, self.percentile))
+            self.current = []
+        return pandas.concat(self.days, ignore_index=True)
+
 def create_farmanalyze_df(engine_dict_list):
     df = pandas.DataFrame(engine_dict_list, columns =['engine', 'cpu', 'network','max_nt_tx_test','max_nt_rc_test'], dtype = float)
     return df
\ No newline at end of file
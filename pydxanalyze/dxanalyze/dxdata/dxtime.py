@@ -16,8 +16,10 @@
 
 import re
 import logging
+import numpy
 import pytz
 from datetime import datetime, timedelta
+from pandas import pandas
 
 
 def make_iso_timestamp(timestamp):
@@ -143,4 +145,48 @@ def convert_to_utc(timestamp, timezone, printtz=None):
     if offset:
        return convert_using_offset(timestamp, timezone, 'UTC', printtz)
     else:
-       return convert_timezone(timestamp, timezone, 'UTC', printtz)
\ No newline at end of file
+       return convert_timezone(timestamp, timezone, 'UTC', printtz)
+ 
+ 
+def parse_timestamp_array(timestamps):
+    """
+    Parse array of timestamps in ISO format or YYYY-MM-DD HH24:MI:SS
+    Milliseconds of ISO timestamps are ignored like in single timestamp functions
+    :param1 timestamps: array or Series of timestamps
+    return: Series of datetime64 values
+    """
+    ts = pandas.Series(timestamps, dtype=object).str.slice(0, 19).str.replace('T', ' ', regex=False)
+    return pandas.to_datetime(ts, format='%Y-%m-%d %H:%M:%S')
+ 
+ 
+def convert_from_utc_array(timestamps, timezone, printtz=None):
+    """
+    Convert array of timestamps from UTC into timezone
+    Output is same as convert_from_utc called for each timestamp
+    :param1 timestamps: array or Series of timestamps in ISO format or YYYY-MM-DD HH24:MI:SS
+    :param2: timezone: dst timezone,
+    :param3: printtz: return strings with timezone information
+    return: numpy array of converted timestamps
+    """
+    if len(timestamps) == 0:
+       return numpy.array([], dtype=object)
+
+    ts = parse_timestamp_array(timestamps)
+    offset = re.match(r'GMT([+|-]\d\d)\:(\d\d)', timezone)
+    if offset:
+       # like convert_using_offset only hours of offset are used
+       offsethours = offset.group(1)
+       dst_ts = ts + timedelta(hours=int(offsethours))
+       ret_ts = dst_ts.dt.strftime('%Y-%m-%d %H:%M:%S')
+       if printtz is not None:
+          ret_ts = ret_ts + ' ' + 'GMT' + offsethours
+    else:
+       try:
+          dst_ts = ts.dt.tz_localize('UTC').dt.tz_convert(pytz.timezone(timezone))
+       except TypeError:
+          return numpy.full(len(timestamps), None, dtype=object)
+       ret_ts = dst_ts.dt.strftime('%Y-%m-%d %H:%M:%S')
+       if printtz is not None:
+          ret_ts = ret_ts + ' ' + dst_ts.dt.strftime('%Z')
+
+    return ret_ts.values
@@ -14,14 +14,17 @@
 # Copyright (c) 2019 by Delphix. All rights reserved.
 #
 
+import asyncio
 import http.client
 import json
 import logging
 import re
 import socket
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
-from math import log
+from time import sleep
 
 import numpy
 import pandas
@@ -31,182 +34,1255 @@ from delphixpy.v1_8_0.web.analytics import analytics
 from delphixpy.v1_8_0.web.service.time import time
 from delphixpy.v1_8_0.web.system import system
 
+from dxanalyze.dxdata import datapoints
+from dxanalyze.dxdata.accumulator import ColumnAccumulator
+from dxanalyze.dxdata.asyncclient import AsyncEngineClient
+from dxanalyze.dxdata.asyncclient import EventLoopThread
+from dxanalyze.dxdata.asyncclient import default_engine_requests
+from dxanalyze.dxdata.httppool import HttpConnectionPool
+from dxanalyze.dxdata.sessionadapter import reset_connection
+from dxanalyze.dxdata.sessionadapter import share_login_session
 from dxanalyze.dxdata.dataprocessing import create_dataframes
+from dxanalyze.dxdata.histogram import bucket_latency
+from dxanalyze.dxdata.histogram import histograms_attr
+from dxanalyze.dxdata.histogram import latency_percentiles
+from dxanalyze.dxdata.histogram import LatencyHistograms
 from dxanalyze.dxlogging import print_error
 from dxanalyze.dxlogging import print_message
 
 from dxanalyze.dxdata.dxtime import convert_from_utc
+from dxanalyze.dxdata.dxtime import convert_from_utc_array
 from dxanalyze.dxdata.dxtime import convert_to_utc
 from dxanalyze.dxdata.dxtime import make_iso_timestamp
 
-__analytic_map = {
-   "cpu": {
-      "ref": None,
-      "function": "process_cpu"
-   },
-   "network": {
-      "ref": None,
-      "function": "process_network"
-   },
-   "disk": {
-      "ref": None,
-      "function": "process_io"
-   },
-   "nfs": {
-      "ref": None,
-      "function": "process_io"
-   },
-   "iscsi": {
-      "ref": None,
-      "function": "process_io"
-   }
+# function converting datapoint streams of analytic into CSV like dataframe
+analytic_functions = {
+   "cpu": "process_cpu",
+   "network": "process_network",
+   "disk": "process_io",
+   "nfs": "process_io",
+   "iscsi": "process_io"
 }
-__engineobject = None
-__engine_time_zone = None
-__current_time = None
-__engine_name = None
-
-def connect(f_engine_address, f_engine_username, f_engine_password):
-   """
-   Connect to the Delphix Engine and get time and analytic information
-   f_engine_address: The Virtualization Engine's address (IP/DNS Name)
-   f_engine_username: Username to authenticate
-   f_engine_password: User's password
-   """
-
-   logger = logging.getLogger()
-
-   try:
-      global __engineobject
-      global __engine_time_zone
-      global __current_time
-      global __engine_name
-      __engineobject = DelphixEngine(f_engine_address,
-                                     f_engine_username,
-                                     f_engine_password,
-                                     "DOMAIN")
-      timeobj = time.get(__engineobject)
-      __engine_time_zone = timeobj.system_time_zone
-      __current_time = convert_from_utc(timeobj.current_time, __engine_time_zone)
-
-      systemobj = system.get(__engineobject)
-      __engine_name = systemobj.hostname
-
-      for analytic_def in analytics.get_all(__engineobject):
-         if analytic_def.name[8:] in __analytic_map:
-            __analytic_map[analytic_def.name[8:]]["ref"] = analytic_def.reference
-         
-
-   except HttpError as e:
-      if (e.status == 401):
-            print_error('Wrong password or username for engine {}'.format(f_engine_address))
-            logger.error('Wrong password or username for engine {}'.format(f_engine_address))
+
+# default number of pages fetched concurrently from engine for one analytic
+default_parallel = 8
+# time after page end when engine data for page are considered as complete
+page_close_delay = timedelta(minutes=5)
+# number of datapoints per stream requested in a single page
+page_points = 3600
+# number of retries of failed page request, delay before first retry in seconds and max delay
+# delay is doubled for each retry, so flaky connection has time to recover
+page_retries = 5
+retry_delay = 2
+max_retry_delay = 60
+# HTTP statuses returned by engine or proxy for transient problems, 401 is returned for expired session
+retry_http_status = [401, 429, 500, 502, 503, 504]
+# long time ranges are fetched with coarse resolution and only default_detail_days most recent days
+# (extended back to a coarse page boundary) are fetched with requested resolution,
+# 0 is using requested resolution for whole range
+coarse_resolution = 3600
+default_detail_days = 7
+# max time range of single request per resolution, as limited by engine
+max_page_length = {
+   1: timedelta(hours=1),
+   60: timedelta(days=1),
+   3600: timedelta(days=30)
+}
+# datapoint fields used from IO streams and their column names in IO dataframe
+io_stream_columns = ["timestamp", "count", "throughput", "latency"]
+io_column_names = {
+   "count": "ops_{}",
+   "throughput": "{}_throughput",
+   "latency": "{}_latency"
+}
+
+class EngineSession(object):
+   """
+   Connection to a single Delphix Engine with its time zone, current time and analytic references
+   Each session is independent, so one process can collect data from many engines
+   Analytic data are fetched through a pool of keep-alive connections shared by all worker threads
+   of session, transfer: TransferStats with requests and bytes received from engine
+   """
+
+   def __init__(self, engine_address, engine_username, engine_password, network_per_nic=False):
+      """
+      :param1 engine_address: The Virtualization Engine's address (IP/DNS Name)
+      :param2 engine_username: Username to authenticate
+      :param3 engine_password: User's password
+      :param4 network_per_nic: add inBytes_<nic> and outBytes_<nic> columns for each interface to network data
+      """
+      self.engine_address = engine_address
+      self.engine_username = engine_username
+      self.engine_password = engine_password
+      self.engineobject = None
+      self.owner_thread = None
+      self.thread_engines = threading.local()
+      self.pool = HttpConnectionPool(engine_address)
+      self.transfer = self.pool.stats
+      self.time_zone = None
+      self.current_time = None
+      self.engine_name = None
+      self.network_per_nic = network_per_nic
+      self.analytic_map = { name: { "ref": None, "function": function }
+                            for (name, function) in analytic_functions.items() }
+
+   def connect(self):
+      """
+      Connect to the Delphix Engine and get time and analytic information
+      """
+
+      try:
+         self.engineobject = DelphixEngine(self.engine_address,
+                                           self.engine_username,
+                                           self.engine_password,
+                                           "DOMAIN")
+         self.owner_thread = threading.current_thread()
+         timeobj = time.get(self.engineobject)
+         self.time_zone = timeobj.system_time_zone
+         self.current_time = convert_from_utc(timeobj.current_time, self.time_zone)
+
+         systemobj = system.get(self.engineobject)
+         self.engine_name = systemobj.hostname
+
+         for analytic_def in analytics.get_all(self.engineobject):
+            if analytic_def.name[8:] in self.analytic_map:
+               self.analytic_map[analytic_def.name[8:]]["ref"] = analytic_def.reference
+
+
+      except (HttpError, RequestError, http.client.HTTPException, socket.error) as e:
+         self.report_connect_error(e)
+         sys.exit(1)
+
+   def report_connect_error(self, e):
+      """
+      Print and log error of connection to engine
+      :param1 e: exception raised by connection
+      """
+      logger = logging.getLogger()
+      if isinstance(e, HttpError):
+         if (e.status == 401):
+               print_error('Wrong password or username for engine {}'.format(self.engine_address))
+               logger.error('Wrong password or username for engine {}'.format(self.engine_address))
+         else:
+               print_error('An error occurred while authenticating to {}:\n{}'.format(self.engine_address, str(e.status)))
+               logger.error('An error occurred while authenticating to {}:\n{}'.format(self.engine_address, str(e.status)))
+      elif isinstance(e, RequestError):
+         print_error(e)
+         logger.error(str(e))
       else:
-            print_error('An error occurred while authenticating to {}:\n{}'.format(f_engine_address. str(e.status)))
-            logger.error('An error occurred while authenticating to {}:\n{}'.format(f_engine_address. str(e.status)))
-      sys.exit(1)
+         print_error("Issue when connecting to engine {}: \n {}".format(self.engine_address, str(e)))
+         logger.error("Issue when connecting to engine {}: \n {}".format(self.engine_address, str(e)))
 
-   except RequestError as e:
-      print_error(e)
-      logger.error(str(e))
-      sys.exit(1)
+   def get_engine_object(self):
+      """
+      Return a DelphixEngine object for the current thread
+      DelphixEngine is keeping a single HTTP connection, so each worker thread
+      is using its own object logged in with the same credentials
+      return: DelphixEngine object
+      """
+      if self.engineobject is None or threading.current_thread() is self.owner_thread:
+         return self.engineobject
+
+      engineobject = getattr(self.thread_engines, "engineobject", None)
+      if engineobject is None:
+         engineobject = DelphixEngine(self.engine_address, self.engine_username, self.engine_password, "DOMAIN")
+         share_login_session(self.engineobject, engineobject)
+         self.thread_engines.engineobject = engineobject
+      return engineobject
+
+   def get_available_analytics(self):
+      """
+      Return a list of analytics required by dxanalyze and available in engine
+      return: list of analytics
+      """
+      return [x for x in self.analytic_map.keys() if self.analytic_map[x]["ref"] is not None ]
+
+   def is_page_closed(self, end_page):
+      """
+      Check if engine won't add any more data to page
+      :param1 end_page: end time of page in engine time zone
+      return: True if page ended before engine current time
+      """
+      if self.current_time is None:
+         return False
+      current_time = datetime.strptime(self.current_time, "%Y-%m-%d %H:%M:%S")
+      return datetime.strptime(end_page, "%Y-%m-%d %H:%M:%S") + page_close_delay <= current_time
+
+   def fetch_page(self, analytic_name, page, resolution, cache=None, checkpoint=None, iso_page=None):
+      """
+      Get data from engine for a single page and convert it into CSV like Pandas dataframe
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 page: touple of start and end time in engine time zone
+      :param3 resolution: data resolution
+      :param4 cache: PageCache object or None if cache is not used
+      :param5 checkpoint: Checkpoint object or None if checkpoint is not used
+      :param6 iso_page: page converted by iso_page or None if page is not converted yet
+      return: touple of dataframe with page data and resolution returned by engine
+              (None if page was loaded from checkpoint or cache)
+      """
+      if iso_page is None:
+         iso_page = self.iso_page(page)
+      key = self.page_key(analytic_name, iso_page, resolution)
+      csvdata = self.load_page(analytic_name, key, cache, checkpoint)
+      if csvdata is not None:
+         return (csvdata, None)
+
+      (st, et) = page
+      datapoint_sets = self.fetch_datapoint_sets(self.analytic_map[analytic_name]["ref"], st, et, resolution, iso_page)
+      (csvdata, page_resolution) = self.convert_page(analytic_name, datapoint_sets)
+      self.store_page(analytic_name, page, key, csvdata, cache, checkpoint)
+      return (csvdata, page_resolution)
+
+   def iso_page(self, page):
+      """
+      Convert page from engine time zone into UTC ISO format used by engine requests
+      :param1 page: touple of start and end time in engine time zone
+      return: touple of start and end time in UTC ISO format
+      """
+      (st, et) = page
+      return (make_iso_timestamp(convert_to_utc(st, self.time_zone)), make_iso_timestamp(convert_to_utc(et, self.time_zone)))
 
-   except (http.client.HTTPException, socket.error) as ex:
-      print_error("Issue when connecting to engine {}: \n {}".format(f_engine_address, str(ex)))
-      logger.error("Issue when connecting to engine {}: \n {}".format(f_engine_address, str(ex)))
+   def page_key(self, analytic_name, iso_page, resolution):
+      """
+      Generate key of page used by cache and checkpoint
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 iso_page: touple of start and end time in UTC ISO format
+      :param3 resolution: data resolution
+      return: touple of engine name, analytic reference, resolution, start and end time in UTC ISO format
+      """
+      (st_iso, et_iso) = iso_page
+      ref = self.analytic_map[analytic_name]["ref"]
+      if analytic_name == "network" and self.network_per_nic:
+         # pages with per interface columns are kept separately from pages with summed interfaces
+         ref = "{}-per_nic".format(ref)
+      return (self.engine_name, ref, resolution, st_iso, et_iso)
+
+   def load_page(self, analytic_name, key, cache=None, checkpoint=None):
+      """
+      Load page from checkpoint or cache. Page found in cache is added to checkpoint
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 key: page key
+      :param3 cache: PageCache object or None if cache is not used
+      :param4 checkpoint: Checkpoint object or None if checkpoint is not used
+      return: dataframe with page data or None if page has to be fetched from engine
+      """
+      if checkpoint is not None:
+         csvdata = checkpoint.load(analytic_name, key)
+         if csvdata is not None:
+            return csvdata
+
+      if cache is not None:
+         csvdata = cache.load(key)
+         if csvdata is not None:
+            if checkpoint is not None:
+               checkpoint.store(analytic_name, key, csvdata)
+            return csvdata
+      return None
+
+   def convert_page(self, analytic_name, datapoint_sets):
+      """
+      Convert datapoint sets of page into CSV like Pandas dataframe
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 datapoint_sets: list of DatapointColumns objects in timestamp order
+      return: touple of dataframe with page data or None and resolution returned by engine
+      """
+      function_to_call = globals()[self.analytic_map[analytic_name]["function"]]
+      options = { "per_nic": self.network_per_nic } if analytic_name == "network" else {}
+      page_list = []
+      page_resolution = None
+      for d in datapoint_sets:
+         page_resolution = d.resolution
+         csvdata = function_to_call(d.datapoint_streams, self.time_zone, **options)
+         if csvdata is not None and not csvdata.empty:
+            page_list.append(csvdata)
+
+      if len(page_list) == 1:
+         csvdata = page_list[0]
+      elif len(page_list) > 1:
+         pagedata = ColumnAccumulator()
+         for csvdata in page_list:
+            pagedata.add(csvdata)
+         csvdata = pagedata.to_dataframe()
+      else:
+         csvdata = None
+      return (csvdata, page_resolution)
+
+   def store_page(self, analytic_name, page, key, csvdata, cache=None, checkpoint=None):
+      """
+      Store fetched page into cache and checkpoint. Pages which are still open
+      are not stored, so they will be fetched again next time
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 page: touple of start and end time in engine time zone
+      :param3 key: page key
+      :param4 csvdata: dataframe with page data or None
+      :param5 cache: PageCache object or None if cache is not used
+      :param6 checkpoint: Checkpoint object or None if checkpoint is not used
+      """
+      if self.is_page_closed(page[1]):
+         if cache is not None:
+            cache.store(key, csvdata)
+         if checkpoint is not None:
+            checkpoint.store(analytic_name, key, csvdata)
+
+   def fetch_datapoint_sets(self, ref, st, et, resolution, iso_page=None):
+      """
+      Get data from engine for time range. If engine is reporting an overflow,
+      time range is split into halves which are fetched separately
+      :param1 ref: analytic reference
+      :param2 st: start time in engine time zone
+      :param3 et: end time in engine time zone
+      :param4 resolution: data resolution
+      :param5 iso_page: start and end time converted by iso_page or None if they are not converted yet
+      return: list of DatapointColumns objects in timestamp order
+      """
+      logger = logging.getLogger()
+      (st_iso, et_iso) = iso_page if iso_page is not None else self.iso_page((st, et))
+      d = self.get_data(ref, resolution, st_iso, et_iso)
+
+      start_page = datetime.strptime(st, "%Y-%m-%d %H:%M:%S")
+      end_page = datetime.strptime(et, "%Y-%m-%d %H:%M:%S")
+      half = timedelta(seconds=(end_page - start_page).total_seconds() // 2)
+      if d.overflow and half >= timedelta(seconds=resolution):
+         logger.debug("Overflow for page {} {}, splitting page".format(st, et))
+         middle = str(start_page + half)
+         return self.fetch_datapoint_sets(ref, st, middle, resolution) + self.fetch_datapoint_sets(ref, middle, et, resolution)
+      if d.overflow:
+         logger.error("Overflow for page {} {} can't be avoided, some data can be missing".format(st, et))
+      return [d]
+
+   def get_data(self, ref, resolution, start_time, end_time):
+      """
+      Get data from engine for time range. Connection errors and transient HTTP errors
+      are retried with exponential backoff, if all retries fail the run is stopped
+      :param1 ref: analytic reference
+      :param2 resolution: data resolution
+      :param3 start_time: start time in ISO format in UTC
+      :param4 end_time: end time in ISO format in UTC
+      return: DatapointColumns object
+      """
+      logger = logging.getLogger()
+      delay = retry_delay
+      attempt = 0
+      while True:
+         engineobject = self.get_engine_object()
+         try:
+            return datapoints.get_data(engineobject, ref, resolution=resolution, start_time=start_time, end_time=end_time, pool=self.pool)
+         except HttpError as e:
+            if e.status not in retry_http_status or attempt >= page_retries:
+               error = "HTTP status {}".format(e.status)
+               break
+            if e.status == 401:
+               # session expired on engine, login again with next request
+               engineobject.force_relogin()
+            logger.debug("Request for {} {} {} failed with HTTP status {}, retry in {} s".format(ref, start_time, end_time, e.status, delay))
+         except (http.client.HTTPException, socket.error) as e:
+            if attempt >= page_retries:
+               error = str(e)
+               break
+            reset_connection(engineobject)
+            logger.debug("Request for {} {} {} failed with {}, retry in {} s".format(ref, start_time, end_time, repr(e), delay))
+         sleep(delay)
+         delay = min(delay * 2, max_retry_delay)
+         attempt += 1
+
+      print_error("Can't get data from engine {} for {} - {}: {}".format(self.engine_address, start_time, end_time, error))
+      logger.error("Can't get data from engine {} for {} {} {} after {} retries: {}".format(self.engine_address, ref, start_time, end_time, page_retries, error))
       sys.exit(1)
 
-def get_engine_name():
-   return __engine_name
+   def process_analytics(self, analytic_name, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None):
+      """
+      Get data from engine for particular analytic name, start time, end time and resolution
+      Gathered data will be converted into CSV like Pandas dataframe and converted into statistics
+
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 start_time: start time in engine time zone
+      :param3 end_time: end time in engine time zone
+      :param4 resolution: data resolution (default 60), allowed values 1, 60
+      :param5 parallel: number of pages fetched concurrently (default 8)
+      :param6 cache: PageCache object or None if cache is not used
+      :param7 max_memory: max size of collected data in bytes or None for no limit
+      :param8 checkpoint: Checkpoint object or None if checkpoint is not used
+      :param9 raw_files: RawFiles object or None if raw data are not saved
+      :param10 detail_days: number of most recent days fetched with requested resolution, older data
+                            are fetched with coarse resolution. None is using default_detail_days
+      return: dictonary of statistics per analytic (see create_dataframes from dataprocessing for details)
+      """
+
+      csvdata = self.collect_dataframe(analytic_name, start_time, end_time, resolution, parallel, cache, max_memory, checkpoint, raw_files, detail_days)
+      return analytic_statistics(analytic_name, csvdata)
+
+   def collect_dataframe(self, analytic_name, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None, accumulator=None):
+      """
+      Get data from engine for particular analytic name, start time, end time and resolution
+      and convert it into CSV like Pandas dataframe
+      Pages are fetched concurrently and added to dataframe in timestamp order
+
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 start_time: start time in engine time zone
+      :param3 end_time: end time in engine time zone
+      :param4 resolution: data resolution (default 60), allowed values 1, 60, 3600
+      :param5 parallel: number of pages fetched concurrently (default 8)
+      :param6 cache: PageCache object or None if cache is not used
+      :param7 max_memory: max size of collected data in bytes or None for no limit
+      :param8 checkpoint: Checkpoint object or None if checkpoint is not used
+      :param9 raw_files: RawFiles object or None if raw data are not saved
+      :param10 detail_days: number of most recent days fetched with requested resolution, older data
+                            are fetched with coarse resolution. None is using default_detail_days
+      :param11 accumulator: object with add and to_dataframe methods like ColumnAccumulator, which gets pages
+                            in timestamp order instead of ColumnAccumulator, or None to collect all data
+      return: dataframe with collected data or None if there is no data
+      """
+
+      # check if resolution is in 1, 60 or 3600
+
+      logger = logging.getLogger()
+
+      time_range = self.check_time_range(start_time, end_time)
+      if time_range is None:
+         exit(1)
+      (start_time, end_time) = time_range
+
+      # pages are saved into raw file as soon as all previous pages are collected
+      raw_writer = raw_files.writer(self.engine_name, analytic_name) if raw_files is not None else None
+      assembler = PageAssembler(max_memory, raw_writer, accumulator)
+
+      logger.debug("Fetching {} pages using {} workers".format(analytic_name, parallel))
+
+      # aligned pages are same for overlapping time ranges, so they can be found in cache or checkpoint
+      planner = ResolutionPlanner(start_time, end_time, resolution, align=cache is not None or checkpoint is not None,
+                                  detail_days=detail_days)
+      running = {}
+
+      with ThreadPoolExecutor(max_workers=parallel) as executor:
+         while True:
+            while len(running) < parallel:
+               planned = planner.next_page()
+               if planned is None:
+                  break
+               (page, page_resolution) = planned
+               assembler.plan(page)
+               running[executor.submit(self.fetch_page, analytic_name, page, page_resolution, cache, checkpoint)] = page
+
+            if not running:
+               break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+               page = running.pop(future)
+               (csvdata, page_resolution) = future.result()
+               planner.feedback(page, page_resolution)
+               try:
+                  assembler.add(page, csvdata)
+               except MemoryError as e:
+                  print_error("Data for {} exceeded memory limit: {}".format(analytic_name, str(e)))
+                  logger.error("Data for {} exceeded memory limit: {}".format(analytic_name, str(e)))
+                  sys.exit(1)
+
+      if cache is not None:
+         cache.evict()
+
+      return assembler.to_dataframe()
+
+   def check_time_range(self, start_time, end_time):
+      """
+      Check format of start and end time. Missing start time is set to 7 days before
+      engine current time and missing end time to engine current time
+      :param1 start_time: start time in engine time zone or None
+      :param2 end_time: end time in engine time zone or None
+      return: touple of start and end time or None if time format is wrong
+      """
+      logger = logging.getLogger()
+
+      if start_time is None:
+         ts = datetime.strptime(self.current_time, '%Y-%m-%d %H:%M:%S')
+         ts = ts - timedelta(days=7)
+         start_time =  "{} {}".format(ts.date(), ts.time())
+      else:
+         m = re.match(r'(\d\d\d\d-\d\d-\d\d) (\d\d:\d\d:\d\d)', start_time)
+         if m is None:
+            print_error("Start time {} is not matching required format - YYYY-MM-DD HH24:MI:SS".format(start_time))
+            logger.error("Start time {} is not matching required format - YYYY-MM-DD HH24:MI:SS".format(start_time))
+            return None
+
+      if end_time is None:
+         end_time = self.current_time
+      else:
+         m = re.match(r'(\d\d\d\d-\d\d-\d\d) (\d\d:\d\d:\d\d)', end_time)
+         if m is None:
+            print_error("End time {} is not matching required format - YYYY-MM-DD HH24:MI:SS".format(end_time))
+            logger.error("End time {} is not matching required format - YYYY-MM-DD HH24:MI:SS".format(end_time))
+            return None
+
+      return (start_time, end_time)
+
+   def collect_analytics(self, analytic_list, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None):
+      """
+      Get data from engine for list of analytics concurrently
+      All analytics are sharing a connected engine session
+
+      :param1 analytic_list: list of analytic names ( cpu, disk, nfs, iscsi, network)
+      :param2 start_time: start time in engine time zone
+      :param3 end_time: end time in engine time zone
+      :param4 resolution: data resolution (default 60), allowed values 1, 60
+      :param5 parallel: number of pages fetched concurrently per analytic (default 8)
+      :param6 cache: PageCache object or None if cache is not used
+      :param7 max_memory: max size of collected data per analytic in bytes or None for no limit
+      :param8 checkpoint: Checkpoint object or None if checkpoint is not used
+      :param9 raw_files: RawFiles object or None if raw data are not saved
+      :param10 detail_days: number of most recent days fetched with requested resolution, older data
+                            are fetched with coarse resolution. None is using default_detail_days
+      yield: touple of analytic name and statistics, in order analytics are collected
+      """
+
+      logger = logging.getLogger()
+
+      with ThreadPoolExecutor(max_workers=max(len(analytic_list), 1)) as executor:
+         futures = {}
+         for analytic_name in analytic_list:
+            future = executor.submit(self.process_analytics, analytic_name, start_time, end_time, resolution, parallel, cache, max_memory, checkpoint, raw_files, detail_days)
+            futures[future] = analytic_name
+
+         for future in as_completed(futures):
+            logger.debug("Analytic {} collected".format(futures[future]))
+            yield (futures[future], future.result())
+
+      logger.debug("Transfer from engine {}: {}".format(self.engine_address, self.transfer))
+
+   def sweep_analytics(self, analytic_list, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None):
+      """
+      Get data from engine for list of analytics in a single pass over time range
+      Each time window is requested for all analytics together and its pages are added to data
+      of their analytic as soon as they are fetched. Only parallel / number of analytics windows
+      are fetched concurrently, so data in flight are limited to few windows of all analytics.
+      Statistics of analytics are calculated concurrently when all windows are collected
+
+      :param1 analytic_list: list of analytic names ( cpu, disk, nfs, iscsi, network)
+      :param2 start_time: start time in engine time zone
+      :param3 end_time: end time in engine time zone
+      :param4 resolution: data resolution (default 60), allowed values 1, 60
+      :param5 parallel: number of pages fetched concurrently for all analytics (default 8)
+      :param6 cache: PageCache object or None if cache is not used
+      :param7 max_memory: max size of collected data per analytic in bytes or None for no limit
+      :param8 checkpoint: Checkpoint object or None if checkpoint is not used
+      :param9 raw_files: RawFiles object or None if raw data are not saved
+      :param10 detail_days: number of most recent days fetched with requested resolution, older data
+                            are fetched with coarse resolution. None is using default_detail_days
+      yield: touple of analytic name and statistics, in order statistics are calculated
+      """
+
+      logger = logging.getLogger()
+
+      time_range = self.check_time_range(start_time, end_time)
+      if time_range is None:
+         exit(1)
+      (start_time, end_time) = time_range
+
+      sweep = AnalyticSweep(self, analytic_list, start_time, end_time, resolution, align=cache is not None or checkpoint is not None,
+                            detail_days=detail_days, max_memory=max_memory, raw_files=raw_files)
+      logger.debug("Sweeping {} using {} windows".format(analytic_list, sweep.parallel_windows(parallel)))
+      running = {}
+
+      with ThreadPoolExecutor(max_workers=max(parallel, len(analytic_list), 1)) as executor:
+         while True:
+            while len(sweep.pending) < sweep.parallel_windows(parallel):
+               planned = sweep.next_window()
+               if planned is None:
+                  break
+               (page, page_resolution, iso_page) = planned
+               for analytic_name in analytic_list:
+                  future = executor.submit(self.fetch_page, analytic_name, page, page_resolution, cache, checkpoint, iso_page)
+                  running[future] = (analytic_name, page)
+
+            if not running:
+               break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+               (analytic_name, page) = running.pop(future)
+               (csvdata, page_resolution) = future.result()
+               try:
+                  sweep.add(analytic_name, page, csvdata, page_resolution)
+               except MemoryError as e:
+                  print_error("Data for {} exceeded memory limit: {}".format(analytic_name, str(e)))
+                  logger.error("Data for {} exceeded memory limit: {}".format(analytic_name, str(e)))
+                  sys.exit(1)
+
+      if cache is not None:
+         cache.evict()
+      logger.debug("Transfer from engine {}: {}".format(self.engine_address, self.transfer))
+
+      with ThreadPoolExecutor(max_workers=max(len(analytic_list), 1)) as executor:
+         futures = { executor.submit(sweep.statistics, analytic_name): analytic_name for analytic_name in analytic_list }
+         for future in as_completed(futures):
+            logger.debug("Analytic {} collected".format(futures[future]))
+            yield (futures[future], future.result())
+
+
+class CollectionError(Exception):
+   """
+   Raised by asyncio collection for errors, which are stopping synchronous collection with exit.
+   Exit can't be used inside of event loop tasks. Error is already printed and logged
+   """
+
+
+class AsyncEngineSession(EngineSession):
+   """
+   Engine session using asyncio client instead of delphixpy and worker threads
+   All requests of session are running in one event loop and they are sharing keep-alive
+   connections of a pool, which can be shared by sessions of many engines too.
+   Synchronous methods are same as in EngineSession, so session can replace it
+   """
+
+   def __init__(self, engine_address, engine_username, engine_password, runner=None, pool=None,
+                max_requests=default_engine_requests, network_per_nic=False):
+      """
+      :param1 engine_address: The Virtualization Engine's address (IP/DNS Name)
+      :param2 engine_username: Username to authenticate
+      :param3 engine_password: User's password
+      :param4 runner: EventLoopThread shared with other sessions or None for own event loop
+      :param5 pool: ConnectionPool shared with other sessions or None for own pool
+      :param6 max_requests: max number of requests running concurrently to engine
+      :param7 network_per_nic: add inBytes_<nic> and outBytes_<nic> columns for each interface to network data
+      """
+      super().__init__(engine_address, engine_username, engine_password, network_per_nic)
+      self.own_runner = runner is None
+      self.runner = EventLoopThread() if runner is None else runner
+      self.client = AsyncEngineClient(engine_address, engine_username, engine_password, pool, max_requests)
+      self.transfer = self.client.stats
+
+   def run(self, coroutine):
+      """
+      Run coroutine in event loop of session, errors of collection are stopping the run
+      :param1 coroutine: coroutine to run
+      return: result of coroutine
+      """
+      try:
+         return self.runner.run(coroutine)
+      except CollectionError:
+         sys.exit(1)
+
+   def close(self):
+      """
+      Close connections and event loop owned by session
+      """
+      self.runner.loop.call_soon_threadsafe(self.client.close)
+      if self.own_runner:
+         self.runner.close()
+
+   def connect(self):
+      """
+      Connect to the Delphix Engine and get time and analytic information
+      """
+      self.run(self.connect_async())
+
+   def collect_dataframe(self, analytic_name, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None, accumulator=None):
+      """
+      Get data from engine for particular analytic name, start time, end time and resolution
+      and convert it into CSV like Pandas dataframe. See collect_dataframe_async for parameters
+      return: dataframe with collected data or None if there is no data
+      """
+      return self.run(self.collect_dataframe_async(analytic_name, start_time, end_time, resolution, parallel, cache, max_memory, checkpoint, raw_files, detail_days, accumulator))
+
+   def collect_analytics(self, analytic_list, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None):
+      """
+      Get data from engine for list of analytics concurrently. Analytics are collected in event loop
+      while caller is processing analytics collected before. See collect_analytics_async for parameters
+      yield: touple of analytic name and statistics, in order analytics are collected
+      """
+      try:
+         yield from self.runner.iterate(self.collect_analytics_async(analytic_list, start_time, end_time, resolution, parallel, cache, max_memory, checkpoint, raw_files, detail_days))
+      except CollectionError:
+         sys.exit(1)
+
+   def sweep_analytics(self, analytic_list, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None):
+      """
+      Get data from engine for list of analytics in a single pass over time range
+      See sweep_analytics of EngineSession for parameters
+      yield: touple of analytic name and statistics, in order statistics are calculated
+      """
+      try:
+         yield from self.runner.iterate(self.sweep_analytics_async(analytic_list, start_time, end_time, resolution, parallel, cache, max_memory, checkpoint, raw_files, detail_days))
+      except CollectionError:
+         sys.exit(1)
+
+   async def connect_async(self):
+      """
+      Login to the Delphix Engine and get time and analytic information
+      Raise CollectionError if engine can't be connected
+      """
+      try:
+         await self.client.login()
+         timeobj = await self.client.get_time()
+         self.time_zone = timeobj["systemTimeZone"]
+         self.current_time = convert_from_utc(timeobj["currentTime"], self.time_zone)
+
+         systemobj = await self.client.get_system()
+         self.engine_name = systemobj["hostname"]
 
-def get_available_analytics():
+         for analytic_def in await self.client.get_analytics():
+            if analytic_def["name"][8:] in self.analytic_map:
+               self.analytic_map[analytic_def["name"][8:]]["ref"] = analytic_def["reference"]
+
+      except (HttpError, RequestError, http.client.HTTPException, socket.error) as e:
+         self.report_connect_error(e)
+         raise CollectionError(str(e))
+
+   async def fetch_page_async(self, analytic_name, page, resolution, cache=None, checkpoint=None, iso_page=None):
+      """
+      Get data from engine for a single page and convert it into CSV like Pandas dataframe
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 page: touple of start and end time in engine time zone
+      :param3 resolution: data resolution
+      :param4 cache: PageCache object or None if cache is not used
+      :param5 checkpoint: Checkpoint object or None if checkpoint is not used
+      :param6 iso_page: page converted by iso_page or None if page is not converted yet
+      return: touple of dataframe with page data and resolution returned by engine
+              (None if page was loaded from checkpoint or cache)
+      """
+      if iso_page is None:
+         iso_page = self.iso_page(page)
+      key = self.page_key(analytic_name, iso_page, resolution)
+      csvdata = self.load_page(analytic_name, key, cache, checkpoint)
+      if csvdata is not None:
+         return (csvdata, None)
+
+      (st, et) = page
+      datapoint_sets = await self.fetch_datapoint_sets_async(self.analytic_map[analytic_name]["ref"], st, et, resolution, iso_page)
+      (csvdata, page_resolution) = self.convert_page(analytic_name, datapoint_sets)
+      self.store_page(analytic_name, page, key, csvdata, cache, checkpoint)
+      return (csvdata, page_resolution)
+
+   async def fetch_datapoint_sets_async(self, ref, st, et, resolution, iso_page=None):
+      """
+      Get data from engine for time range. If engine is reporting an overflow,
+      time range is split into halves which are fetched concurrently
+      :param1 ref: analytic reference
+      :param2 st: start time in engine time zone
+      :param3 et: end time in engine time zone
+      :param4 resolution: data resolution
+      :param5 iso_page: start and end time converted by iso_page or None if they are not converted yet
+      return: list of DatapointColumns objects in timestamp order
+      """
+      logger = logging.getLogger()
+      (st_iso, et_iso) = iso_page if iso_page is not None else self.iso_page((st, et))
+      d = await self.get_data_async(ref, resolution, st_iso, et_iso)
+
+      start_page = datetime.strptime(st, "%Y-%m-%d %H:%M:%S")
+      end_page = datetime.strptime(et, "%Y-%m-%d %H:%M:%S")
+      half = timedelta(seconds=(end_page - start_page).total_seconds() // 2)
+      if d.overflow and half >= timedelta(seconds=resolution):
+         logger.debug("Overflow for page {} {}, splitting page".format(st, et))
+         middle = str(start_page + half)
+         (first, second) = await asyncio.gather(self.fetch_datapoint_sets_async(ref, st, middle, resolution),
+                                                self.fetch_datapoint_sets_async(ref, middle, et, resolution))
+         return first + second
+      if d.overflow:
+         logger.error("Overflow for page {} {} can't be avoided, some data can be missing".format(st, et))
+      return [d]
+
+   async def get_data_async(self, ref, resolution, start_time, end_time):
+      """
+      Get data from engine for time range. Connection errors and transient HTTP errors
+      are retried with exponential backoff, if all retries fail CollectionError is raised
+      :param1 ref: analytic reference
+      :param2 resolution: data resolution
+      :param3 start_time: start time in ISO format in UTC
+      :param4 end_time: end time in ISO format in UTC
+      return: DatapointColumns object
+      """
+      logger = logging.getLogger()
+      delay = retry_delay
+      attempt = 0
+      while True:
+         login = self.client.logins
+         expired = False
+         try:
+            return await self.client.get_data(ref, resolution=resolution, start_time=start_time, end_time=end_time)
+         except HttpError as e:
+            if e.status not in retry_http_status or attempt >= page_retries:
+               error = "HTTP status {}".format(e.status)
+               break
+            expired = e.status == 401
+            logger.debug("Request for {} {} {} failed with HTTP status {}, retry in {} s".format(ref, start_time, end_time, e.status, delay))
+         except (http.client.HTTPException, socket.error) as e:
+            if attempt >= page_retries:
+               error = str(e)
+               break
+            logger.debug("Request for {} {} {} failed with {}, retry in {} s".format(ref, start_time, end_time, repr(e), delay))
+         await asyncio.sleep(delay)
+         delay = min(delay * 2, max_retry_delay)
+         attempt += 1
+         if expired:
+            # session expired on engine, login again unless other request already did it
+            try:
+               await self.client.login(login)
+            except (HttpError, RequestError, http.client.HTTPException, socket.error) as e:
+               logger.debug("Login to {} failed with {}".format(self.engine_address, repr(e)))
+
+      print_error("Can't get data from engine {} for {} - {}: {}".format(self.engine_address, start_time, end_time, error))
+      logger.error("Can't get data from engine {} for {} {} {} after {} retries: {}".format(self.engine_address, ref, start_time, end_time, page_retries, error))
+      raise CollectionError(error)
+
+   async def process_analytics_async(self, analytic_name, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None):
+      """
+      Get data from engine for particular analytic and convert them into statistics
+      Statistics are calculated in a worker thread, so event loop is fetching other analytics meanwhile
+      See process_analytics for parameters
+      return: dictonary of statistics per analytic (see create_dataframes from dataprocessing for details)
+      """
+      csvdata = await self.collect_dataframe_async(analytic_name, start_time, end_time, resolution, parallel, cache, max_memory, checkpoint, raw_files, detail_days)
+      return await asyncio.get_event_loop().run_in_executor(None, analytic_statistics, analytic_name, csvdata)
+
+   async def collect_dataframe_async(self, analytic_name, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None, accumulator=None):
+      """
+      Get data from engine for particular analytic name, start time, end time and resolution
+      and convert it into CSV like Pandas dataframe
+      Pages are fetched concurrently as event loop tasks and added to dataframe in timestamp order
+
+      :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+      :param2 start_time: start time in engine time zone
+      :param3 end_time: end time in engine time zone
+      :param4 resolution: data resolution (default 60), allowed values 1, 60, 3600
+      :param5 parallel: number of pages fetched concurrently (default 8)
+      :param6 cache: PageCache object or None if cache is not used
+      :param7 max_memory: max size of collected data in bytes or None for no limit
+      :param8 checkpoint: Checkpoint object or None if checkpoint is not used
+      :param9 raw_files: RawFiles object or None if raw data are not saved
+      :param10 detail_days: number of most recent days fetched with requested resolution, older data
+                            are fetched with coarse resolution. None is using default_detail_days
+      :param11 accumulator: object with add and to_dataframe methods like ColumnAccumulator, which gets pages
+                            in timestamp order instead of ColumnAccumulator, or None to collect all data
+      return: dataframe with collected data or None if there is no data
+      """
+
+      logger = logging.getLogger()
+
+      time_range = self.check_time_range(start_time, end_time)
+      if time_range is None:
+         raise CollectionError("Wrong time format")
+      (start_time, end_time) = time_range
+
+      raw_writer = raw_files.writer(self.engine_name, analytic_name) if raw_files is not None else None
+      assembler = PageAssembler(max_memory, raw_writer, accumulator)
+
+      logger.debug("Fetching {} pages using {} tasks".format(analytic_name, parallel))
+
+      planner = ResolutionPlanner(start_time, end_time, resolution, align=cache is not None or checkpoint is not None,
+                                  detail_days=detail_days)
+      running = {}
+
+      try:
+         while True:
+            while len(running) < parallel:
+               planned = planner.next_page()
+               if planned is None:
+                  break
+               (page, page_resolution) = planned
+               assembler.plan(page)
+               running[asyncio.ensure_future(self.fetch_page_async(analytic_name, page, page_resolution, cache, checkpoint))] = page
+
+            if not running:
+               break
+
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+               page = running.pop(task)
+               (csvdata, page_resolution) = task.result()
+               planner.feedback(page, page_resolution)
+               try:
+                  assembler.add(page, csvdata)
+               except MemoryError as e:
+                  print_error("Data for {} exceeded memory limit: {}".format(analytic_name, str(e)))
+                  logger.error("Data for {} exceeded memory limit: {}".format(analytic_name, str(e)))
+                  raise CollectionError(str(e))
+      finally:
+         for task in running:
+            task.cancel()
+
+      if cache is not None:
+         cache.evict()
+
+      return assembler.to_dataframe()
+
+   async def collect_analytics_async(self, analytic_list, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None):
+      """
+      Get data from engine for list of analytics concurrently
+      See collect_analytics of EngineSession for parameters
+      yield: touple of analytic name and statistics, in order analytics are collected
+      """
+
+      logger = logging.getLogger()
+
+      running = {}
+      for analytic_name in analytic_list:
+         task = asyncio.ensure_future(self.process_analytics_async(analytic_name, start_time, end_time, resolution, parallel, cache, max_memory, checkpoint, raw_files, detail_days))
+         running[task] = analytic_name
+
+      try:
+         while running:
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+               analytic_name = running.pop(task)
+               logger.debug("Analytic {} collected".format(analytic_name))
+               yield (analytic_name, task.result())
+      finally:
+         for task in running:
+            task.cancel()
+
+      logger.debug("Transfer from engine {}: {}".format(self.engine_address, self.transfer))
+
+   async def sweep_analytics_async(self, analytic_list, start_time=None, end_time=None, resolution=60, parallel=default_parallel, cache=None, max_memory=None, checkpoint=None, raw_files=None, detail_days=None):
+      """
+      Get data from engine for list of analytics in a single pass over time range
+      Pages of all analytics for a window are fetched as event loop tasks, statistics
+      are calculated in worker threads when all windows are collected
+      See sweep_analytics of EngineSession for parameters
+      yield: touple of analytic name and statistics, in order statistics are calculated
+      """
+
+      logger = logging.getLogger()
+
+      time_range = self.check_time_range(start_time, end_time)
+      if time_range is None:
+         raise CollectionError("Wrong time format")
+      (start_time, end_time) = time_range
+
+      sweep = AnalyticSweep(self, analytic_list, start_time, end_time, resolution, align=cache is not None or checkpoint is not None,
+                            detail_days=detail_days, max_memory=max_memory, raw_files=raw_files)
+      logger.debug("Sweeping {} using {} windows".format(analytic_list, sweep.parallel_windows(parallel)))
+      running = {}
+
+      try:
+         while True:
+            while len(sweep.pending) < sweep.parallel_windows(parallel):
+               planned = sweep.next_window()
+               if planned is None:
+                  break
+               (page, page_resolution, iso_page) = planned
+               for analytic_name in analytic_list:
+                  task = asyncio.ensure_future(self.fetch_page_async(analytic_name, page, page_resolution, cache, checkpoint, iso_page))
+                  running[task] = (analytic_name, page)
+
+            if not running:
+               break
+
+            done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+               (analytic_name, page) = running.pop(task)
+               (csvdata, page_resolution) = task.result()
+               try:
+                  sweep.add(analytic_name, page, csvdata, page_resolution)
+               except MemoryError as e:
+                  print_error("Data for {} exceeded memory limit: {}".format(analytic_name, str(e)))
+                  logger.error("Data for {} exceeded memory limit: {}".format(analytic_name, str(e)))
+                  raise CollectionError(str(e))
+      finally:
+         for task in running:
+            task.cancel()
+
+      if cache is not None:
+         cache.evict()
+      logger.debug("Transfer from engine {}: {}".format(self.engine_address, self.transfer))
+
+      loop = asyncio.get_event_loop()
+      running = { loop.run_in_executor(None, sweep.statistics, analytic_name): analytic_name for analytic_name in analytic_list }
+      while running:
+         done, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+         for future in done:
+            analytic_name = running.pop(future)
+            logger.debug("Analytic {} collected".format(analytic_name))
+            yield (analytic_name, future.result())
+
+
+def align_time(timestamp, page_length):
+   """
+   Round timestamp down to multiple of page length
+   :param1 timestamp: datetime to align
+   :param2 page_length: page length as timedelta
+   return: aligned datetime
+   """
+   epoch = datetime(1970, 1, 1)
+   return epoch + ((timestamp - epoch) // page_length) * page_length
+
+
+def get_page_length(resolution):
+   """
+   Calculate page length for resolution to get page_points datapoints in one request
+   without exceeding a max time range allowed by engine
+   :param1 resolution: data resolution in seconds
+   return: page length as timedelta
+   """
+   limit = max_page_length[max([r for r in max_page_length if r <= resolution] or [1])]
+   return min(timedelta(seconds=resolution * page_points), limit)
+
+
+class PagePlanner(object):
    """
-   Return a list of analytics required by dxanalyze and available in engine
-   return: list of analytics
+   Generate pages between start and end time with page length adjusted
+   to the data returned by engine. If engine returns data with lower resolution
+   than requested, next pages are longer
    """
-   return [x for x in __analytic_map.keys() if __analytic_map[x]["ref"] is not None ]
 
-def generate_pages(start_time_str, end_time_str):
+   def __init__(self, start_time_str, end_time_str, resolution, align=False):
+      """
+      :param1 start_time_str: start time using engine timezone
+      :param2 end_time_str: end time using engine timezone
+      :param3 resolution: requested data resolution
+      :param4 align: align pages to multiple of page length
+      """
+      self.start_time = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
+      self.end_time = datetime.strptime(end_time_str, "%Y-%m-%d %H:%M:%S")
+      self.align = align
+      self.page_length = get_page_length(resolution)
+
+   def next_page(self):
+      """
+      Generate next page
+      return: touple of start and end time in engine timezone or None if there is no more pages
+      """
+      if self.start_time >= self.end_time:
+         return None
+      end_page = self.start_time + self.page_length
+      if self.align:
+         end_page = align_time(end_page, self.page_length)
+      if end_page > self.end_time:
+         end_page = self.end_time
+      page = (str(self.start_time), str(end_page))
+      self.start_time = end_page
+      return page
+
+   def feedback(self, resolution):
+      """
+      Adjust page length using resolution of data returned by engine
+      :param1 resolution: resolution returned by engine or None if not known
+      """
+      logger = logging.getLogger()
+      if resolution is None:
+         return
+      page_length = get_page_length(resolution)
+      if page_length > self.page_length:
+         logger.debug("Page length changed from {} to {}".format(self.page_length, page_length))
+         self.page_length = page_length
+
+
+def plan_resolutions(start_time_str, end_time_str, resolution, detail_days=None):
    """
-   Generator of pages using a time stamp between start_time tp end_time using 1 hour pages
+   Split time range into older part fetched with coarse resolution and most recent
+   detail days fetched with requested resolution. Split is aligned to page length of coarse
+   resolution, so coarse pages have the same keys in every run and are not overlapping with detailed ones
    :param1 start_time_str: start time using engine timezone
    :param2 end_time_str: end time using engine timezone
-   yield: touple of start and end time in iso format in zulu time zone for each page
+   :param3 resolution: requested data resolution
+   :param4 detail_days: number of days with requested resolution, None is using default_detail_days
+   return: list of touples with start time, end time and resolution in time order
    """
+   if detail_days is None:
+      detail_days = default_detail_days
+   if not detail_days or resolution >= coarse_resolution:
+      return [(start_time_str, end_time_str, resolution)]
 
-   logger = logging.getLogger()
-   logger.debug("start time {} end time {}".format(start_time_str, end_time_str))
-   delta1h = timedelta(minutes=60)
    start_time = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
    end_time = datetime.strptime(end_time_str, "%Y-%m-%d %H:%M:%S")
+   split_time = align_time(end_time - timedelta(days=detail_days), get_page_length(coarse_resolution))
+   if split_time <= start_time:
+      return [(start_time_str, end_time_str, resolution)]
+   return [(start_time_str, str(split_time), coarse_resolution), (str(split_time), end_time_str, resolution)]
 
-   while(start_time < end_time):
-      end_page = start_time + delta1h
-      logger.debug("start date {} end date {}".format(start_time, end_page))
-      if end_page > end_time:
-         end_page = end_time
-      yield (str(start_time), str(end_page))
-      start_time = end_page
 
+class ResolutionPlanner(object):
+   """
+   Generate pages for time range planned by plan_resolutions, so each page is
+   fetched with resolution of its part of time range
+   """
 
-def process_analytics(analytic_name, start_time=None, end_time=None, resolution=60):
+   def __init__(self, start_time_str, end_time_str, resolution, align=False, detail_days=None):
+      """
+      :param1 start_time_str: start time using engine timezone
+      :param2 end_time_str: end time using engine timezone
+      :param3 resolution: requested data resolution
+      :param4 align: align pages to multiple of page length
+      :param5 detail_days: number of days with requested resolution, None is using default_detail_days
+      """
+      self.planners = [ (PagePlanner(st, et, r, align), r)
+                        for (st, et, r) in plan_resolutions(start_time_str, end_time_str, resolution, detail_days) ]
+      self.planned = {}
+
+   def next_page(self):
+      """
+      Generate next page
+      return: touple of page (start and end time in engine timezone) and resolution
+              or None if there is no more pages
+      """
+      while self.planners:
+         (planner, resolution) = self.planners[0]
+         page = planner.next_page()
+         if page is not None:
+            self.planned[page] = planner
+            return (page, resolution)
+         self.planners.pop(0)
+      return None
+
+   def feedback(self, page, resolution):
+      """
+      Adjust page length of time range part, which page belongs to
+      :param1 page: fetched page
+      :param2 resolution: resolution returned by engine or None if not known
+      """
+      self.planned.pop(page).feedback(resolution)
+
+
+class PageAssembler(object):
+   """
+   Add fetched pages to collected data in order they were planned, regardless which page
+   was fetched first. Pages are saved into raw file as soon as all previous pages are collected
    """
-   Get data from engine for particular analytic name, start time, end time and resolution
-   Gathered data will be converted into CSV like Pandas dataframe and converted into statistics
 
-   :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
-   :param2 start_time: start time in engine time zone
-   :param3 end_time: end time in engine time zone
-   :param4 resolution: data resolution (default 60), allowed values 1, 60
-   return: dictonary of statistics per analytic (see create_dataframes from dataprocessing for details)
+   def __init__(self, max_memory=None, raw_writer=None, accumulator=None):
+      """
+      :param1 max_memory: max size of collected data in bytes or None for no limit
+      :param2 raw_writer: RawWriter object or None if raw data are not saved
+      :param3 accumulator: object used instead of ColumnAccumulator or None
+      """
+      self.totaldata = accumulator if accumulator is not None else ColumnAccumulator(max_memory)
+      self.raw_writer = raw_writer
+      self.page_order = []
+      self.fetched = {}
+
+   def plan(self, page):
+      """
+      Record planned page, pages are added in order they are planned
+      :param1 page: planned page
+      """
+      self.page_order.append(page)
+
+   def add(self, page, csvdata):
+      """
+      Add fetched page and all following pages which were fetched before it
+      Raise MemoryError if collected data exceeded memory limit
+      :param1 page: fetched page
+      :param2 csvdata: dataframe with page data or None
+      """
+      self.fetched[page] = csvdata
+      while self.page_order and self.page_order[0] in self.fetched:
+         csvdata = self.fetched.pop(self.page_order.pop(0))
+         if self.raw_writer is not None:
+            self.raw_writer.add(csvdata)
+         self.totaldata.add(csvdata)
+
+   def to_dataframe(self):
+      """
+      Create dataframe from collected data and close raw file
+      return: dataframe with collected data or None if there is no data
+      """
+      if self.totaldata.empty:
+         return None
+      csvdata = self.totaldata.to_dataframe()
+      if self.raw_writer is not None:
+         self.raw_writer.close(csvdata)
+      return csvdata
+
+
+class AnalyticSweep(object):
+   """
+   Single pass over time range for many analytics. Time range is split into windows and each window
+   is fetched for all analytics. Window is converted to UTC once for all analytics and its pages
+   are added to assembler of their analytic as soon as they are fetched
+   pending: dict of windows in flight with set of analytics not fetched yet
    """
 
-   # check if resolution is in 1, 60 or 3600
+   def __init__(self, session, analytic_list, start_time_str, end_time_str, resolution, align=False, detail_days=None,
+                max_memory=None, raw_files=None):
+      """
+      :param1 session: connected EngineSession
+      :param2 analytic_list: list of analytic names
+      :param3 start_time_str: start time using engine timezone
+      :param4 end_time_str: end time using engine timezone
+      :param5 resolution: requested data resolution
+      :param6 align: align windows to multiple of page length
+      :param7 detail_days: number of days with requested resolution, None is using default_detail_days
+      :param8 max_memory: max size of collected data per analytic in bytes or None for no limit
+      :param9 raw_files: RawFiles object or None if raw data are not saved
+      """
+      self.session = session
+      self.analytic_list = analytic_list
+      self.planner = ResolutionPlanner(start_time_str, end_time_str, resolution, align, detail_days)
+      self.assemblers = { analytic_name: PageAssembler(max_memory, raw_files.writer(session.engine_name, analytic_name)
+                                                       if raw_files is not None else None)
+                          for analytic_name in analytic_list }
+      self.pending = {}
+      self.resolutions = {}
 
-   logger = logging.getLogger()
+   def parallel_windows(self, parallel):
+      """
+      Number of windows fetched concurrently, so about parallel pages are fetched concurrently
+      :param1 parallel: number of pages fetched concurrently
+      return: number of windows
+      """
+      return max(parallel // max(len(self.analytic_list), 1), 1)
 
-   if start_time is None:
-      ts = datetime.strptime(__current_time, '%Y-%m-%d %H:%M:%S')
-      ts = ts - timedelta(days=7)
-      start_time =  "{} {}".format(ts.date(), ts.time())
-   else:
-      m = re.match(r'(\d\d\d\d-\d\d-\d\d) (\d\d:\d\d:\d\d)', start_time)
-      if m is None:
-         print_error("Start time {} is not matching required format - YYYY-MM-DD HH24:MI:SS")
-         logger.error("Start time {} is not matching required format - YYYY-MM-DD HH24:MI:SS")
-         exit(1)
+   def next_window(self):
+      """
+      Generate next window
+      return: touple of window (start and end time in engine timezone), resolution and window
+              converted by iso_page of session or None if there is no more windows
+      """
+      planned = self.planner.next_page()
+      if planned is None:
+         return None
+      (page, resolution) = planned
+      for assembler in self.assemblers.values():
+         assembler.plan(page)
+      self.pending[page] = set(self.analytic_list)
+      self.resolutions[page] = []
+      return (page, resolution, self.session.iso_page(page))
 
-   if end_time is None:
-      end_time = __current_time
-   else:
-      m = re.match(r'(\d\d\d\d-\d\d-\d\d) (\d\d:\d\d:\d\d)', end_time)
-      if m is None:
-         print_error("Enf time {} is not matching required format - YYYY-MM-DD HH24:MI:SS")
-         logger.error("End time {} is not matching required format - YYYY-MM-DD HH24:MI:SS")
-         exit(1)
+   def add(self, analytic_name, page, csvdata, resolution):
+      """
+      Add fetched page of analytic. When window is fetched for all analytics, page length
+      is adjusted to finest resolution returned by engine for the window
+      Raise MemoryError if collected data of analytic exceeded memory limit
+      :param1 analytic_name: analytic name
+      :param2 page: window of page
+      :param3 csvdata: dataframe with page data or None
+      :param4 resolution: resolution returned by engine or None if not known
+      """
+      self.pending[page].discard(analytic_name)
+      if resolution is not None:
+         self.resolutions[page].append(resolution)
+      if not self.pending[page]:
+         del self.pending[page]
+         resolutions = self.resolutions.pop(page)
+         self.planner.feedback(page, min(resolutions) if resolutions else None)
+      self.assemblers[analytic_name].add(page, csvdata)
 
-   totaldata = pandas.DataFrame()
-
-   for (st, et) in generate_pages(start_time, end_time):
-      st_iso = make_iso_timestamp(convert_to_utc(st, __engine_time_zone))
-      et_iso = make_iso_timestamp(convert_to_utc(et, __engine_time_zone))
-      d = analytics.get_data(__engineobject, __analytic_map[analytic_name]["ref"], resolution=resolution, start_time=st_iso, end_time=et_iso)
-      function_to_call = globals()[__analytic_map[analytic_name]["function"]]
-      csvdata = function_to_call (d.to_dict()["datapointStreams"])
-      totaldata = totaldata.append(csvdata)
-   
-   if not totaldata.empty:
-      stats = create_dataframes(analytic_name, totaldata)
-   else:
+   def statistics(self, analytic_name):
+      """
+      Convert collected data of analytic into statistics
+      :param1 analytic_name: analytic name
+      return: list of statistics (see analytic_statistics)
+      """
+      return analytic_statistics(analytic_name, self.assemblers[analytic_name].to_dataframe())
+
+
+def analytic_statistics(analytic_name, csvdata):
+   """
+   Convert collected data of analytic into statistics
+   :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+   :param2 csvdata: dataframe with collected data or None if there is no data
+   return: list of statistics (see create_dataframes from dataprocessing for details),
+           empty list if there is no data
+   """
+   if csvdata is None:
       print_error("There is no data collected for {}".format(analytic_name))
-      stats = []
-   return stats
+      return []
+   return create_dataframes(analytic_name, csvdata)
 
 
-def process_cpu(datapoint_streams):
+def process_cpu(datapoint_streams, time_zone):
    """
    Process a CPU data retured by engine
    :param1 datapoint_streams: will have 1 stream with CPU data if there will be any data to process
+   :param2 time_zone: engine time zone
    return: dataframe with #timestamp and util column
    """
    cpu = None
@@ -214,121 +1290,137 @@ def process_cpu(datapoint_streams):
       cpu = pandas.DataFrame(stream["datapoints"])
       cpu["util"] = (cpu["user"] + cpu["kernel"]) / (cpu["idle"] + cpu["user"] + cpu["kernel"]) * 100
       cpu["util"].replace(numpy.inf, 0, inplace=True)
-      cpu = fix_timestamp(cpu)
+      cpu = fix_timestamp(cpu, time_zone)
    return cpu
 
-def process_network(datapoint_streams):
+def process_network(datapoint_streams, time_zone, per_nic=False):
    """
    Process a network data retured by engine
-   :param1 datapoint_streams: will have 2 streams with inbound and outbound data if there will be any data to process
-   return: dataframe with #timestamp, inbound and outbound column plus 1 column per interface [B/s]
+   Streams for all interfaces are stacked into one frame and summed by timestamp in one pass,
+   so timestamps missing for some interfaces are kept
+   :param1 datapoint_streams: will have 1 stream per network interface if there will be any data to process
+   :param2 time_zone: engine time zone
+   :param3 per_nic: if True, add inBytes_<nic> and outBytes_<nic> columns for each interface
+   return: dataframe with #timestamp, inBytes and outBytes column summed for all interfaces [B/s]
    """
 
    nic_list = []
-   network = None
+   frames = []
    for stream in datapoint_streams:
-      if network is None:
-         network = pandas.DataFrame(stream["datapoints"])
-      else:
-         t = pandas.DataFrame(stream["datapoints"])
-         network = pandas.merge(network, t, on="timestamp", how="inner", suffixes=("", "_{}".format(stream["networkInterface"])))
+      if stream["datapoints"]:
+         frames.append(pandas.DataFrame(stream["datapoints"]))
          nic_list.append(stream["networkInterface"])
 
-   # sum through all network interfaces
-   for name in nic_list:
-      network["inBytes"] = network["inBytes"] + network["inBytes_{}".format(name)]
-      network["outBytes"] = network["outBytes"] + network["outBytes_{}".format(name)]
-
-   if network is not None:
-      network = fix_timestamp(network)
-   return network
+   if not frames:
+      return None
 
+   stacked = pandas.concat(frames, ignore_index=True)
+   columns = [ name for name in stacked.select_dtypes(include=numpy.number).columns ]
+   network = stacked.groupby("timestamp", sort=True)[columns].sum().reset_index()
 
+   if per_nic:
+      stacked["nic"] = numpy.repeat(nic_list, [ len(f) for f in frames ])
+      nic_data = stacked.groupby(["timestamp", "nic"], sort=True)[["inBytes", "outBytes"]].sum().unstack("nic")
+      nic_data.columns = [ "{}_{}".format(name, nic) for (name, nic) in nic_data.columns ]
+      network = network.join(nic_data, on="timestamp")
 
+   network = fix_timestamp(network, time_zone)
+   return network
 
 
-def fix_timestamp(dataframe):
+def fix_timestamp(dataframe, time_zone):
    """
    Convert timestamp from UTC into engine timezone and from ISO to format expected by graphs
    :param1 dataframe: data frame to process
+   :param2 time_zone: engine time zone
    return: dataframe with converted timestamp column
    """
-   dataframe["timestamp"] = dataframe["timestamp"].apply(convert_from_utc, args=(__engine_time_zone,))
+   dataframe["timestamp"] = convert_from_utc_array(dataframe["timestamp"].values, time_zone)
    dataframe = dataframe.rename(columns={"timestamp": "#timestamp"}) 
    return dataframe
 
 
-def process_io(datapoint_streams):
+def process_io(datapoint_streams, time_zone):
    """
    Process a IO (nfs, disk, iscsi) data retured by engine
    :param1 datapoint_streams: will have 2 streams with read and write data if there will be any data to process
+   :param2 time_zone: engine time zone
    return: dataframe with #timestamp, read and write columns for number of ops, latency and throughput [MB/s]
    """
    io = None
    for stream in datapoint_streams:
+      if not stream["datapoints"]:
+         continue
+      frame = pandas.DataFrame(stream["datapoints"], columns=io_stream_columns)
+      frame.columns = ["timestamp"] + [ io_column_names[name].format(stream["op"]) for name in io_stream_columns[1:] ]
       if io is None:
-         io = pandas.DataFrame(stream["datapoints"])
-         io = io.rename(columns={"latency": "{}_latency".format(stream["op"]), 
-                                       "throughput": "{}_throughput".format(stream["op"]),
-                                       "count": "ops_{}".format(stream["op"])
-                                       })
+         io = frame
       else:
-         t = pandas.DataFrame(stream["datapoints"])
-         io = pandas.merge(io, t, on="timestamp", how="inner")
-         io = io.rename(columns={"latency": "{}_latency".format(stream["op"]), 
-                                    "throughput": "{}_throughput".format(stream["op"]),
-                                    "count": "ops_{}".format(stream["op"])
-                                 })
+         io = pandas.merge(io, frame, on="timestamp", how="inner", copy=False)
 
    if io is not None:
-      if not "read_latency" in io.keys():
-         io["read_latency"] =  0
-         io["read_throughput"] = 0
-      else:
-         io["read_latency"] = io["read_latency"].map(calculate_latency)
-         io["read_throughput"] = io["read_throughput"] / 1024 / 1024
-
-      if not "write_latency" in io.keys():
-         io["write_latency"] =  0
-         io["write_throughput"] = 0
-      else:
-         io["write_latency"] = io["write_latency"].map(calculate_latency)
-         io["write_throughput"] = io["write_throughput"] / 1024 / 1024
-      io = fix_timestamp(io)
+      histograms = {}
+      for op in ["read", "write"]:
+         if not "{}_latency".format(op) in io.keys():
+            io["{}_latency".format(op)] =  0
+            io["{}_throughput".format(op)] = 0
+            for percentile in latency_percentiles:
+               io["{}_latency_p{}".format(op, percentile)] = 0
+         else:
+            (boundaries, matrix) = decode_latency_histograms(io["{}_latency".format(op)].values)
+            histograms[op] = LatencyHistograms.from_matrix(boundaries, matrix)
+            io["{}_latency".format(op)] = average_latency(boundaries, matrix)
+            for percentile in latency_percentiles:
+               io["{}_latency_p{}".format(op, percentile)] = histograms[op].percentile(percentile)
+            io["{}_throughput".format(op)] = io["{}_throughput".format(op)] / 1024 / 1024
+      io = fix_timestamp(io, time_zone)
+      # histograms are kept with dataframe, so percentiles can be calculated without fetching data again
+      io.attrs[histograms_attr] = histograms
    else:
       io = pandas.DataFrame()
-   #print(io)
    return io
 
-def calculate_latency(latency_dict):
-   """
-   Calculate an average latency based on histogram
-   :param1 latency_dict: latency histogram
-   return: average latency in ms rounded to 2 digits
-   """
-   sumCount = 0
-   sumLatency = 0
-   latency = 0
-   for key,value in latency_dict.items():
-      if key == "< 10000":
-         # There's a very low bucket marked < 10000.  We'll workaround this and set it equal to 1000
-         key = 1000
-      fkey = float(key)
-      fvalue = float(value)
-      if fkey > 0:
-         sumCount += fvalue
-         base = int(log(fkey)/log(10) + 0.00000001)
-         sub = 10**(base-1) * 5
-         partLatency = fkey + sub
-         sumLatency += (partLatency * fvalue)
-   if (sumLatency == 0) and (sumCount == 0):
-      latency = None
-   else:
-      latency = sumLatency / sumCount
-   if latency is not None:
-      return round(latency/1000000, 2)
-   else:
-      return latency
+def decode_latency_histograms(latency_list):
+   """
+   Decode latency histograms into dense matrix of bucket counts
+   There's a very low bucket marked < 10000. We'll workaround this and set it equal to 1000
+   :param1 latency_list: list of latency histograms ( dict bucket: count ), rows without dict are empty
+   return: touple of bucket boundaries array and matrix with rows for histograms and columns for buckets
+   """
+   buckets = {}
+   rows = []
+   columns = []
+   counts = []
+   for row, latency_dict in enumerate(latency_list):
+      if not isinstance(latency_dict, dict):
+         continue
+      for key, value in latency_dict.items():
+         rows.append(row)
+         columns.append(buckets.setdefault(key, len(buckets)))
+         counts.append(value)
+
+   boundaries = numpy.array([1000.0 if key == "< 10000" else float(key) for key in buckets])
+   matrix = numpy.zeros((len(latency_list), len(buckets)))
+   numpy.add.at(matrix, (numpy.array(rows, dtype=int), numpy.array(columns, dtype=int)), numpy.array(counts, dtype=float))
+   return (boundaries, matrix)
+
+
+def average_latency(boundaries, matrix):
+   """
+   Calculate an average latency for matrix of bucket counts
+   :param1 boundaries: array of bucket boundaries
+   :param2 matrix: matrix with rows for histograms and columns for buckets
+   return: array of average latency in ms rounded to 2 digits, NaN for empty histograms
+   """
+   valid = boundaries > 0
+   matrix = matrix[:, valid]
+   sumCount = matrix.sum(axis=1)
+   sumLatency = matrix.dot(bucket_latency(boundaries[valid]))
+   with numpy.errstate(divide="ignore", invalid="ignore"):
+      latency = numpy.where(sumCount > 0, sumLatency / sumCount, numpy.nan) / 1000000
+   # python round is used to get same results as previous per histogram calculation,
+   # numpy.round is rounding differently values like 2.795
+   return numpy.fromiter((round(l, 2) for l in latency.tolist()), dtype=float, count=len(latency))
 
 
    
\ No newline at end of file
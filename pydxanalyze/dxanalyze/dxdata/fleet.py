@@ -0,0 +1,244 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sys import exit
+
+from dxanalyze.dxdata.dataprocessing import DailyPercentile
+from dxanalyze.dxdata.dataprocessing import generate_farmanalyze_engine_summary
+from dxanalyze.dxdata.asyncclient import ConnectionPool
+from dxanalyze.dxdata.asyncclient import EventLoopThread
+from dxanalyze.dxdata.engine import AsyncEngineSession
+from dxanalyze.dxdata.engine import EngineSession
+from dxanalyze.dxdata.engine import default_parallel
+from dxanalyze.dxlogging import print_error
+from dxanalyze.dxlogging import print_message
+
+# default number of engines collected concurrently
+default_fleet_parallel = 4
+# default resolution of farmanalyze data, hourly data are enough for daily percentiles
+default_farm_resolution = 3600
+# daily percentile columns calculated for farmanalyze from engine data
+farm_columns = {
+    "cpu": { "util": "utilization_85pct" },
+    "network": { "inBytes": "inBytes_85pct", "outBytes": "outBytes_85pct" }
+}
+
+
+def read_engine_list(config_file, username=None, password=None):
+    """
+    Read a list of engines from dxtools.conf like JSON file
+    { "data": [ { "hostname": "name", "ip_address": "address", "username": "user", "password": "password" } ] }
+    Engines with encrypted password are skipped
+    :param1 config_file: name of the file with engine list
+    :param2 username: username used if engine entry has no username
+    :param3 password: password used if engine entry has no password
+    return: list of touples with engine address, username and password
+    """
+    logger = logging.getLogger()
+    try:
+        with open(config_file) as f:
+            config = json.load(f)
+        entries = config["data"]
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print_error("Can't read engine list from {}: {}".format(config_file, str(e)))
+        logger.error("Can't read engine list from {}: {}".format(config_file, str(e)))
+        exit(1)
+
+    engine_list = []
+    for entry in entries:
+        engine_address = entry.get("ip_address") or entry.get("hostname")
+        if engine_address is None:
+            print_error("Engine entry without hostname or ip_address skipped")
+            logger.error("Engine entry without hostname or ip_address skipped")
+            continue
+        if str(entry.get("encrypted", "false")).lower() == "true":
+            print_error("Engine {} has encrypted password and it is skipped".format(engine_address))
+            logger.error("Engine {} has encrypted password and it is skipped".format(engine_address))
+            continue
+        engine_username = entry.get("username", username)
+        engine_password = entry.get("password", password)
+        if engine_username is None or engine_password is None:
+            print_error("Engine {} has no username or password and it is skipped".format(engine_address))
+            logger.error("Engine {} has no username or password and it is skipped".format(engine_address))
+            continue
+        engine_list.append((engine_address, engine_username, engine_password))
+
+    return engine_list
+
+
+def collect_engine(engine_address, engine_username, engine_password, start_time=None, end_time=None,
+                   parallel=default_parallel, cache=None, max_memory=None, raw_files=None, detail_days=None,
+                   runner=None, pool=None, sweep=False):
+    """
+    Connect to engine and collect all available analytics
+    :param1 engine_address: engine address
+    :param2 engine_username: engine username
+    :param3 engine_password: engine password
+    :param4 start_time: start time in engine time zone
+    :param5 end_time: end time in engine time zone
+    :param6 parallel: number of pages fetched concurrently per analytic
+    :param7 cache: PageCache object or None if cache is not used
+    :param8 max_memory: max size of collected data per analytic in bytes or None for no limit
+    :param9 raw_files: RawFiles object or None if raw data are not saved
+    :param10 detail_days: number of most recent days fetched with full resolution, None is using engine default
+    :param11 runner: EventLoopThread of asyncio client or None if delphixpy is used
+    :param12 pool: ConnectionPool shared by asyncio clients of all engines
+    :param13 sweep: if True, all analytics are collected in a single pass over time range
+    return: touple of connected EngineSession and list of touples with analytic name and statistics
+    """
+    if runner is not None:
+        session = AsyncEngineSession(engine_address, engine_username, engine_password, runner, pool)
+    else:
+        session = EngineSession(engine_address, engine_username, engine_password)
+    session.connect()
+    available_list = session.get_available_analytics()
+    collect = session.sweep_analytics if sweep else session.collect_analytics
+    collected = list(collect(available_list, start_time, end_time, parallel=parallel, cache=cache,
+                             max_memory=max_memory, raw_files=raw_files, detail_days=detail_days))
+    return (session, collected)
+
+
+def collect_fleet(engine_list, start_time=None, end_time=None, fleet_parallel=default_fleet_parallel,
+                  parallel=default_parallel, cache=None, max_memory=None, raw_files=None, detail_days=None,
+                  async_client=False, sweep=False):
+    """
+    Collect analytics from many engines concurrently. Each engine is using own EngineSession
+    With asyncio client requests to all engines are running in one event loop and they are sharing
+    a pool of keep-alive connections
+    :param1 engine_list: list of touples with engine address, username and password
+    :param2 start_time: start time in engine time zone
+    :param3 end_time: end time in engine time zone
+    :param4 fleet_parallel: number of engines collected concurrently
+    :param5 parallel: number of pages fetched concurrently per analytic
+    :param6 cache: PageCache object or None if cache is not used
+    :param7 max_memory: max size of collected data per analytic in bytes or None for no limit
+    :param8 raw_files: RawFiles object or None if raw data are not saved
+    :param9 detail_days: number of most recent days fetched with full resolution, None is using engine default
+    :param10 async_client: if True, asyncio client is used instead of delphixpy
+    :param11 sweep: if True, analytics of each engine are collected in a single pass over time range
+    yield: touple of engine address, EngineSession and collected statistics, in order engines are collected
+           EngineSession and statistics are None if collection failed
+    """
+    logger = logging.getLogger()
+
+    runner = EventLoopThread() if async_client else None
+    pool = ConnectionPool() if async_client else None
+
+    with ThreadPoolExecutor(max_workers=max(min(fleet_parallel, len(engine_list)), 1)) as executor:
+        futures = {}
+        for (engine_address, engine_username, engine_password) in engine_list:
+            future = executor.submit(collect_engine, engine_address, engine_username, engine_password, start_time,
+                                     end_time, parallel, cache, max_memory, raw_files, detail_days, runner, pool, sweep)
+            futures[future] = engine_address
+
+        for future in as_completed(futures):
+            engine_address = futures[future]
+            try:
+                (session, collected) = future.result()
+            except (SystemExit, Exception) as e:
+                # errors are already printed for known problems, engine is skipped
+                print_error("Data from engine {} not collected".format(engine_address))
+                logger.error("Data from engine {} not collected: {}".format(engine_address, repr(e)))
+                yield (engine_address, None, None)
+                continue
+            print_message("Data from engine {} collected".format(engine_address))
+            logger.debug("Data from engine {} collected".format(engine_address))
+            yield (engine_address, session, collected)
+
+    if runner is not None:
+        runner.loop.call_soon_threadsafe(pool.close)
+        runner.close()
+
+
+def collect_farm_engine(engine_address, engine_username, engine_password, start_time=None, end_time=None,
+                        resolution=default_farm_resolution, parallel=default_parallel):
+    """
+    Connect to engine and calculate daily 85 percentile of cpu and network analytics
+    Percentiles are calculated while pages are collected, rows of a day are released as soon as the day is complete
+    Whole time range is collected with same resolution, so percentiles of all days are calculated from same data
+    :param1 engine_address: engine address
+    :param2 engine_username: engine username
+    :param3 engine_password: engine password
+    :param4 start_time: start time in engine time zone
+    :param5 end_time: end time in engine time zone
+    :param6 resolution: data resolution
+    :param7 parallel: number of pages fetched concurrently per analytic
+    return: touple of engine name and dict of daily percentile dataframes per analytic
+    """
+    session = EngineSession(engine_address, engine_username, engine_password)
+    session.connect()
+    available_list = session.get_available_analytics()
+    daily = {}
+    for analytic_name in farm_columns:
+        if analytic_name not in available_list:
+            continue
+        percentile = session.collect_dataframe(analytic_name, start_time, end_time, resolution, parallel, detail_days=0,
+                                               accumulator=DailyPercentile(farm_columns[analytic_name]))
+        if percentile is not None:
+            daily[analytic_name] = percentile
+    return (session.engine_name, daily)
+
+
+def collect_farmanalyze_summary(engine_list, start_time=None, end_time=None, resolution=default_farm_resolution,
+                                fleet_parallel=default_fleet_parallel, parallel=default_parallel):
+    """
+    Collect farmanalyze summary from many engines concurrently
+    :param1 engine_list: list of touples with engine address, username and password
+    :param2 start_time: start time in engine time zone
+    :param3 end_time: end time in engine time zone
+    :param4 resolution: data resolution
+    :param5 fleet_parallel: number of engines collected concurrently
+    :param6 parallel: number of pages fetched concurrently per analytic
+    return: list of engine summary dicts, first and last date of farm data
+            (see generate_farmanalyze_data_summary from dataprocessing)
+    """
+    logger = logging.getLogger()
+
+    engine_dict_list = []
+    fmindate = None
+    fmaxdate = None
+    with ThreadPoolExecutor(max_workers=max(min(fleet_parallel, len(engine_list)), 1)) as executor:
+        futures = {}
+        for (engine_address, engine_username, engine_password) in engine_list:
+            future = executor.submit(collect_farm_engine, engine_address, engine_username, engine_password, start_time,
+                                     end_time, resolution, parallel)
+            futures[future] = engine_address
+
+        for future in as_completed(futures):
+            engine_address = futures[future]
+            try:
+                (engine_name, daily) = future.result()
+            except (SystemExit, Exception) as e:
+                print_error("Data from engine {} not collected".format(engine_address))
+                logger.error("Data from engine {} not collected: {}".format(engine_address, repr(e)))
+                continue
+            if "cpu" not in daily:
+                print_error("There is no cpu data collected from engine {}".format(engine_address))
+                logger.error("There is no cpu data collected from engine {}".format(engine_address))
+                continue
+            (engine_dict, fmindate, fmaxdate) = generate_farmanalyze_engine_summary(engine_name, daily["cpu"],
+                                                                                    daily.get("network"),
+                                                                                    fmindate, fmaxdate)
+            engine_dict_list.append(engine_dict)
+            print_message("Data from engine {} collected".format(engine_address))
+            logger.debug("Data from engine {} collected".format(engine_address))
+
+    # engines are collected in random order
+    engine_dict_list.sort(key=lambda engine_dict: engine_dict['engine'])
+    return engine_dict_list,fmindate,fmaxdate
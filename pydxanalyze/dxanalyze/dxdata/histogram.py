@@ -0,0 +1,161 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import numpy
+
+# latency percentiles calculated for IO analytics
+latency_percentiles = [50, 95, 99]
+
+
+def bucket_latency(boundaries):
+    """
+    Calculate a latency used for each bucket - bucket boundary plus half of bucket size
+    :param1 boundaries: array of bucket boundaries, has to be bigger than 0
+    return: array of bucket latencies
+    """
+    base = numpy.trunc(numpy.log(boundaries)/numpy.log(10) + 0.00000001)
+    return boundaries + 10.0**(base-1) * 5
+
+
+# latency histograms of dataframe are kept in its attrs under this name, as dict of LatencyHistograms per operation
+histograms_attr = "histograms"
+# prefix of numpy arrays with latency histograms saved next to page columns
+histogram_prefix = "#histogram_"
+# numpy arrays of LatencyHistograms object
+histogram_fields = ["boundaries", "indptr", "buckets", "counts"]
+
+
+class LatencyHistograms(object):
+    """
+    Compact store of latency histograms, one histogram per timestamp
+    Only not empty buckets are kept, as bucket index and count per row (CSR like layout)
+    boundaries: sorted array of bucket boundaries
+    indptr: position of first bucket of each row in buckets and counts, plus end of last row
+    buckets: index of bucket boundary
+    counts: number of operations in bucket
+    """
+
+    def __init__(self, boundaries, indptr, buckets, counts):
+        self.boundaries = boundaries
+        self.indptr = indptr
+        self.buckets = buckets
+        self.counts = counts
+
+    @classmethod
+    def from_matrix(cls, boundaries, matrix):
+        """
+        Create histograms from dense matrix of bucket counts
+        Buckets with boundary not bigger than 0 are ignored like in average latency
+        :param1 boundaries: array of bucket boundaries for matrix columns
+        :param2 matrix: matrix with rows for histograms and columns for buckets
+        return: LatencyHistograms object
+        """
+        valid = boundaries > 0
+        order = numpy.argsort(boundaries[valid])
+        boundaries = boundaries[valid][order]
+        matrix = matrix[:, valid][:, order]
+        (rows, columns) = matrix.nonzero()
+        indptr = numpy.zeros(len(matrix) + 1, dtype=numpy.int32)
+        numpy.cumsum(numpy.bincount(rows, minlength=len(matrix)), out=indptr[1:])
+        return cls(boundaries, indptr, columns.astype(bucket_dtype(boundaries)),
+                   matrix[rows, columns].astype(numpy.uint32))
+
+    @classmethod
+    def concat(cls, histograms_list):
+        """
+        Join histograms into one object. Bucket boundaries can be different in each object
+        :param1 histograms_list: list of LatencyHistograms objects
+        return: LatencyHistograms object
+        """
+        boundaries = numpy.unique(numpy.concatenate([h.boundaries for h in histograms_list]))
+        indptr = [numpy.zeros(1, dtype=numpy.int32)]
+        buckets = []
+        offset = 0
+        for h in histograms_list:
+            indptr.append(h.indptr[1:] + offset)
+            offset += h.indptr[-1]
+            buckets.append(numpy.searchsorted(boundaries, h.boundaries)[h.buckets])
+        return cls(boundaries, numpy.concatenate(indptr).astype(numpy.int32),
+                   numpy.concatenate(buckets).astype(bucket_dtype(boundaries)),
+                   numpy.concatenate([h.counts for h in histograms_list]))
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def nbytes(self):
+        return sum([getattr(self, field).nbytes for field in histogram_fields])
+
+    def percentile(self, percentile):
+        """
+        Calculate latency percentile for each histogram
+        It's a latency of the first bucket where cumulative count is reaching percentile
+        :param1 percentile: percentile to calculate (0-100]
+        return: array of latency in ms rounded to 2 digits, NaN for empty histograms
+        """
+        cumulative = numpy.concatenate(([0], numpy.cumsum(self.counts, dtype=numpy.float64)))
+        before = cumulative[self.indptr[:-1]]
+        total = cumulative[self.indptr[1:]] - before
+        target = before + total * percentile / 100
+        position = numpy.searchsorted(cumulative[1:], target, side="left")
+        position = numpy.clip(position, self.indptr[:-1], max(len(self.counts) - 1, 0))
+        latency = numpy.full(len(self), numpy.nan)
+        not_empty = total > 0
+        latency[not_empty] = bucket_latency(self.boundaries)[self.buckets[position[not_empty]]]
+        return numpy.round(latency/1000000, 2)
+
+
+def bucket_dtype(boundaries):
+    """
+    Select smallest integer type for bucket index
+    :param1 boundaries: array of bucket boundaries
+    return: numpy dtype
+    """
+    return numpy.uint8 if len(boundaries) <= 256 else numpy.uint16
+
+
+def concat_histograms(histograms_list):
+    """
+    Join latency histograms of pages. Histograms are joined only if all pages have them,
+    otherwise rows of histograms would not match rows of joined pages
+    :param1 histograms_list: list of dict of LatencyHistograms per operation or None for page without histograms
+    return: dict of LatencyHistograms per operation or None
+    """
+    if not histograms_list or any([h is None for h in histograms_list]):
+        return None
+    return { op: LatencyHistograms.concat([h[op] for h in histograms_list])
+             for op in histograms_list[0] if all([op in h for h in histograms_list]) }
+
+
+def histogram_arrays(histograms):
+    """
+    Convert latency histograms into numpy arrays which can be saved without pickle
+    :param1 histograms: dict of LatencyHistograms per operation
+    return: dict of numpy array per name, names are starting with histogram_prefix
+    """
+    return { "{}{}_{}".format(histogram_prefix, op, field): getattr(h, field)
+             for (op, h) in histograms.items() for field in histogram_fields }
+
+
+def arrays_histograms(arrays):
+    """
+    Rebuild latency histograms from arrays saved by histogram_arrays
+    :param1 arrays: dict like object of numpy array per name, names without histogram_prefix are ignored
+    return: dict of LatencyHistograms per operation
+    """
+    ops = set([ name[len(histogram_prefix):].rsplit("_", 1)[0] for name in arrays if name.startswith(histogram_prefix) ])
+    return { op: LatencyHistograms(*[ arrays["{}{}_{}".format(histogram_prefix, op, field)] for field in histogram_fields ])
+             for op in ops }
@@ -0,0 +1,165 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import gzip
+import http.client
+import logging
+import threading
+import zlib
+
+# ask engine for gzip compressed responses, analytics JSON is very repetitive text
+# engine or proxy not supporting compression is returning plain responses
+compressed_transfer = True
+# timeout of engine requests in seconds, same as in delphixpy
+request_timeout = 180
+
+
+def add_accept_encoding(headers):
+    """
+    Add Accept-Encoding header if compressed transfer is enabled
+    :param1 headers: dict of request headers
+    return: dict of request headers
+    """
+    if compressed_transfer:
+        headers["Accept-Encoding"] = "gzip"
+    return headers
+
+
+def decode_body(headers, body):
+    """
+    Decompress response body according to its Content-Encoding
+    :param1 headers: dict of response headers with lower case names
+    :param2 body: response body as received
+    return: decompressed body
+    """
+    encoding = headers.get("content-encoding", "identity").lower()
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+class TransferStats(object):
+    """
+    Counters of requests and bytes transferred from engine, shared by threads or tasks of a session
+    requests: number of requests
+    connections: number of connections opened
+    wire_bytes: number of response body bytes received
+    body_bytes: number of response body bytes after decompression
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+
+    def add_request(self, wire_bytes, body_bytes):
+        with self.lock:
+            self.requests += 1
+            self.wire_bytes += wire_bytes
+            self.body_bytes += body_bytes
+
+    def add_connection(self):
+        with self.lock:
+            self.connections += 1
+
+    def __str__(self):
+        return "{} requests using {} connections, {:.1f} MB received, {:.1f} MB decompressed".format(
+            self.requests, self.connections, self.wire_bytes / 1024 / 1024, self.body_bytes / 1024 / 1024)
+
+
+class HttpConnectionPool(object):
+    """
+    Keep-alive HTTP connections to a single engine shared by worker threads
+    Connection is returned to pool after response is read, so next request of any thread
+    is using it without a new TCP handshake. Failed connections are closed
+    """
+
+    def __init__(self, address, stats=None):
+        """
+        :param1 address: engine address in host or host:port format
+        :param2 stats: TransferStats object or None for own counters
+        """
+        self.address = address
+        self.stats = TransferStats() if stats is None else stats
+        self.lock = threading.Lock()
+        self.idle = []
+
+    def acquire(self):
+        """
+        Get idle connection or open a new one
+        return: touple of HTTPConnection and True if connection was used before
+        """
+        with self.lock:
+            if self.idle:
+                return (self.idle.pop(), True)
+        self.stats.add_connection()
+        return (http.client.HTTPConnection(self.address, timeout=request_timeout), False)
+
+    def release(self, connection):
+        with self.lock:
+            self.idle.append(connection)
+
+    def request(self, method, path, headers, body=None):
+        """
+        Send request using pooled connection. If a kept-alive connection was closed by engine,
+        request is sent once more using a new connection
+        :param1 method: HTTP method
+        :param2 path: request path with query
+        :param3 headers: dict of request headers, Accept-Encoding is added for compressed transfer
+        :param4 body: request body
+        return: touple of HTTP status, dict of response headers with lower case names and decompressed body
+        Raise http.client.HTTPException or OSError if connection failed
+        """
+        logger = logging.getLogger()
+        headers = add_accept_encoding(dict(headers))
+        while True:
+            (connection, reused) = self.acquire()
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                response_body = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                connection.close()
+                if reused:
+                    logger.debug("Kept-alive connection to {} closed: {}".format(self.address, repr(e)))
+                    continue
+                raise
+            break
+
+        if response.will_close:
+            connection.close()
+        else:
+            self.release(connection)
+
+        response_headers = { name.lower(): value for (name, value) in response.getheaders() }
+        decoded = decode_body(response_headers, response_body)
+        self.stats.add_request(len(response_body), len(decoded))
+        logger.debug("{} {} received {} bytes, {} bytes decompressed".format(method, path, len(response_body),
+                                                                           len(decoded)))
+        return (response.status, response_headers, decoded)
+
+    def close(self):
+        """
+        Close all idle connections
+        """
+        with self.lock:
+            for connection in self.idle:
+                connection.close()
+            self.idle = []
@@ -0,0 +1,181 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import logging
+import os
+import re
+import tempfile
+import time
+from os.path import join
+
+import numpy
+from pandas import pandas
+
+from dxanalyze.dxdata.histogram import arrays_histograms
+from dxanalyze.dxdata.histogram import histogram_arrays
+from dxanalyze.dxdata.histogram import histogram_prefix
+from dxanalyze.dxdata.histogram import histograms_attr
+
+# default size of page cache in bytes
+default_cache_size = 512 * 1024 * 1024
+# default location of page cache
+default_cache_dir = join(os.path.expanduser("~"), ".dxanalyze", "cache")
+# age in seconds after which temporary file is considered left by an interrupted store
+default_stale_age = 24 * 60 * 60
+
+
+class PageCache(object):
+    """
+    On-disk cache of analytic pages fetched from engine
+    Each page is kept as a separate numpy npz file with one array per column
+    in directory <cache_dir>/<engine name>/<analytic reference>
+    Latency histograms of page are kept in same file as arrays named with histogram_prefix
+    """
+
+    def __init__(self, directory=default_cache_dir, max_size=default_cache_size, refresh=False):
+        """
+        :param1 directory: cache directory
+        :param2 max_size: max size of cache in bytes, oldest pages are removed above it
+        :param3 refresh: if True, pages are always fetched from engine and cache is only updated
+        """
+        self.directory = directory
+        self.max_size = max_size
+        self.refresh = refresh
+
+    def page_file(self, key):
+        """
+        Generate a file name for page
+        :param1 key: touple of engine name, analytic reference, resolution, start and end time in UTC ISO format
+        return: page file name
+        """
+        (engine_name, ref, resolution, start_time, end_time) = key
+        page_name = "{}-{}-{}.npz".format(resolution, re.sub(r'[-:.]', '', start_time), re.sub(r'[-:.]', '', end_time))
+        return join(self.directory, clean_name(engine_name), clean_name(ref), page_name)
+
+    def load(self, key):
+        """
+        Load page from cache
+        :param1 key: page key (see page_file)
+        return: dataframe with page data or None if page is not in cache
+        """
+        logger = logging.getLogger()
+        if self.refresh:
+            return None
+
+        file_name = self.page_file(key)
+        try:
+            with numpy.load(file_name, allow_pickle=False) as npzfile:
+                dataframe = pandas.DataFrame({ name: npzfile[name] for name in npzfile.files
+                                               if not name.startswith(histogram_prefix) })
+                histograms = arrays_histograms(npzfile)
+                if histograms:
+                    dataframe.attrs[histograms_attr] = histograms
+            # update access time, so least recently used pages are evicted first
+            os.utime(file_name)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.debug("Can't read page {} from cache: {}".format(file_name, str(e)))
+            return None
+
+        logger.debug("Page {} loaded from cache".format(file_name))
+        return dataframe
+
+    def store(self, key, dataframe):
+        """
+        Save page into cache. File is renamed after write, so concurrent readers
+        can't see a partial file
+        :param1 key: page key (see page_file)
+        :param2 dataframe: page data
+        """
+        logger = logging.getLogger()
+        file_name = self.page_file(key)
+        columns = dataframe_columns(dataframe) if dataframe is not None else {}
+        if dataframe is not None and histograms_attr in dataframe.attrs:
+            columns.update(histogram_arrays(dataframe.attrs[histograms_attr]))
+
+        try:
+            os.makedirs(os.path.dirname(file_name), exist_ok=True)
+            (fd, temp_name) = tempfile.mkstemp(dir=os.path.dirname(file_name), suffix=".tmp")
+            with os.fdopen(fd, "wb") as tempfile_obj:
+                numpy.savez_compressed(tempfile_obj, **columns)
+            os.replace(temp_name, file_name)
+        except OSError as e:
+            logger.error("Can't save page {} into cache: {}".format(file_name, str(e)))
+
+    def evict(self):
+        """
+        Remove least recently used pages until cache size is below max_size
+        Temporary files are written by store calls which can still run for other
+        analytics or engines, so they are removed only if they are older than default_stale_age
+        """
+        logger = logging.getLogger()
+        pages = []
+        total_size = 0
+        now = time.time()
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                file_name = join(dirpath, name)
+                try:
+                    stat = os.stat(file_name)
+                except FileNotFoundError:
+                    continue
+                if name.endswith(".tmp"):
+                    if now - stat.st_mtime > default_stale_age:
+                        try:
+                            os.remove(file_name)
+                        except FileNotFoundError:
+                            pass
+                    continue
+                pages.append((stat.st_mtime, stat.st_size, file_name))
+                total_size += stat.st_size
+
+        pages.sort()
+        for (_, size, file_name) in pages:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(file_name)
+                logger.debug("Page {} evicted from cache".format(file_name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+def dataframe_columns(dataframe):
+    """
+    Convert dataframe columns into numpy arrays which can be saved without pickle
+    :param1 dataframe: dataframe with analytic data
+    return: dict of numpy array per column
+    """
+    columns = {}
+    for name in dataframe.columns:
+        if name == "#timestamp":
+            columns[name] = dataframe[name].values.astype(str)
+        elif dataframe[name].dtype == object:
+            # latency can have None for timestamps without operations
+            columns[name] = dataframe[name].values.astype(float)
+        else:
+            columns[name] = dataframe[name].values
+    return columns
+
+
+def clean_name(name):
+    """
+    Replace characters not allowed in file names
+    :param1 name: name to clean
+    return: name which can be used as file or directory name
+    """
+    return re.sub(r'[^\w.-]', '_', str(name))
@@ -0,0 +1,158 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import logging
+import os
+from os.path import join
+
+import numpy
+
+from dxanalyze.dxdata.accumulator import ColumnAccumulator
+from dxanalyze.dxdata.histogram import concat_histograms
+from dxanalyze.dxdata.histogram import histogram_arrays
+from dxanalyze.dxdata.histogram import histograms_attr
+from dxanalyze.dxdata.rawreader import histograms_suffix
+from dxanalyze.dxdata.rawreader import raw_columns
+from dxanalyze.dxdata.rawreader import write_sidecar
+from dxanalyze.dxlogging import print_error
+
+
+def raw_file_name(directory, engine_name, analytic_name):
+    """
+    Generate name of raw file for analytic, as expected by offline mode
+    :param1 directory: directory with raw files
+    :param2 engine_name: engine name
+    :param3 analytic_name: analytic name
+    return: raw file name
+    """
+    return join(directory, "{}-analytics-{}-raw.csv".format(engine_name, analytic_name))
+
+
+class RawFiles(object):
+    """
+    Location and format of raw files saved by online mode
+    """
+
+    def __init__(self, directory, columnar=False):
+        """
+        :param1 directory: directory for raw files
+        :param2 columnar: if True, sidecar used by offline mode is saved next to each CSV file
+        """
+        self.directory = directory
+        self.columnar = columnar
+
+    def writer(self, engine_name, analytic_name):
+        """
+        Create a writer for analytic data
+        :param1 engine_name: engine name
+        :param2 analytic_name: analytic name
+        return: RawWriter object
+        """
+        return RawWriter(raw_file_name(self.directory, engine_name, analytic_name), analytic_name, self.columnar)
+
+
+class RawWriter(object):
+    """
+    Write pages of analytic data into raw CSV file as they are collected.
+    Columnar copy is a sidecar of raw file (see rawreader). Columns used by offline mode are
+    collected from pages and written when writer is closed, so offline mode is memory-mapping
+    them without parsing CSV file
+    Latency histograms of pages are saved into <raw file>.histograms.npz (see read_histograms of rawreader)
+    If a page has columns not known when CSV header was written, CSV file is rewritten
+    from all collected data when writer is closed
+    """
+
+    def __init__(self, file_name, analytic_name, columnar=False):
+        """
+        :param1 file_name: name of raw CSV file
+        :param2 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+        :param3 columnar: if True, sidecar of raw file is saved
+        """
+        self.file_name = file_name
+        self.analytic_name = analytic_name
+        self.sidecar = ColumnAccumulator() if columnar else None
+        self.histograms = []
+        self.csvfile = None
+        self.columns = None
+        self.rewrite = False
+        self.failed = False
+
+    def add(self, dataframe):
+        """
+        Append page of data. Errors are reported once and next pages are not written
+        :param1 dataframe: dataframe with page data, None or empty dataframe is ignored
+        """
+        logger = logging.getLogger()
+        if self.failed or dataframe is None or dataframe.empty:
+            return
+
+        try:
+            if self.csvfile is None:
+                self.csvfile = open(self.file_name, "w", newline="")
+                self.columns = list(dataframe.columns)
+                dataframe.to_csv(self.csvfile, index=False)
+                # histograms of previous run would not match new raw file
+                if os.path.exists(self.file_name + histograms_suffix):
+                    os.remove(self.file_name + histograms_suffix)
+            elif list(dataframe.columns) != self.columns:
+                self.rewrite = self.rewrite or not set(dataframe.columns).issubset(self.columns)
+                dataframe.reindex(columns=self.columns).to_csv(self.csvfile, index=False, header=False)
+            else:
+                dataframe.to_csv(self.csvfile, index=False, header=False)
+
+            if self.sidecar is not None:
+                self.sidecar.add(raw_columns(self.analytic_name, dataframe))
+            self.histograms.append(dataframe.attrs.get(histograms_attr))
+        except OSError as e:
+            self.failed = True
+            print_error("Can't save raw data into {}: {}".format(self.file_name, str(e)))
+            logger.error("Can't save raw data into {}: {}".format(self.file_name, str(e)))
+
+    def close(self, dataframe=None):
+        """
+        Close raw file
+        :param1 dataframe: all collected data, used if CSV file has to be rewritten with new columns
+        """
+        logger = logging.getLogger()
+        if self.csvfile is None:
+            return
+        self.csvfile.close()
+        self.csvfile = None
+        if self.rewrite and not self.failed:
+            if dataframe is None:
+                # CSV file is missing new columns, so sidecar would not match it
+                self.sidecar = None
+            else:
+                logger.debug("Raw file {} rewritten with all columns".format(self.file_name))
+                try:
+                    dataframe.to_csv(self.file_name, index=False)
+                except OSError as e:
+                    self.failed = True
+                    print_error("Can't save raw data into {}: {}".format(self.file_name, str(e)))
+                    logger.error("Can't save raw data into {}: {}".format(self.file_name, str(e)))
+        if self.sidecar is not None and not self.sidecar.empty and not self.failed:
+            # sidecar is valid for raw file as it is now, so it is written after CSV file is complete
+            write_sidecar(self.file_name, self.analytic_name, self.sidecar.to_dataframe())
+        self.sidecar = None
+
+        histograms = concat_histograms(self.histograms)
+        self.histograms = []
+        if histograms and not self.failed:
+            try:
+                numpy.savez_compressed(self.file_name + histograms_suffix, **histogram_arrays(histograms))
+            except OSError as e:
+                print_error("Can't save latency histograms into {}: {}".format(self.file_name + histograms_suffix, str(e)))
+                logger.error("Can't save latency histograms into {}: {}".format(self.file_name + histograms_suffix, str(e)))
@@ -0,0 +1,432 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import csv
+import gzip
+import io
+import json
+import logging
+import lzma
+import os
+import shutil
+from os.path import join
+
+import numpy
+from pandas import pandas
+
+from dxanalyze.dxdata.accumulator import ColumnAccumulator
+from dxanalyze.dxdata.dataprocessing import iocolumns
+from dxanalyze.dxdata.dataprocessing import iopercentilecolumns
+from dxanalyze.dxdata.histogram import arrays_histograms
+from dxanalyze.dxdata.timeindex import time_index
+
+try:
+    import zstandard
+except ImportError:
+    # zstd compressed raw files can be read only with zstandard module installed
+    zstandard = None
+
+# number of rows parsed at once, raw files with 1 second data have millions of rows
+default_chunk_rows = 500000
+
+# suffix of directory with columnar copy of raw file parsed by offline mode
+sidecar_suffix = ".sidecar"
+# version of sidecar format, sidecars with other version are rebuilt
+sidecar_version = 1
+# suffix of numpy npz file with latency histograms of raw file saved by online mode
+histograms_suffix = ".histograms.npz"
+
+# suffixes of compressed raw files and functions opening them as binary stream
+compression_suffixes = {
+    ".gz": lambda file_name: gzip.open(file_name, "rb"),
+    ".xz": lambda file_name: lzma.open(file_name, "rb"),
+    ".zst": lambda file_name: open_zstd(file_name)
+}
+
+timestamp_column = "#timestamp"
+timestamp_format = "%Y-%m-%d %H:%M:%S"
+
+io_schema = { name: "float64" for name in sorted(iocolumns - set([timestamp_column])) + iopercentilecolumns }
+
+# columns of raw files used by create_dataframes for each analytic and their types
+# other columns of raw files are not read
+analytic_schemas = {
+    "cpu": { "util": "float64" },
+    "network": { "inBytes": "float64", "outBytes": "float64" },
+    "disk": io_schema,
+    "nfs": io_schema,
+    "iscsi": io_schema
+}
+
+
+def open_zstd(file_name):
+    """
+    Open zstd compressed file as binary stream
+    :param1 file_name: name of compressed file
+    return: binary stream with decompressed data
+    Raise ValueError if zstandard module is not installed
+    """
+    if zstandard is None:
+        raise ValueError("Python module zstandard is required to read {}".format(file_name))
+    return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(file_name, "rb"), closefd=True))
+
+
+def open_raw_file(file_name):
+    """
+    Open raw file as binary stream. Compressed files (see compression_suffixes) are
+    decompressed while they are read, so they are never decompressed to disk
+    :param1 file_name: name of raw CSV file, optionally with compression suffix
+    return: binary stream with CSV data
+    """
+    for (suffix, open_compressed) in compression_suffixes.items():
+        if file_name.endswith(suffix):
+            return open_compressed(file_name)
+    return open(file_name, "rb")
+
+
+def read_header(file_name):
+    """
+    Read column names of raw file
+    :param1 file_name: name of raw CSV file, optionally with compression suffix
+    return: list of column names, empty list for empty file
+    """
+    with io.TextIOWrapper(open_raw_file(file_name), newline="") as csvfile:
+        try:
+            return next(csv.reader(csvfile), [])
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            raise ValueError("Can't decompress {}: {}".format(file_name, str(e)))
+
+
+def schema_columns(analytic_name, header):
+    """
+    Select columns of raw file required by analytic
+    Columns missing in file are skipped, so create_dataframes decides if analytic has data
+    :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param2 header: list of column names of raw file
+    return: dict of column name and type for columns to read, in file order
+    """
+    schema = analytic_schemas.get(analytic_name, {})
+    return { name: schema[name] if name in schema else "object" for name in header
+             if name == timestamp_column or name in schema }
+
+
+def time_bound(value):
+    """
+    Convert bound of time range
+    :param1 value: time in '%Y-%m-%d %H:%M:%S' format or None
+    return: numpy datetime64 value or None
+    """
+    return numpy.datetime64(pandas.to_datetime(value, format=timestamp_format)) if value is not None else None
+
+
+def filter_time_range(dataframe, start_time=None, end_time=None, ordered=False):
+    """
+    Select rows of time range
+    :param1 dataframe: dataframe with datetime64 timestamps
+    :param2 start_time: start time in '%Y-%m-%d %H:%M:%S' format or None
+    :param3 end_time: end time (exclusive) in '%Y-%m-%d %H:%M:%S' format or None
+    :param4 ordered: if True, rows are in timestamp order and range is found by binary search,
+                     so only few pages of memory-mapped timestamps are read
+    return: dataframe with rows of time range
+    """
+    if (start_time is None and end_time is None) or timestamp_column not in dataframe.columns:
+        return dataframe
+    timestamps = dataframe[timestamp_column].values
+    (start, end) = (time_bound(start_time), time_bound(end_time))
+    if ordered:
+        first = int(numpy.searchsorted(timestamps, start, side="left")) if start is not None else 0
+        last = int(numpy.searchsorted(timestamps, end, side="left")) if end is not None else len(timestamps)
+        return dataframe.iloc[first:max(first, last)]
+    mask = numpy.ones(len(timestamps), dtype=bool)
+    if start is not None:
+        mask &= timestamps >= start
+    if end is not None:
+        mask &= timestamps < end
+    return dataframe[mask]
+
+
+def read_raw_chunks(file_name, analytic_name, chunk_rows=default_chunk_rows, start_time=None, end_time=None):
+    """
+    Read raw file in chunks. Only columns required by analytic are parsed, values
+    are parsed into declared types and timestamps into datetime64 values
+    With time range, uncompressed file is read from the last indexed row before range
+    up to the first indexed row after range (see timeindex), so rows outside of range
+    are mostly not parsed. Compressed files are parsed whole and filtered
+    :param1 file_name: name of raw CSV file, optionally with compression suffix
+    :param2 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param3 chunk_rows: max number of rows in chunk
+    :param4 start_time: start time in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    :param5 end_time: end time (exclusive) in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    yield: dataframe with rows of chunk
+    Raise ValueError if a value can't be parsed
+    """
+    logger = logging.getLogger()
+    header = read_header(file_name)
+    columns = schema_columns(analytic_name, header)
+    if not columns:
+        return
+    dtypes = { name: dtype for (name, dtype) in columns.items() if name != timestamp_column }
+    time_range = (start_time is not None or end_time is not None) and timestamp_column in columns
+
+    (offset, rows) = (None, None)
+    if time_range and not any([ file_name.endswith(suffix) for suffix in compression_suffixes ]):
+        index = time_index(file_name, header.index(timestamp_column), timestamp_format)
+        if index is not None:
+            (offset, rows) = index.row_range(time_bound(start_time), time_bound(end_time))
+            logger.debug("Reading {} rows of {} from offset {}".format(rows, file_name, offset))
+            if rows == 0:
+                return
+
+    with open_raw_file(file_name) as stream:
+        if offset is None:
+            reader = pandas.read_csv(stream, usecols=list(columns), dtype=dtypes, chunksize=chunk_rows)
+        else:
+            stream.seek(offset)
+            reader = pandas.read_csv(stream, header=None, names=header, usecols=list(columns), dtype=dtypes,
+                                     nrows=rows, chunksize=chunk_rows)
+        try:
+            for chunk in reader:
+                if timestamp_column in chunk.columns:
+                    chunk[timestamp_column] = pandas.to_datetime(chunk[timestamp_column], format=timestamp_format)
+                if time_range:
+                    chunk = filter_time_range(chunk, start_time, end_time)
+                yield chunk
+        except (OSError, EOFError, lzma.LZMAError) as e:
+            # corrupted or truncated compressed file
+            raise ValueError("Can't decompress {}: {}".format(file_name, str(e)))
+
+
+def read_raw_file(file_name, analytic_name, chunk_rows=default_chunk_rows, start_time=None, end_time=None):
+    """
+    Read raw file into dataframe. Chunks are collected as numpy columns, so memory used
+    is size of parsed columns and one chunk of text
+    :param1 file_name: name of raw CSV file
+    :param2 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param3 chunk_rows: max number of rows parsed at once
+    :param4 start_time: start time in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    :param5 end_time: end time (exclusive) in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    return: dataframe with columns required by analytic, without columns if there are no rows in time range
+    Raise ValueError if a value can't be parsed
+    """
+    data = ColumnAccumulator()
+    empty = None
+    for chunk in read_raw_chunks(file_name, analytic_name, chunk_rows, start_time, end_time):
+        if empty is None:
+            empty = chunk.iloc[:0]
+        data.add(chunk)
+    if data.empty:
+        if empty is None or start_time is not None or end_time is not None:
+            return pandas.DataFrame()
+        return empty
+    return data.to_dataframe()
+
+
+def sidecar_name(file_name):
+    """
+    :param1 file_name: name of raw CSV file
+    return: name of sidecar directory
+    """
+    return file_name + sidecar_suffix
+
+
+def source_signature(file_name):
+    """
+    Size and modification time of raw file, sidecar is valid only for same values
+    :param1 file_name: name of raw CSV file
+    return: dict with size and mtime in nanoseconds
+    """
+    st = os.stat(file_name)
+    return { "size": st.st_size, "mtime": st.st_mtime_ns }
+
+
+def read_sidecar(file_name, analytic_name, start_time=None, end_time=None):
+    """
+    Read sidecar of raw file. Column files are memory-mapped copy on write, so only pages
+    used by report are read from disk and changes of dataframe are not written back
+    :param1 file_name: name of raw CSV file
+    :param2 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param3 start_time: start time in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    :param4 end_time: end time (exclusive) in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    return: dataframe with columns required by analytic or None if sidecar is missing
+            or it is not valid for current raw file
+    """
+    logger = logging.getLogger()
+    directory = sidecar_name(file_name)
+    try:
+        with open(join(directory, "meta.json")) as metafile:
+            meta = json.load(metafile)
+    except (OSError, ValueError):
+        return None
+
+    if meta.get("version") != sidecar_version or meta.get("analytic") != analytic_name \
+       or meta.get("source") != source_signature(file_name):
+        logger.debug("Sidecar {} is not valid for {}".format(directory, file_name))
+        return None
+
+    try:
+        data = { name: numpy.load(join(directory, "{}.npy".format(i)), mmap_mode="c", allow_pickle=False)
+                 for (i, name) in enumerate(meta["columns"]) }
+    except (OSError, ValueError) as e:
+        logger.debug("Can't read sidecar {}: {}".format(directory, str(e)))
+        return None
+    dataframe = pandas.DataFrame(data, columns=meta["columns"], copy=False)
+    if start_time is None and end_time is None:
+        return dataframe
+    dataframe = filter_time_range(dataframe, start_time, end_time, meta.get("ordered", False))
+    # same as parsed raw file without rows in time range
+    return dataframe if not dataframe.empty else pandas.DataFrame()
+
+
+def raw_columns(analytic_name, dataframe):
+    """
+    Convert collected data into columns read from raw file, so sidecar can be written
+    without parsing raw file again
+    :param1 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param2 dataframe: dataframe with collected data, timestamps in '%Y-%m-%d %H:%M:%S' format
+    return: dataframe with columns required by analytic and their types, as returned by read_raw_file
+    """
+    columns = schema_columns(analytic_name, list(dataframe.columns))
+    data = {}
+    for (name, dtype) in columns.items():
+        if name == timestamp_column:
+            data[name] = pandas.to_datetime(dataframe[name], format=timestamp_format).values
+        else:
+            data[name] = dataframe[name].values.astype(dtype)
+    return pandas.DataFrame(data, columns=list(columns), copy=False)
+
+
+def write_sidecar(file_name, analytic_name, dataframe, source=None):
+    """
+    Write sidecar of raw file with one numpy file per column. Sidecar is written
+    into temporary directory and renamed, so other runs never see a partial sidecar
+    Errors are logged only, as raw file can be parsed again
+    :param1 file_name: name of raw CSV file
+    :param2 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param3 dataframe: dataframe read from raw file
+    :param4 source: signature of raw file taken before it was read or None to take it now
+    """
+    logger = logging.getLogger()
+    directory = sidecar_name(file_name)
+    temporary = "{}.{}.tmp".format(directory, os.getpid())
+    meta = { "version": sidecar_version, "analytic": analytic_name,
+             "source": source_signature(file_name) if source is None else source,
+             "columns": list(dataframe.columns), "rows": len(dataframe),
+             "ordered": timestamp_column in dataframe.columns and bool(dataframe[timestamp_column].is_monotonic_increasing) }
+    try:
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        for (i, name) in enumerate(dataframe.columns):
+            numpy.save(join(temporary, "{}.npy".format(i)), dataframe[name].values, allow_pickle=False)
+        with open(join(temporary, "meta.json"), "w") as metafile:
+            json.dump(meta, metafile)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.rename(temporary, directory)
+    except (OSError, ValueError) as e:
+        shutil.rmtree(temporary, ignore_errors=True)
+        logger.warning("Can't write sidecar {}: {}".format(directory, str(e)))
+
+
+def read_histograms(file_name, rows=None):
+    """
+    Read latency histograms saved next to raw file by online mode, one histogram per row of raw file
+    :param1 file_name: name of raw CSV file
+    :param2 rows: number of rows of raw file or None if it is not checked
+    return: dict of LatencyHistograms per operation or None if there are no histograms
+            or they are not matching rows of raw file
+    """
+    logger = logging.getLogger()
+    try:
+        with numpy.load(file_name + histograms_suffix, allow_pickle=False) as npzfile:
+            histograms = arrays_histograms(npzfile)
+    except (OSError, ValueError, KeyError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logger.debug("Can't read histograms of {}: {}".format(file_name, str(e)))
+        return None
+    if not histograms or (rows is not None and any([ len(h) != rows for h in histograms.values() ])):
+        return None
+    return histograms
+
+
+def load_raw_file(file_name, analytic_name, sidecar=True, chunk_rows=default_chunk_rows, start_time=None, end_time=None):
+    """
+    Read raw file using its sidecar. If sidecar is missing or raw file was changed,
+    raw file is parsed and a new sidecar is written next to it
+    With time range, only rows of range are returned. If there is no valid sidecar,
+    only range is parsed and sidecar is not written, as it would have part of file
+    :param1 file_name: name of raw CSV file
+    :param2 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param3 sidecar: if False, raw file is always parsed and sidecar is not used
+    :param4 chunk_rows: max number of rows parsed at once
+    :param5 start_time: start time in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    :param6 end_time: end time (exclusive) in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    return: dataframe with columns required by analytic
+    Raise ValueError if a value can't be parsed
+    """
+    logger = logging.getLogger()
+    if not sidecar:
+        return read_raw_file(file_name, analytic_name, chunk_rows, start_time, end_time)
+
+    dataframe = read_sidecar(file_name, analytic_name, start_time, end_time)
+    if dataframe is not None:
+        logger.debug("Raw file {} loaded from sidecar".format(file_name))
+        return dataframe
+
+    if start_time is not None or end_time is not None:
+        return read_raw_file(file_name, analytic_name, chunk_rows, start_time, end_time)
+
+    source = source_signature(file_name)
+    dataframe = read_raw_file(file_name, analytic_name, chunk_rows)
+    if not dataframe.columns.empty:
+        write_sidecar(file_name, analytic_name, dataframe, source)
+    return dataframe
+
+
+def load_raw_columns(file_name, analytic_name, sidecar=True, chunk_rows=default_chunk_rows, start_time=None, end_time=None):
+    """
+    Load raw file in a worker process and return data in a compact form for parent process
+    If a valid sidecar exists after loading, parent can memory-map it and nothing is returned,
+    otherwise numpy columns are returned, which are sent without pickling each value
+    :param1 file_name: name of raw CSV file
+    :param2 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param3 sidecar: if False, raw file is always parsed and sidecar is not used
+    :param4 chunk_rows: max number of rows parsed at once
+    :param5 start_time: start time in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    :param6 end_time: end time (exclusive) in '%Y-%m-%d %H:%M:%S' format or None for whole file
+    return: dict of numpy array per column in file order or None if sidecar has to be used
+    Raise ValueError if a value can't be parsed
+    """
+    dataframe = load_raw_file(file_name, analytic_name, sidecar, chunk_rows, start_time, end_time)
+    if sidecar and read_sidecar(file_name, analytic_name) is not None:
+        return None
+    return { name: dataframe[name].values for name in dataframe.columns }
+
+
+def columns_dataframe(file_name, analytic_name, columns, start_time=None, end_time=None):
+    """
+    Build dataframe from result of load_raw_columns
+    :param1 file_name: name of raw CSV file
+    :param2 analytic_name: analytic name ( cpu, disk, nfs, iscsi, network)
+    :param3 columns: dict of numpy array per column or None if sidecar has to be used
+    :param4 start_time: start time used by load_raw_columns
+    :param5 end_time: end time used by load_raw_columns
+    return: dataframe with columns required by analytic
+    """
+    if columns is None:
+        dataframe = read_sidecar(file_name, analytic_name, start_time, end_time)
+        if dataframe is not None:
+            return dataframe
+        return load_raw_file(file_name, analytic_name, start_time=start_time, end_time=end_time)
+    return pandas.DataFrame(columns, columns=list(columns), copy=False)
@@ -0,0 +1,107 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+# All access to private attributes of delphixpy DelphixEngine objects is kept in this module.
+# They are not a part of delphixpy API, so they are checked and a missing attribute
+# is reported as unsupported delphixpy version instead of AttributeError deep in a worker thread
+
+# delphixpy version, which has all attributes used here
+tested_delphixpy_version = "1.10.6"
+
+
+class UnsupportedDelphixpyError(Exception):
+    """
+    Raised if delphixpy object is missing a private attribute used by dxanalyze
+    """
+
+
+def internal(obj, name):
+    """
+    Get private attribute of delphixpy object
+    :param1 obj: delphixpy object
+    :param2 name: attribute name
+    return: attribute value
+    Raise UnsupportedDelphixpyError if object is missing attribute
+    """
+    try:
+        return getattr(obj, name)
+    except AttributeError:
+        raise UnsupportedDelphixpyError("delphixpy {} object has no attribute {}. This delphixpy version is not "
+                                        "supported, use delphixpy {}".format(type(obj).__name__, name,
+                                                                             tested_delphixpy_version))
+
+
+def set_internal(obj, name, value):
+    """
+    Set private attribute of delphixpy object. Attribute has to exist already,
+    a new attribute would be silently ignored by delphixpy
+    :param1 obj: delphixpy object
+    :param2 name: attribute name
+    :param3 value: new value
+    Raise UnsupportedDelphixpyError if object is missing attribute
+    """
+    internal(obj, name)
+    setattr(obj, name, value)
+
+
+def share_login_session(src_engineobject, dst_engineobject):
+    """
+    Copy API session and login cookie from connected engine object into a new one
+    so worker threads are not doing own login. If session will time out,
+    worker engine object will login again using own credentials
+    :param1 src_engineobject: connected DelphixEngine object
+    :param2 dst_engineobject: new DelphixEngine object
+    Raise UnsupportedDelphixpyError if delphixpy objects are missing used attributes
+    """
+    if src_engineobject is None or internal(src_engineobject, "_delphix_session") is None:
+        return
+    set_internal(dst_engineobject, "_delphix_session", internal(src_engineobject, "_delphix_session"))
+    set_internal(internal(dst_engineobject, "_http_session"), "_cookie",
+                 internal(internal(src_engineobject, "_http_session"), "_cookie"))
+    set_internal(internal(dst_engineobject, "_login_helper"), "_time_at_last_login",
+                 internal(internal(src_engineobject, "_login_helper"), "_time_at_last_login"))
+
+
+def reset_connection(engineobject):
+    """
+    Drop HTTP connection of engine object after a failed request,
+    so next request is using a new connection instead of a broken one
+    :param1 engineobject: DelphixEngine object
+    Raise UnsupportedDelphixpyError if delphixpy objects are missing used attributes
+    """
+    client = internal(internal(engineobject, "_http_session"), "_client")
+    set_internal(client, "_time_since_last_reconnection", None)
+
+
+def authenticated_get(engineobject, url, pool=None):
+    """
+    Send GET request using API session of engine object, which is logging in if needed
+    :param1 engineobject: DelphixEngine object
+    :param2 url: API url
+    :param3 pool: HttpConnectionPool used instead of connection of engine object or None
+    return: response body
+    Raise UnsupportedDelphixpyError if delphixpy objects are missing used attributes
+    """
+    def perform():
+        # HTTP session is looked up after login, as login can replace it
+        http_session = internal(engineobject, "_http_session")
+        if pool is None:
+            return http_session.get(url)
+        response = pool.request("GET", url, internal(http_session, "_create_headers")())
+        return internal(http_session, "_handle_response")(response, "GET", url)
+
+    (_, _, body) = internal(engineobject, "_authenticate_and_perform")(perform)
+    return body
@@ -0,0 +1,197 @@
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# Copyright (c) 2019 by Delphix. All rights reserved.
+#
+
+import logging
+import os
+
+import numpy
+from pandas import pandas
+
+# number of rows between index entries, at most one step of rows is parsed outside of time range
+default_index_step = 10000
+# size of blocks read while rows of raw file are counted
+index_block_size = 16 * 1024 * 1024
+# suffix of index file saved next to raw file
+index_suffix = ".index.npz"
+# version of index format, indexes with other version are rebuilt
+index_version = 1
+
+
+def index_name(file_name):
+    """
+    :param1 file_name: name of raw CSV file
+    return: name of index file
+    """
+    return file_name + index_suffix
+
+
+def file_signature(file_name):
+    """
+    :param1 file_name: name of raw CSV file
+    return: numpy array with size and modification time in nanoseconds
+    """
+    st = os.stat(file_name)
+    return numpy.array([st.st_size, st.st_mtime_ns], dtype=numpy.int64)
+
+
+class TimeIndex(object):
+    """
+    Sparse index of raw CSV file with byte offset and timestamp of every step-th row
+    Rows of raw files are in timestamp order, so a time range is read by seeking to the last
+    indexed row before the range and reading rows up to the first indexed row after the range
+    Index is saved next to raw file and it is valid only for same file size and modification time
+    Order of rows is verified for indexed rows only, file with indexed rows out of order is not indexed
+    """
+
+    def __init__(self, timestamps, offsets, rows, total_rows):
+        """
+        :param1 timestamps: numpy datetime64 array with timestamps of indexed rows
+        :param2 offsets: numpy array with byte offsets of indexed rows
+        :param3 rows: numpy array with numbers of indexed rows, first data row is 0
+        :param4 total_rows: number of data rows in file
+        """
+        self.timestamps = timestamps
+        self.offsets = offsets
+        self.rows = rows
+        self.total_rows = total_rows
+
+    @classmethod
+    def build(cls, file_name, position, timestamp_format, step=None):
+        """
+        Scan raw file and index every step-th row. Rows are counted by searching newlines
+        in large blocks, only indexed rows are parsed
+        :param1 file_name: name of uncompressed raw CSV file
+        :param2 position: position of timestamp column in header
+        :param3 timestamp_format: format of timestamps
+        :param4 step: number of rows between index entries or None for default_index_step
+        return: TimeIndex object or None if timestamps of file can't be indexed
+        """
+        logger = logging.getLogger()
+        if step is None:
+            step = default_index_step
+        size = os.path.getsize(file_name)
+        with open(file_name, "rb") as f:
+            f.readline()
+            offsets = [f.tell()]
+            newlines = 0
+            block_start = f.tell()
+            last_byte = b"\n"
+            while True:
+                block = f.read(index_block_size)
+                if not block:
+                    break
+                positions = numpy.flatnonzero(numpy.frombuffer(block, dtype=numpy.uint8) == 10)
+                # row after newline number n has row number n + 1
+                numbers = numpy.arange(newlines + 1, newlines + len(positions) + 1)
+                offsets.extend((positions[numbers % step == 0] + block_start + 1).tolist())
+                newlines += len(positions)
+                block_start += len(block)
+                last_byte = block[-1:]
+
+            offsets = [ offset for offset in offsets if offset < size ]
+            total_rows = newlines + (1 if offsets and last_byte != b"\n" else 0)
+
+            values = []
+            for offset in offsets:
+                f.seek(offset)
+                fields = f.readline().split(b",")
+                values.append(fields[position].strip().strip(b'"').decode("latin-1") if position < len(fields) else "")
+
+        try:
+            timestamps = pandas.to_datetime(pandas.Series(values, dtype=object), format=timestamp_format).values
+        except ValueError as e:
+            logger.debug("Timestamps of {} can't be indexed: {}".format(file_name, str(e)))
+            return None
+        if numpy.isnat(timestamps).any() or (numpy.diff(timestamps) < numpy.timedelta64(0)).any():
+            logger.debug("Rows of {} are not in timestamp order, file can't be indexed".format(file_name))
+            return None
+        rows = numpy.arange(len(offsets), dtype=numpy.int64) * step
+        return cls(timestamps, numpy.array(offsets, dtype=numpy.int64), rows, total_rows)
+
+    @classmethod
+    def load(cls, file_name):
+        """
+        Load index saved next to raw file
+        :param1 file_name: name of raw CSV file
+        return: TimeIndex object or None if there is no valid index
+        """
+        try:
+            with numpy.load(index_name(file_name), allow_pickle=False) as npzfile:
+                if int(npzfile["version"]) != index_version \
+                   or not numpy.array_equal(npzfile["source"], file_signature(file_name)):
+                    return None
+                return cls(npzfile["timestamps"], npzfile["offsets"], npzfile["rows"], int(npzfile["total_rows"]))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def save(self, file_name, source):
+        """
+        Save index next to raw file. Errors are logged only, as index can be built again
+        :param1 file_name: name of raw CSV file
+        :param2 source: file signature taken before file was scanned
+        """
+        logger = logging.getLogger()
+        temporary = "{}.{}.tmp.npz".format(index_name(file_name), os.getpid())
+        try:
+            numpy.savez(temporary, version=index_version, source=source, timestamps=self.timestamps,
+                        offsets=self.offsets, rows=self.rows, total_rows=self.total_rows)
+            os.replace(temporary, index_name(file_name))
+        except OSError as e:
+            logger.warning("Can't write index {}: {}".format(index_name(file_name), str(e)))
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+
+    def row_range(self, start_time=None, end_time=None):
+        """
+        Find rows to read for time range
+        :param1 start_time: numpy datetime64 start of range or None for start of file
+        :param2 end_time: numpy datetime64 end of range (exclusive) or None for end of file
+        return: touple of byte offset of first row and number of rows to read
+        """
+        first = 0
+        if start_time is not None:
+            # last indexed row before start, all rows before it are older than start
+            first = max(int(numpy.searchsorted(self.timestamps, start_time, side="left")) - 1, 0)
+        last = len(self.offsets)
+        if end_time is not None:
+            # first indexed row at or after end, all rows after it are outside of range
+            last = max(int(numpy.searchsorted(self.timestamps, end_time, side="left")), first)
+        if first >= len(self.offsets):
+            return (None, 0)
+        end_row = self.rows[last] if last < len(self.rows) else self.total_rows
+        return (int(self.offsets[first]), int(end_row - self.rows[first]))
+
+
+def time_index(file_name, position, timestamp_format):
+    """
+    Load index of raw file or build and save a new one
+    :param1 file_name: name of uncompressed raw CSV file
+    :param2 position: position of timestamp column in header
+    :param3 timestamp_format: format of timestamps
+    return: TimeIndex object or None if file can't be indexed
+    """
+    logger = logging.getLogger()
+    index = TimeIndex.load(file_name)
+    if index is not None:
+        return index
+    source = file_signature(file_name)
+    index = TimeIndex.build(file_name, position, timestamp_format)
+    if index is not None:
+        logger.debug("Index of {} built with {} entries".format(file_name, len(index.offsets)))
+        index.save(file_name, source)
+    return index
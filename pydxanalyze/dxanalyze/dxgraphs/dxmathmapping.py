@@ -14,11 +14,17 @@
 # Copyright (c) 2019 by Delphix. All rights reserved.
 #
 
+import re
+
 pltblue = '#0066CC'
 pltred = '#C14A4E'
 pltgrn = '#99cc00'
 pltblack = '#000000'
 pltdarkgrn = "#339966"
+pltlightblue = '#66A3E0'
+pltdarkblue = '#003D7A'
+pltlightred = '#E0898C'
+pltdarkred = '#7A2427'
 
 # mapping for a graph title based on analytics and stat_name
 title_mapping = {
@@ -31,20 +37,25 @@ title_mapping = {
     "nfs": {
         "ops": "NFS Server operations per second",
         "latency": "Internal NFS Latency",
+        "latency_percentiles": "Internal NFS Latency Percentiles",
         "throughput": "NFS Throughput from the Delphix Engine to the Targets"
     },
     "iscsi": {
         "ops": "iSCSI Server operations per second",
         "latency": "Internal iSCSI Latency",
+        "latency_percentiles": "Internal iSCSI Latency Percentiles",
         "throughput": "iSCSI Throughput from the Delphix Engine to the Targets"
     },
     "disk": {
         "ops": "Disk IOPS from the Delphix Engine to the Storage",
         "latency": "Internal Disk Latency",
+        "latency_percentiles": "Internal Disk Latency Percentiles",
         "throughput": "Disk Throughput from the Delphix Engine to the Storage"
     },
     "network": {
-        "throughput": "Total VM Network Throughput from the Delphix Engine to all Sources/Targets"
+        "throughput": "Total VM Network Throughput from the Delphix Engine to all Sources/Targets",
+        "nic_read_throughput": "VM Network Read Throughput per Interface",
+        "nic_write_throughput": "VM Network Write Throughput per Interface"
     },
     "network_summary": {
         "throughput": "85% Network Throughput Variation for 1 week"
@@ -58,6 +69,9 @@ title_mapping = {
 y_axis_mapping = {
     "throughput": "Throughput [MB/s]",
     "latency": "Latency [ms]",
+    "latency_percentiles": "Latency [ms]",
+    "nic_read_throughput": "Throughput [MB/s]",
+    "nic_write_throughput": "Throughput [MB/s]",
     "ops": "Operations per second",
     "utilization": "Utilization",
     "chr": "% Cash Hit"
@@ -102,6 +116,42 @@ label_mapping = {
         "trendcolor": pltdarkgrn,
         "style": "."
     },
+    "read_latency_p50" : {
+        "label": "read latency p50",
+        "color": pltblue,
+        "trendcolor": pltblack,
+        "style": "."
+    },
+    "read_latency_p95" : {
+        "label": "read latency p95",
+        "color": pltlightblue,
+        "trendcolor": pltblack,
+        "style": "."
+    },
+    "read_latency_p99" : {
+        "label": "read latency p99",
+        "color": pltdarkblue,
+        "trendcolor": pltblack,
+        "style": "."
+    },
+    "write_latency_p50" : {
+        "label": "write latency p50",
+        "color": pltred,
+        "trendcolor": pltdarkgrn,
+        "style": "."
+    },
+    "write_latency_p95" : {
+        "label": "write latency p95",
+        "color": pltlightred,
+        "trendcolor": pltdarkgrn,
+        "style": "."
+    },
+    "write_latency_p99" : {
+        "label": "write latency p99",
+        "color": pltdarkred,
+        "trendcolor": pltdarkgrn,
+        "style": "."
+    },
     "outBytes" : {
         "label": "read throughput",
         "color": pltblue, 
@@ -152,3 +202,21 @@ label_mapping = {
     }
 }
 
+# colors of per interface series, interfaces are colored in order of their names
+nic_colors = [pltblue, pltred, pltgrn, pltdarkgrn, pltlightblue, pltdarkblue, pltlightred, pltdarkred, pltblack]
+# per interface columns of network data
+nic_series = re.compile(r"^(inBytes|outBytes)_(.+)$")
+
+
+def add_nic_labels(series_names):
+    """
+    Add label mapping for per interface series inBytes_<nic> and outBytes_<nic>
+    Interface names are not known in advance, so series are labeled by interface name
+    :param1 series_names: list of series names of graph
+    """
+    matches = [ nic_series.match(name) for name in series_names ]
+    nics = sorted(set([ m.group(2) for m in matches if m ]))
+    for m in matches:
+        if m:
+            color = nic_colors[nics.index(m.group(2)) % len(nic_colors)]
+            label_mapping[m.group(0)] = { "label": m.group(2), "color": color, "trendcolor": color, "style": "." }
@@ -26,6 +26,7 @@ import matplotlib.ticker as ticker
 from dxanalyze.dxgraphs.dxmathmapping import title_mapping
 from dxanalyze.dxgraphs.dxmathmapping import label_mapping
 from dxanalyze.dxgraphs.dxmathmapping import y_axis_mapping
+from dxanalyze.dxgraphs.dxmathmapping import add_nic_labels
 
 # plot definition - TODO: review
 xlab_fn = ylab_fn = title_fn = 'DejaVu Sans'  
@@ -71,12 +72,14 @@ def create_plot(analytic, stat_name, series, y_max_computed, add_trend=False):
     :param3 series: dict with series to plot on single graph
     :param4 y_max_computed: max y axis for plot
     :param5 add_trend: flag to add trend line to plot 
+    return: file name of picture saved in temporary directory
     """
     # width/high in inches 
     # it's resized in PPT to 6.5:4
     plt.rcParams['figure.figsize'] = (12, 7.5) 
     plt.figure()
     ax = plt.subplot(1,1,1)
+    add_nic_labels(list(series.keys()))
     
     for name, plt_series in series.items():
         plot_series(ax, plt_series, name)
@@ -94,7 +97,7 @@ def create_plot(analytic, stat_name, series, y_max_computed, add_trend=False):
         plt.ylim(0, y_max_computed)
     else:
         plt.ylim(0, y_max_computed*1.2)
-    chrt_details( ax, analytic, stat_name)
+    return chrt_details( ax, analytic, stat_name)
   
 def plot_series(ax, ser, label):
 
@@ -145,6 +148,7 @@ def chrt_details(ax, analytic, stat_name):
     lgd = ax.legend(loc=leg_loc, bbox_to_anchor=(1, 0.5), frameon=False, fontsize=ytickfs, markerscale=4.)
     imgname = os.path.join(tempdir, filename)
     plt.savefig(imgname, bbox_extra_artists=(lgd, ), bbox_inches='tight')
+    return filename
 
 def create_farmanalyze_chart(df, engine_dict_list,fmindate,fmaxdate):
     
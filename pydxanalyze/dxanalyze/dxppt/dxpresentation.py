@@ -99,6 +99,35 @@ def add_pictures(prs, analytic_list, imgdir):
                 height = Inches(4.0)
                 slide.shapes.add_picture(fname, left, top, width, height)
 
+def add_extra_slides(prs, analytic_list, imgdir, dlpx_engine_name, graph_list):
+    """
+    Add slides for generated pictures which don't have a slide in template
+    New slides are moved before slide extra_slides_position
+    Pictures are kept in shared directory between reports, so only pictures
+    generated for this report are added
+    :param1 prs: Presentaton object
+    :param2 analytic_list: List of analytics where pictures will be added
+    :param3 imgdir: picture directory
+    :param4 dlpx_engine_name: Engine name
+    :param5 graph_list: List of picture names generated for this report
+    """
+    layout = prs.slides[dxslideconfig.extra_slides_layout-1].slide_layout
+    position_id = prs.slides._sldIdLst[dxslideconfig.extra_slides_position-1]
+    for analytic_name in analytic_list:
+        for graph_name, title in dxslideconfig.extra_slides.get(analytic_name, {}).items():
+            fname = os.path.join(imgdir, graph_name)
+            if graph_name in graph_list and os.path.isfile(fname):
+                slide = prs.slides.add_slide(layout)
+                if slide.shapes.title:
+                    slide.shapes.title.text = dlpx_engine_name + " " + title
+                left = Inches(0.2)
+                top = Inches(1.1)
+                width = Inches(6.5)
+                height = Inches(4.0)
+                slide.shapes.add_picture(fname, left, top, width, height)
+                # new slide is added at the end, move it before position slide
+                position_id.addprevious(prs.slides._sldIdLst[-1])
+
 def cleanup_pictures(analytic_list, imgdir):
     """
     Delete generated pictures
@@ -114,12 +143,13 @@ def cleanup_pictures(analytic_list, imgdir):
                 #print("deleting {}".format(fname))
                 os.remove(fname)
 
-def gen_presentation(analytic_list, out_location, engine_name):
+def gen_presentation(analytic_list, out_location, engine_name, graph_list):
     """
     Generate presentation based on the template and save it as a new one
     :param1 analytic_list: List of analytics with data to add to presentation
     :param2 out_location: output directory to save presentation
     :param3 engine_name: Delphix Engine name 
+    :param4 graph_list: List of picture names generated for this report
     """
     prs = Presentation(dxslideconfig.report_template)
     update_titles(prs, engine_name, "")
@@ -127,6 +157,9 @@ def gen_presentation(analytic_list, out_location, engine_name):
     analytic_list.append("chr")
     tempdir = tempfile.gettempdir()
     add_pictures(prs, analytic_list, tempdir)
+    # extra slides have to be added before any slide is deleted, as template slide numbers are used
+    # they are inserted after all analytic slides, so numbers of slides to delete are not changed
+    add_extra_slides(prs, analytic_list, tempdir, engine_name, graph_list)
 
     delete_slide_list = []
 
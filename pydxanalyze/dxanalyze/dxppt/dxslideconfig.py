@@ -46,6 +46,26 @@ slide_with_pictures = {
     }    
 }
 
+# pictures without slide in template, a new slide is added for each picture
+# before slide extra_slides_position using layout of slide extra_slides_layout
+extra_slides = {
+    "network": {
+        "network_nic_read_throughput.png": "Metrics : VM Network Read Throughput per Interface",
+        "network_nic_write_throughput.png": "Metrics : VM Network Write Throughput per Interface"
+    },
+    "nfs": {
+        "nfs_latency_percentiles.png": "Metrics : Internal NFS Latency Percentiles"
+    },
+    "iscsi": {
+        "iscsi_latency_percentiles.png": "Metrics : Internal iSCSI Latency Percentiles"
+    },
+    "disk": {
+        "disk_latency_percentiles.png": "Metrics : Internal Disk Latency Percentiles"
+    }
+}
+extra_slides_layout = 16
+extra_slides_position = 21
+
 report_template = 'pydxanalyze-template.pptx'
 farm_report_template = 'pydxfarmanalyze-template.pptx'
 skip_title_update_slides = [2, 23, 24, 25]
\ No newline at end of file
@@ -26,9 +26,13 @@ from sys import exit
 
 import click
 
+import dxanalyze.dxdata.checkpoint as checkpoint
 import dxanalyze.dxdata.datafiles as datafiles
 import dxanalyze.dxdata.dataprocessing as dataprocessing
 import dxanalyze.dxdata.engine as engine
+import dxanalyze.dxdata.fleet as fleet
+import dxanalyze.dxdata.pagecache as pagecache
+import dxanalyze.dxdata.rawfiles as rawfiles
 import dxanalyze.dxppt.dxpresentation as dxpresentation
 import dxanalyze.dxgraphs.dxmathplot as dxmathplot
 from dxanalyze.dxlogging import print_error
@@ -46,9 +50,23 @@ def generate_report(mode, out_location, sync_y, **kwargs):
     param engine_ip: engine ip for online analytics
     param engine_user: engine user for online analytics
     param engine_password: engine password for online analytics
-    param start_time: start time for online analytics
-    param end_time: end time for online analytics
+    param start_time: start time for online analytics or offline analytics
+    param end_time: end time for online analytics or offline analytics
+    param parallel: number of concurrent requests per analytic for online analytics
+    param cache: PageCache object for online analytics or None if cache is disabled
+    param max_memory: memory limit in bytes for data of single analytic for online analytics
+    param checkpoint: Checkpoint object for online analytics or None if checkpoint is disabled
+    param raw_files: RawFiles object for online analytics or None if raw data are not saved
+    param detail_days: number of most recent days with minute data for online analytics, older data are hourly
+    param async_client: use asyncio client instead of delphixpy for online analytics
+    param sweep: collect all analytics in a single pass over time range for online analytics
+    param network_per_nic: collect and chart network throughput of each interface for online analytics
     param analytic_directory: location of files for offline analytic
+    param sidecar: use columnar sidecars of raw files for offline analytic
+    param file_parallel: number of raw files parsed concurrently for offline analytic
+    param engine_list: dxtools.conf like file with list of engines for online farmanalyze
+    param resolution: data resolution for online farmanalyze
+    param fleet_parallel: number of engines collected concurrently for online farmanalyze
     param engine_name: name of the engine (required for offline processing to find file prefix)
     """
     logger = logging.getLogger()
@@ -58,18 +76,36 @@ def generate_report(mode, out_location, sync_y, **kwargs):
         engine_ip = kwargs.get('engine_ip')
         engine_user = kwargs.get('engine_user')
         engine_password = kwargs.get('engine_password')
-        engine.connect(engine_ip, engine_user, engine_password)
-        available_list = engine.get_available_analytics()
-        engine_name = engine.get_engine_name()
+        network_per_nic = kwargs.get('network_per_nic', False)
+        if kwargs.get('async_client'):
+            session = engine.AsyncEngineSession(engine_ip, engine_user, engine_password, network_per_nic=network_per_nic)
+        else:
+            session = engine.EngineSession(engine_ip, engine_user, engine_password, network_per_nic)
+        session.connect()
+        available_list = session.get_available_analytics()
+        engine_name = session.engine_name
     elif mode == "offline":
         analytic_directory = kwargs.get('analytic_directory')
         engine_name = kwargs.get('engine_name')
+        datafiles.check_time_range(kwargs.get('start_time'), kwargs.get('end_time'))
         datafiles.detect_files(analytic_directory, engine_name)
         available_list = datafiles.get_analytics_to_process()
     elif mode == "farmanalyze":
-        analytic_directory = kwargs.get('analytic_directory')
-        engine_cpufile_mapping,engine_networkfile_mapping,engine_throughputtestfile_mapping = datafiles.detect_farmanalyze_files(analytic_directory)
-        farmanalyze_data_list,fmindate,fmaxdate = dataprocessing.generate_farmanalyze_data_summary(engine_cpufile_mapping,engine_networkfile_mapping,engine_throughputtestfile_mapping)
+        if kwargs.get('engine_list') is not None:
+            # online farm mode, data are collected directly from engines
+            engine_list = fleet.read_engine_list(kwargs.get('engine_list'), kwargs.get('engine_user'), kwargs.get('engine_password'))
+            farmanalyze_data_list,fmindate,fmaxdate = fleet.collect_farmanalyze_summary(engine_list, kwargs.get('start_time'), kwargs.get('end_time'),
+                                                                                         resolution=kwargs.get('resolution', fleet.default_farm_resolution),
+                                                                                         fleet_parallel=kwargs.get('fleet_parallel', fleet.default_fleet_parallel),
+                                                                                         parallel=kwargs.get('parallel', engine.default_parallel))
+            if not farmanalyze_data_list:
+                print_error("There is no data collected from engines")
+                logger.error("There is no data collected from engines")
+                exit(1)
+        else:
+            analytic_directory = kwargs.get('analytic_directory')
+            engine_cpufile_mapping,engine_networkfile_mapping,engine_throughputtestfile_mapping = datafiles.detect_farmanalyze_files(analytic_directory)
+            farmanalyze_data_list,fmindate,fmaxdate = dataprocessing.generate_farmanalyze_data_summary(engine_cpufile_mapping,engine_networkfile_mapping,engine_throughputtestfile_mapping)
         df =  dataprocessing.create_farmanalyze_df(farmanalyze_data_list)
         dxmathplot.create_farmanalyze_chart(df, farmanalyze_data_list,fmindate,fmaxdate)
 
@@ -78,30 +114,125 @@ def generate_report(mode, out_location, sync_y, **kwargs):
         
     else:
         logger.debug("List of available analytics to process {}".format(str(available_list)))
-        analytic_with_data = process_data(mode, available_list, sync_y, **kwargs)
-        logger.debug("List of available analytics with data {}".format(str(analytic_with_data)))
-        core_required_analytic = set(["cpu", "network", "disk"])
-        if core_required_analytic.issubset(set(analytic_with_data)):
-            if "nfs" in analytic_with_data or "iscsi" in analytic_with_data:
-                dxpresentation.gen_presentation(analytic_with_data, out_location, engine_name)
-            else:
-                print("NFS or iSCSI data are missing")
+        if mode == 'offline':
+            # files are parsed concurrently and each analytic is returned
+            # for graph generation as soon as its file is parsed
+            collected = datafiles.process_files(available_list, datafiles.get_files_mapping(), kwargs.get('sidecar', True),
+                                                kwargs.get('file_parallel', datafiles.default_file_parallel),
+                                                kwargs.get('start_time'), kwargs.get('end_time'))
         else:
-            missing = ",".join(list(core_required_analytic.difference(set(analytic_with_data))))
-            print_error("Missing data for {}".format(missing))
-            logger.debug("Missing data for {}".format(missing))
+            # all analytics are collected concurrently and each one is returned
+            # for graph generation as soon as its data are collected
+            start_time = kwargs.get('start_time')
+            end_time = kwargs.get('end_time')
+            parallel = kwargs.get('parallel', engine.default_parallel)
+            cache = kwargs.get('cache')
+            max_memory = kwargs.get('max_memory')
+            collect = session.sweep_analytics if kwargs.get('sweep') else session.collect_analytics
+            collected = collect(available_list, start_time, end_time, parallel=parallel, cache=cache,
+                                max_memory=max_memory, checkpoint=kwargs.get('checkpoint'),
+                                raw_files=kwargs.get('raw_files'), detail_days=kwargs.get('detail_days'))
+        create_report(collected, out_location, sync_y, engine_name)
+        if kwargs.get('checkpoint') is not None:
+            # all pages are collected, checkpoint is not needed anymore
+            kwargs.get('checkpoint').remove()
+
+
+def generate_fleet_report(out_location, sync_y, **kwargs):
+    """
+    Generate a report for each engine from list. Data are collected from engines concurrently
+    and report is generated for each engine as soon as its data are collected
+    :param1 out_location: output directory location for reports
+    :param2 sync_y: sync Y across all latency or throughput graphs
+    param engine_list: name of dxtools.conf like file with list of engines
+    param engine_user: engine user used for engines without username in the list
+    param engine_password: engine password used for engines without password in the list
+    param start_time: start time for analytics
+    param end_time: end time for analytics
+    param fleet_parallel: number of engines collected concurrently
+    param parallel: number of concurrent requests per analytic
+    param cache: PageCache object or None if cache is disabled
+    param max_memory: memory limit in bytes for data of single analytic
+    param raw_files: RawFiles object or None if raw data are not saved
+    param detail_days: number of most recent days with minute data, older data are hourly
+    param async_client: use asyncio client instead of delphixpy
+    param sweep: collect analytics of each engine in a single pass over time range
+    """
+    logger = logging.getLogger()
+    datafiles.test_dir(out_location)
+
+    engine_list = fleet.read_engine_list(kwargs.get('engine_list'), kwargs.get('engine_user'), kwargs.get('engine_password'))
+    logger.debug("List of engines to process {}".format(str([e[0] for e in engine_list])))
+
+    failed = []
+    collected_fleet = fleet.collect_fleet(engine_list, kwargs.get('start_time'), kwargs.get('end_time'),
+                                          fleet_parallel=kwargs.get('fleet_parallel', fleet.default_fleet_parallel),
+                                          parallel=kwargs.get('parallel', engine.default_parallel),
+                                          cache=kwargs.get('cache'), max_memory=kwargs.get('max_memory'),
+                                          raw_files=kwargs.get('raw_files'), detail_days=kwargs.get('detail_days'),
+                                          async_client=kwargs.get('async_client', False),
+                                          sweep=kwargs.get('sweep', False))
+    for (engine_address, session, collected) in collected_fleet:
+        if session is None:
+            failed.append(engine_address)
+            continue
+        try:
+            create_report(collected, out_location, sync_y, session.engine_name)
+        except SystemExit:
+            failed.append(engine_address)
+
+    if failed:
+        print_error("Reports not generated for engines: {}".format(",".join(failed)))
+        logger.error("Reports not generated for engines: {}".format(",".join(failed)))
+        exit(1)
+
+
+def get_raw_files(save_raw, columnar):
+    """
+    Check raw files options
+    :param1 save_raw: directory for raw files or None if raw data are not saved
+    :param2 columnar: save also columnar sidecar of raw files
+    return: RawFiles object or None
+    """
+    if save_raw is None:
+        if columnar:
+            print_error("Option --columnar requires --save_raw")
             exit(1)
+        return None
+    datafiles.test_dir(save_raw)
+    return rawfiles.RawFiles(save_raw, columnar)
+
+
+def create_report(collected, out_location, sync_y, engine_name):
+    """
+    Generate graphs and presentation for one engine
+    :param1 collected: iterable of touples with analytic name and statistics
+    :param2 out_location: output directory location for report
+    :param3 sync_y: sync Y across all latency or throughput graphs
+    :param4 engine_name: engine name used in report
+    """
+    logger = logging.getLogger()
+    (analytic_with_data, graph_list) = process_data(collected, sync_y)
+    logger.debug("List of available analytics with data {}".format(str(analytic_with_data)))
+    core_required_analytic = set(["cpu", "network", "disk"])
+    if core_required_analytic.issubset(set(analytic_with_data)):
+        if "nfs" in analytic_with_data or "iscsi" in analytic_with_data:
+            dxpresentation.gen_presentation(analytic_with_data, out_location, engine_name, graph_list)
+        else:
+            print("NFS or iSCSI data are missing")
+    else:
+        missing = ",".join(list(core_required_analytic.difference(set(analytic_with_data))))
+        print_error("Missing data for {}".format(missing))
+        logger.debug("Missing data for {}".format(missing))
+        exit(1)
    
 
-def process_data(mode, available_list, sync_y, **kwargs):
+def process_data(collected, sync_y):
     """
     Process data and generate graphs
-    :param1 mode: oneline or offline processing
-    :param2 available_list: list of analytics to process
-    :param3 sync_y: sync Y across all latency or throughput graphs
-    :param4 out_location: output directory location for report
-    param start_time: start time for online analytics
-    param end_time: end time for online analytics
+    :param1 collected: iterable of touples with analytic name and statistics
+    :param2 sync_y: sync Y across all latency or throughput graphs
+    return: touple of list of analytics with data and list of graph pictures generated for them
     """  
 
     io_stats_dataframes_copy = {
@@ -111,19 +242,17 @@ def process_data(mode, available_list, sync_y, **kwargs):
     }
 
     analytic_with_data = []
+    graph_list = []
 
     logger = logging.getLogger()
 
     sync_y = True
 
-    for analytic in available_list:
+    # y axis from report of previous engine can't be used
+    dataprocessing.reset_max_y_axis()
+
+    for analytic, analytic_stats in collected:
         logger.debug("Processing {} analytic".format(analytic))
-        if mode == 'offline':
-            analytic_stats = datafiles.process_file(analytic, datafiles.get_files_mapping())
-        else:
-            start_time = kwargs.get('start_time')
-            end_time = kwargs.get('end_time')
-            analytic_stats = engine.process_analytics(analytic, start_time, end_time)
 
         if analytic_stats:
             analytic_with_data.append(analytic)
@@ -142,7 +271,7 @@ def process_data(mode, available_list, sync_y, **kwargs):
                         dxmathplot.create_plot(analytic + "_summary", stat_name, summary, y_max_computed, False)
                         
 
-                if analytic == 'network':  
+                if analytic == 'network' and stat_name == 'throughput':
                     summary = dataprocessing.generate_network_summary(stat_series)
                     if summary:
                         y_max_computed = dataprocessing.get_max_y_axis(analytic + "_summary", stat_name, False)
@@ -165,10 +294,13 @@ def process_data(mode, available_list, sync_y, **kwargs):
 
                 y_max_computed = dataprocessing.get_max_y_axis(analytic, stat_name, sync_y)
                 logger.debug("y_max for analytic is {}".format(y_max_computed))
-                dxmathplot.create_plot(analytic, stat_name, series, y_max_computed, True)
+                # percentile and per interface graphs have many series, trend lines would make them unreadable
+                graph_list.append(dxmathplot.create_plot(analytic, stat_name, series, y_max_computed,
+                                                         stat_name not in ["latency_percentiles", "nic_read_throughput",
+                                                                           "nic_write_throughput"]))
 
     dataprocessing.print_cache_hit_ratio(io_stats_dataframes_copy)
-    return analytic_with_data
+    return (analytic_with_data, graph_list)
 
 
 class Config(object):
@@ -252,16 +384,118 @@ def cli(config):
                        required=True, prompt='Enter Engine admin password')
 @click.option('--start_time', help="Start time for analytic data. Format YYYY-MM-DD HH24:MI:SS. If not specified a current time minus 7 days will be set")
 @click.option('--end_time', help="End time for analytic data. Format YYYY-MM-DD HH24:MI:SS. If not specified a current time will be used")
+@click.option('--parallel', type=int, default=engine.default_parallel, show_default=True,
+              help="Number of concurrent requests to Delphix Engine per analytic")
+@click.option('--cache_dir', default=pagecache.default_cache_dir, show_default=True,
+              help="Directory for a cache of analytic data fetched from Delphix Engine")
+@click.option('--cache_size', type=int, default=pagecache.default_cache_size // 1024 // 1024, show_default=True,
+              help="Max size of a cache in MB. Least recently used data are removed above it")
+@click.option('--no_cache', is_flag=True, help="Don't use a cache and fetch all data from Delphix Engine")
+@click.option('--refresh', is_flag=True, help="Fetch all data from Delphix Engine and refresh a cache")
+@click.option('--max_memory', type=int, help="Memory limit in MB for data of single analytic. Default is no limit")
+@click.option('--checkpoint', 'checkpoint_file',
+              help="File recording completed pages. If run is interrupted, run with same file and time range resumes "
+                   "from completed pages. File is removed when report is generated")
+@click.option('--detail_days', type=int, default=engine.default_detail_days, show_default=True,
+              help="Number of most recent days collected with minute data. Older data are collected as hourly data. "
+                   "0 is collecting minute data for whole time range")
+@click.option('--save_raw', help="Save collected data into directory as raw files, which can be processed by offline command")
+@click.option('--columnar', is_flag=True, help="Save also a columnar sidecar of raw files, offline mode reads it without parsing CSV. Used with --save_raw")
+@click.option('--async_client', is_flag=True,
+              help="Fetch data using asyncio client with keep-alive connections instead of delphixpy and worker threads")
+@click.option('--sweep', is_flag=True,
+              help="Fetch all analytics in a single pass over time range. Each time window is fetched for all analytics "
+                   "together, so memory is bounded by few windows in flight. --parallel is shared by all analytics")
+@click.option('--network_per_nic', is_flag=True,
+              help="Collect network throughput of each network interface and add per interface graphs to report")
 @common_options
 @pass_config
-def online(config, dlpx_engine, username, password, start_time, end_time):
+def online(config, dlpx_engine, username, password, start_time, end_time, parallel, cache_dir, cache_size, no_cache, refresh,
+           max_memory, checkpoint_file, detail_days, save_raw, columnar, async_client, sweep, network_per_nic):
     """ 
     This command will generate online mode pydxanalyze report for cpu, network, nfs, iscsi, disk
     It expects a connection details to Delphix Engine.
+    Data fetched from engine are kept in a cache, so next report for overlapping
+    time range is fetching only missing data.
     """
 
+    if no_cache:
+        cache = None
+    else:
+        cache = pagecache.PageCache(cache_dir, cache_size * 1024 * 1024, refresh)
+
+    if max_memory is not None:
+        max_memory = max_memory * 1024 * 1024
+
+    if checkpoint_file is not None:
+        run_checkpoint = checkpoint.Checkpoint(checkpoint_file)
+        if len(run_checkpoint) > 0:
+            print_message("Resuming from checkpoint {} with {} completed pages".format(checkpoint_file, len(run_checkpoint)))
+    else:
+        run_checkpoint = None
+
     generate_report("online", config.out_directory, False, engine_ip=dlpx_engine, engine_user=username, engine_password=password,
-                    start_time=start_time, end_time=end_time)
+                    start_time=start_time, end_time=end_time, parallel=parallel, cache=cache, max_memory=max_memory,
+                    checkpoint=run_checkpoint, raw_files=get_raw_files(save_raw, columnar), detail_days=detail_days,
+                    async_client=async_client, sweep=sweep, network_per_nic=network_per_nic)
+
+
+@cli.command('fleet')
+@click.option('--engine_list', required=True,
+              help='dxtools.conf like JSON file with list of Delphix Engines')
+@click.option('--username','-u', help="Delphix Engine admin username for engines without username in engine list")
+@click.option('--password','-p', help="Delphix Engine admin password for engines without password in engine list")
+@click.option('--start_time', help="Start time for analytic data. Format YYYY-MM-DD HH24:MI:SS. If not specified a current time minus 7 days will be set")
+@click.option('--end_time', help="End time for analytic data. Format YYYY-MM-DD HH24:MI:SS. If not specified a current time will be used")
+@click.option('--fleet_parallel', type=int, default=fleet.default_fleet_parallel, show_default=True,
+              help="Number of Delphix Engines collected concurrently")
+@click.option('--parallel', type=int, default=engine.default_parallel, show_default=True,
+              help="Number of concurrent requests to Delphix Engine per analytic")
+@click.option('--cache_dir', default=pagecache.default_cache_dir, show_default=True,
+              help="Directory for a cache of analytic data fetched from Delphix Engine")
+@click.option('--cache_size', type=int, default=pagecache.default_cache_size // 1024 // 1024, show_default=True,
+              help="Max size of a cache in MB. Least recently used data are removed above it")
+@click.option('--no_cache', is_flag=True, help="Don't use a cache and fetch all data from Delphix Engine")
+@click.option('--refresh', is_flag=True, help="Fetch all data from Delphix Engine and refresh a cache")
+@click.option('--max_memory', type=int, help="Memory limit in MB for data of single analytic. Default is no limit")
+@click.option('--detail_days', type=int, default=engine.default_detail_days, show_default=True,
+              help="Number of most recent days collected with minute data. Older data are collected as hourly data. "
+                   "0 is collecting minute data for whole time range")
+@click.option('--save_raw', help="Save collected data into directory as raw files, which can be processed by offline command")
+@click.option('--columnar', is_flag=True, help="Save also a columnar sidecar of raw files, offline mode reads it without parsing CSV. Used with --save_raw")
+@click.option('--async_client', is_flag=True,
+              help="Fetch data using asyncio client with keep-alive connections instead of delphixpy and worker threads")
+@click.option('--sweep', is_flag=True,
+              help="Fetch all analytics in a single pass over time range. Each time window is fetched for all analytics "
+                   "together, so memory is bounded by few windows in flight. --parallel is shared by all analytics")
+@common_options
+@pass_config
+def fleet_report(config, engine_list, username, password, start_time, end_time, fleet_parallel, parallel, cache_dir,
+                 cache_size, no_cache, refresh, max_memory, detail_days, save_raw, columnar, async_client, sweep):
+    """
+    This command will generate online mode pydxanalyze report for each engine from engine list.
+    Data are collected from many engines concurrently and a report is generated
+    for each engine as soon as its data are collected.
+
+    \b
+    Engine list is using dxtools.conf format:
+    { "data": [ { "hostname": "engine1", "ip_address": "10.0.0.1",
+                  "username": "admin", "password": "password" } ] }
+    """
+
+    if no_cache:
+        cache = None
+    else:
+        cache = pagecache.PageCache(cache_dir, cache_size * 1024 * 1024, refresh)
+
+    if max_memory is not None:
+        max_memory = max_memory * 1024 * 1024
+
+    generate_fleet_report(config.out_directory, False, engine_list=engine_list, engine_user=username,
+                          engine_password=password, start_time=start_time, end_time=end_time,
+                          fleet_parallel=fleet_parallel, parallel=parallel, cache=cache, max_memory=max_memory,
+                          raw_files=get_raw_files(save_raw, columnar), detail_days=detail_days,
+                          async_client=async_client, sweep=sweep)
 
 
 
@@ -270,9 +504,16 @@ def online(config, dlpx_engine, username, password, start_time, end_time):
               help='Location of directory where dxanalytics data is downloaded')
 @click.option('--file_prefix', required=True,
               help='prefix of file (dlpx_engine_name used in dxtools.conf)')
+@click.option('--no_sidecar', is_flag=True,
+              help="Always parse raw files. By default parsed data are saved next to each raw file "
+                   "and next run with unchanged file is loading them without parsing")
+@click.option('--parallel', type=int, default=datafiles.default_file_parallel, show_default=True,
+              help="Number of raw files parsed concurrently by worker processes")
+@click.option('--start_time', help="Start time for analytic data. Format YYYY-MM-DD HH24:MI:SS. If not specified data from start of files are used")
+@click.option('--end_time', help="End time for analytic data. Format YYYY-MM-DD HH24:MI:SS. If not specified data up to end of files are used")
 @common_options
 @pass_config
-def offline(config, datadir, file_prefix):
+def offline(config, datadir, file_prefix, no_sidecar, parallel, start_time, end_time):
     """ 
     This command will generate offline mode pydxanalyze report for cpu, network, nfs, iscsi, disk. 
     It expects pre-generated dxanalytics datafiles in datadir location.
@@ -288,17 +529,32 @@ def offline(config, datadir, file_prefix):
     dx_get_analytics -d <dlpx_engine> -t cpu,network,iscsi,nfs,disk -outdir csv
     """
 
-    generate_report("offline", config.out_directory, config.syncy, analytic_directory=datadir, engine_name=file_prefix)
+    generate_report("offline", config.out_directory, config.syncy, analytic_directory=datadir, engine_name=file_prefix,
+                    sidecar=not no_sidecar, file_parallel=parallel, start_time=start_time, end_time=end_time)
 
 @cli.command()
 @click.option('--datadir', default="/process",
               help='Location of directory where dxanalytics data and throughput test is downloaded')
+@click.option('--engine_list',
+              help='dxtools.conf like JSON file with list of Delphix Engines. If specified, data are collected from engines')
+@click.option('--username','-u', help="Delphix Engine admin username for engines without username in engine list")
+@click.option('--password','-p', help="Delphix Engine admin password for engines without password in engine list")
+@click.option('--start_time', help="Start time for analytic data collected from engines. Format YYYY-MM-DD HH24:MI:SS. If not specified a current time minus 7 days will be set")
+@click.option('--end_time', help="End time for analytic data collected from engines. Format YYYY-MM-DD HH24:MI:SS. If not specified a current time will be used")
+@click.option('--resolution', type=click.Choice(["60", "3600"]), default=str(fleet.default_farm_resolution), show_default=True,
+              help="Resolution in seconds of analytic data collected from engines. It's used for whole time range")
+@click.option('--fleet_parallel', type=int, default=fleet.default_fleet_parallel, show_default=True,
+              help="Number of Delphix Engines collected concurrently")
+@click.option('--parallel', type=int, default=engine.default_parallel, show_default=True,
+              help="Number of concurrent requests to Delphix Engine per analytic")
 @common_options
 @pass_config
-def farmanalyze(config, datadir):
+def farmanalyze(config, datadir, engine_list, username, password, start_time, end_time, resolution, fleet_parallel, parallel):
     """ 
     This command will generate offline mode pyfarmanalyze report for cpu and network.
     It expects pre-generated dxanalytics datafiles in datadir location.
+    With engine_list, cpu and network data are collected directly from engines
+    and daily 85 percentile is calculated without exporting files.
 
     \b
     Following 2 Files from each engine is expected in same folder.
@@ -311,7 +567,9 @@ def farmanalyze(config, datadir):
 
     """
 
-    generate_report("farmanalyze", config.out_directory, config.syncy, analytic_directory=datadir)
+    generate_report("farmanalyze", config.out_directory, config.syncy, analytic_directory=datadir, engine_list=engine_list,
+                    engine_user=username, engine_password=password, start_time=start_time, end_time=end_time,
+                    resolution=int(resolution), fleet_parallel=fleet_parallel, parallel=parallel)
 
 
 if __name__ == "__main__":
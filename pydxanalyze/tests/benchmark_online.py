@@ -0,0 +1,138 @@
+"""
+Benchmark of online collection against local stand-in engine
+
+Stand-in engine is running in a separate process, so data generation is not competing
+with collection for interpreter. Each case is collecting all analytics for a time window
+ending at engine current time, like online command without start time
+
+Run from pydxanalyze directory
+    python -m tests.benchmark_online --resolution 60 --days 1 --days 7
+"""
+
+import http.client
+import json
+import logging
+import multiprocessing
+import time
+from datetime import datetime, timedelta
+
+import click
+
+import dxanalyze.dxdata.httppool as httppool
+from dxanalyze.dxdata.engine import AsyncEngineSession
+from dxanalyze.dxdata.engine import EngineSession
+from dxanalyze.dxdata.engine import default_parallel
+from tests.engine_server import EngineServer
+
+default_benchmark_resolutions = [1, 60]
+default_benchmark_days = [1, 7, 30]
+
+
+def serve(queue, options):
+    """
+    Run stand-in engine and send its address to parent process
+    :param1 queue: multiprocessing queue for server address
+    :param2 options: dict of EngineServer options
+    """
+    server = EngineServer(**options)
+    queue.put(server.address)
+    server.serve_forever()
+
+
+def server_stats(address):
+    """
+    Get request counters of stand-in engine
+    :param1 address: server address in host:port format
+    return: dict with number of requests per endpoint and number of sent bytes
+    """
+    conn = http.client.HTTPConnection(address)
+    conn.request("GET", "/standin/stats")
+    stats = json.loads(conn.getresponse().read())
+    conn.close()
+    return stats
+
+
+def run_case(address, resolution, days, parallel, detail_days, async_client=False):
+    """
+    Collect all analytics from stand-in engine for a time window
+    :param1 address: server address in host:port format
+    :param2 resolution: data resolution
+    :param3 days: length of time window in days
+    :param4 parallel: number of pages fetched concurrently per analytic
+    :param5 detail_days: number of most recent days fetched with requested resolution
+    :param6 async_client: if True, asyncio client is used instead of delphixpy
+    return: dict with case parameters and measured values
+    """
+    if async_client:
+        session = AsyncEngineSession(address, "admin", "delphix")
+    else:
+        session = EngineSession(address, "admin", "delphix")
+    session.connect()
+    end = datetime.strptime(session.current_time, "%Y-%m-%d %H:%M:%S")
+    start_time = str(end - timedelta(days=days))
+
+    before = server_stats(address)
+    start = time.perf_counter()
+    collected = list(session.collect_analytics(session.get_available_analytics(), start_time, session.current_time,
+                                               resolution=resolution, parallel=parallel, detail_days=detail_days))
+    elapsed = time.perf_counter() - start
+    after = server_stats(address)
+
+    sent_bytes = after["sentBytes"] - before["sentBytes"]
+    result = {
+        "resolution": resolution,
+        "days": days,
+        "analytics": len(collected),
+        "requests": after["requests"].get("getData", 0) - before["requests"].get("getData", 0),
+        "megabytes": round(sent_bytes / 1024 / 1024, 1),
+        "seconds": round(elapsed, 2),
+        "megabytesPerSecond": round(sent_bytes / 1024 / 1024 / elapsed, 1)
+    }
+    if async_client:
+        session.close()
+    return result
+
+
+@click.command()
+@click.option('--resolution', type=int, multiple=True, help='Data resolution, default are 1 and 60 seconds')
+@click.option('--days', type=int, multiple=True, help='Length of time window, default are 1, 7 and 30 days')
+@click.option('--parallel', default=default_parallel, type=int, help='Number of pages fetched concurrently')
+@click.option('--detail_days', default=0, type=int,
+              help='Number of most recent days fetched with requested resolution, 0 is whole window')
+@click.option('--nics', default=2, type=int, help='Number of network interfaces of stand-in engine')
+@click.option('--latency', default=0.0, type=float, help='Delay of each getData response in seconds')
+@click.option('--max_points', default=None, type=int, help='Max datapoints per stream before engine reports overflow')
+@click.option('--no_compression', is_flag=True, help="Don't request compressed responses")
+@click.option('--async_client', is_flag=True, help='Use asyncio client instead of delphixpy')
+@click.option('--output', default=None, help='Write results into JSON file')
+def main(resolution, days, parallel, detail_days, nics, latency, max_points, no_compression, async_client, output):
+    logging.basicConfig(level=logging.WARNING)
+    httppool.compressed_transfer = not no_compression
+    options = { "address": ("127.0.0.1", 0), "nics": nics, "latency": latency, "max_points": max_points }
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(queue, options), daemon=True)
+    process.start()
+    address = queue.get()
+
+    results = []
+    try:
+        print("{:>10} {:>5} {:>9} {:>9} {:>9} {:>9}".format("resolution", "days", "requests", "MB", "seconds", "MB/s"))
+        for r in resolution or default_benchmark_resolutions:
+            for d in days or default_benchmark_days:
+                result = run_case(address, r, d, parallel, detail_days, async_client)
+                results.append(result)
+                print("{resolution:>10} {days:>5} {requests:>9} {megabytes:>9} {seconds:>9} "
+                      "{megabytesPerSecond:>9}".format(**result))
+    finally:
+        process.terminate()
+        process.join()
+
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump({ "parallel": parallel, "detail_days": detail_days, "nics": nics, "latency": latency,
+                        "max_points": max_points, "compression": not no_compression,
+                        "async_client": async_client, "results": results }, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
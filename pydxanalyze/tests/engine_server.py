@@ -0,0 +1,389 @@
+"""
+Local stand-in for Delphix Engine analytics API
+
+Serves endpoints used by EngineSession - session, login, service/time, system,
+analytics list and getData - with synthetic cpu, network and IO datapoint streams,
+so online collection can be tested and measured without a real engine
+
+Run it standalone with
+    python -m tests.engine_server --port 8080 --nics 4 --latency 0.05
+"""
+
+import calendar
+import gzip
+import json
+import threading
+import time
+import uuid
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import click
+import numpy
+
+# analytics served by default, like on engine with all default slices
+default_analytics = ["cpu", "network", "disk", "nfs", "iscsi"]
+# resolutions kept by engine, coarser resolution is returned if requested one is not kept
+default_resolutions = [1, 60, 3600]
+# latency histogram buckets of IO datapoints, as bucket name and share of operations
+latency_buckets = [("< 10000", 0.1), ("10000", 0.4), ("20000", 0.25), ("30000", 0.15),
+                   ("40000", 0.06), ("50000", 0.03), ("100000", 0.01)]
+# IO operations of each IO analytic
+io_ops = ["read", "write"]
+
+api_prefix = "/resources/json/delphix"
+
+
+def ok_result(result):
+    return { "type": "OKResult", "status": "OK", "result": result, "job": None, "action": None }
+
+
+def error_result(details, error_id):
+    return { "type": "ErrorResult", "status": "ERROR",
+             "error": { "type": "APIError", "details": details, "id": error_id, "action": None } }
+
+
+def to_epoch(timestamp):
+    return calendar.timegm(time.strptime(timestamp[:19], "%Y-%m-%dT%H:%M:%S"))
+
+
+def iso_timestamps(seconds):
+    """
+    Format epoch seconds as ISO timestamps in UTC used by engine
+    :param1 seconds: array of epoch seconds
+    return: list of timestamps
+    """
+    return [ t + ".000Z" for t in numpy.datetime_as_string(seconds.astype("datetime64[s]")).tolist() ]
+
+
+def wave(seconds, period, phase=0.0):
+    """
+    Smooth daily like load pattern between 0 and 1
+    :param1 seconds: array of epoch seconds
+    :param2 period: pattern period in seconds
+    :param3 phase: pattern shift as part of period
+    return: array of values
+    """
+    return 0.5 + 0.5 * numpy.sin(2 * numpy.pi * (seconds / period + phase))
+
+
+class EngineServer(ThreadingHTTPServer):
+    """
+    HTTP server emulating analytics API of a single engine
+    Data are generated from timestamps, so same request is always returning same data
+    requests: number of requests per endpoint
+    sent_bytes: number of response bytes sent
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), username="admin", password="delphix", hostname="standin-engine",
+                 time_zone="UTC", current_time="2019-07-22T12:00:00.000Z", analytics=None, resolutions=None,
+                 nics=2, latency=0.0, max_points=None, failing_requests=None, failure_status=None, compression=True):
+        """
+        :param1 address: touple of host and port, port 0 is using a free port
+        :param2 username: username accepted by login
+        :param3 password: password accepted by login
+        :param4 hostname: engine name returned by system
+        :param5 time_zone: engine time zone
+        :param6 current_time: engine current time in ISO format in UTC, there are no data after it
+        :param7 analytics: list of analytic names served, default are all analytics
+        :param8 resolutions: list of resolutions kept by engine
+        :param9 nics: number of network interfaces
+        :param10 latency: delay of each getData response in seconds
+        :param11 max_points: max number of datapoints per stream in one response.
+                             If there is more datapoints, only first max_points are returned with overflow flag
+        :param12 failing_requests: numbers of getData requests which fail, first request is 1
+        :param13 failure_status: HTTP status of failing requests, None is closing connection without response
+        :param14 compression: if True, responses are gzip compressed for clients accepting it
+        """
+        super().__init__(address, EngineRequestHandler)
+        self.username = username
+        self.password = password
+        self.hostname = hostname
+        self.time_zone = time_zone
+        self.current_time = current_time
+        self.current_epoch = to_epoch(current_time)
+        self.analytics = { "ANALYTICS_STATISTIC_SLICE-{}".format(i + 1): name
+                           for (i, name) in enumerate(analytics or default_analytics) }
+        self.resolutions = sorted(resolutions or default_resolutions)
+        self.nics = nics
+        self.latency = latency
+        self.max_points = max_points
+        self.failing_requests = set(failing_requests or [])
+        self.failure_status = failure_status
+        self.compression = compression
+        self.data_requests = 0
+        self.sessions = set()
+        self.logged_in = set()
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.sent_bytes = 0
+        self.thread = None
+
+    @property
+    def address(self):
+        """
+        Address of server in host:port format used by DelphixEngine
+        """
+        return "{}:{}".format(*self.server_address[:2])
+
+    def start(self):
+        """
+        Serve requests in background thread
+        return: self
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving requests and close server socket
+        """
+        self.shutdown()
+        self.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def count_request(self, endpoint, size):
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+            self.sent_bytes += size
+
+    def next_request_fails(self):
+        """
+        Count getData request and check if it should fail
+        return: True if request fails
+        """
+        with self.lock:
+            self.data_requests += 1
+            return self.data_requests in self.failing_requests
+
+    def stats(self):
+        """
+        return: dict with number of requests per endpoint and number of sent bytes
+        """
+        with self.lock:
+            return { "requests": dict(self.requests), "sentBytes": self.sent_bytes }
+
+    def served_resolution(self, resolution):
+        """
+        Return resolution of returned data - requested one or next coarser resolution kept by engine
+        """
+        for r in self.resolutions:
+            if r >= resolution:
+                return r
+        return self.resolutions[-1]
+
+    def get_data(self, ref, query):
+        """
+        Generate DatapointSet for getData request
+        :param1 ref: analytic reference
+        :param2 query: dict with startTime, endTime and resolution
+        return: DatapointSet dict
+        """
+        analytic_name = self.analytics[ref]
+        resolution = self.served_resolution(int(query.get("resolution", 60)))
+        end = self.current_epoch
+        if "endTime" in query:
+            end = min(end, to_epoch(query["endTime"]))
+        if "startTime" in query:
+            start = to_epoch(query["startTime"])
+        else:
+            start = end - resolution * 3600
+
+        # datapoints are aligned to resolution, end time is not included
+        first = -(-start // resolution) * resolution
+        seconds = numpy.arange(first, end, resolution, dtype=numpy.int64)
+        overflow = self.max_points is not None and len(seconds) > self.max_points
+        if overflow:
+            seconds = seconds[:self.max_points]
+
+        if analytic_name == "cpu":
+            streams = [ cpu_stream(seconds) ]
+        elif analytic_name == "network":
+            streams = [ network_stream(seconds, nic) for nic in range(self.nics) ]
+        else:
+            streams = [ io_stream(seconds, op, resolution) for op in io_ops ]
+
+        return { "type": "DatapointSet", "resolution": resolution, "overflow": overflow,
+                 "datapointStreams": streams }
+
+
+def cpu_stream(seconds):
+    util = 0.1 + 0.7 * wave(seconds, 86400)
+    user = (util * 700).astype(numpy.int64)
+    kernel = (util * 300).astype(numpy.int64)
+    idle = 1000 - user - kernel
+    return {
+        "type": "CpuUtilDatapointStream",
+        "datapoints": [ { "type": "CpuUtilDatapoint", "timestamp": t, "idle": i, "user": u,
+                          "kernel": k }
+                        for (t, i, u, k) in zip(iso_timestamps(seconds), idle.tolist(), user.tolist(), kernel.tolist()) ]
+    }
+
+
+def network_stream(seconds, nic):
+    load = wave(seconds, 86400, nic * 0.1)
+    in_bytes = (load * 50e6 + 1e5).astype(numpy.int64)
+    out_bytes = (load * 20e6 + 1e5).astype(numpy.int64)
+    return {
+        "type": "NetworkInterfaceUtilDatapointStream",
+        "networkInterface": "vmxnet3s{}".format(nic),
+        "datapoints": [ { "type": "NetworkInterfaceUtilDatapoint", "timestamp": t, "inBytes": i,
+                          "outBytes": o, "inPackets": i // 1500, "outPackets": o // 1500 }
+                        for (t, i, o) in zip(iso_timestamps(seconds), in_bytes.tolist(), out_bytes.tolist()) ]
+    }
+
+
+def io_stream(seconds, op, resolution):
+    # count and throughput are rates per second, latency histogram has all operations of datapoint interval
+    load = wave(seconds, 86400, 0.25 if op == "write" else 0.0)
+    count = (load * 500 + 1).astype(numpy.int64)
+    throughput = count * 8192
+    datapoints = []
+    for (t, c, tp) in zip(iso_timestamps(seconds), count.tolist(), throughput.tolist()):
+        latency = { name: str(int(c * resolution * share)) for (name, share) in latency_buckets
+                    if int(c * resolution * share) > 0 }
+        datapoints.append({ "type": "IoOpsDatapoint", "timestamp": t, "count": c, "throughput": tp,
+                            "latency": latency, "avgLatency": 18000, "size": None })
+    return { "type": "IoOpsDatapointStream", "op": op, "datapoints": datapoints }
+
+
+class EngineRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handler of engine API requests. Only requests of logged in session are allowed
+    except session and login requests
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, endpoint, status, response, cookie=None):
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if self.server.compression and "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body, compresslevel=6)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        if cookie is not None:
+            self.send_header("Set-Cookie", "JSESSIONID={}; Path=/; HttpOnly".format(cookie))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count_request(endpoint, len(body))
+
+    def session_id(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        return cookie["JSESSIONID"].value if "JSESSIONID" in cookie else None
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length == 0:
+            return {}
+        return json.loads(self.rfile.read(length))
+
+    def do_POST(self):
+        server = self.server
+        path = urlsplit(self.path).path
+        data = self.read_body()
+
+        if path == api_prefix + "/session":
+            session_id = uuid.uuid4().hex
+            with server.lock:
+                server.sessions.add(session_id)
+            self.send_json("session", 200, ok_result(data), cookie=session_id)
+        elif path == api_prefix + "/login":
+            session_id = self.session_id()
+            if session_id not in server.sessions:
+                self.send_json("login", 403, error_result("Session is not created", "exception.webservices.session.required"))
+            elif data.get("username") != server.username or data.get("password") != server.password:
+                self.send_json("login", 401, error_result("Invalid username or password",
+                                                          "exception.webservices.login.failed"))
+            else:
+                with server.lock:
+                    server.logged_in.add(session_id)
+                self.send_json("login", 200, ok_result("USER-2"))
+        else:
+            self.send_json("unknown", 404, error_result("Unknown URL {}".format(path), "exception.webservices.notfound"))
+
+    def do_GET(self):
+        server = self.server
+        url = urlsplit(self.path)
+        path = url.path
+
+        if path == "/standin/stats":
+            self.send_json("stats", 200, server.stats())
+            return
+
+        if self.session_id() not in server.logged_in:
+            self.send_json("unauthorized", 401, error_result("Login required", "exception.webservices.login.required"))
+            return
+
+        if path == api_prefix + "/service/time":
+            self.send_json("time", 200, ok_result({ "type": "TimeConfig", "systemTimeZone": server.time_zone,
+                                                    "currentTime": server.current_time }))
+        elif path == api_prefix + "/system":
+            self.send_json("system", 200, ok_result({ "type": "SystemInfo", "hostname": server.hostname }))
+        elif path == api_prefix + "/analytics":
+            slices = [ { "type": "StatisticSlice", "name": "default.{}".format(name), "reference": ref }
+                       for (ref, name) in server.analytics.items() ]
+            self.send_json("analytics", 200, ok_result(slices))
+        elif path.startswith(api_prefix + "/analytics/") and path.endswith("/getData"):
+            ref = path[len(api_prefix + "/analytics/"):-len("/getData")]
+            if ref not in server.analytics:
+                self.send_json("getData", 404, error_result("Object {} not found".format(ref),
+                                                             "exception.webservices.object.notfound"))
+                return
+            query = { k: v[0] for (k, v) in parse_qs(url.query).items() }
+            if server.latency:
+                time.sleep(server.latency)
+            if server.next_request_fails():
+                if server.failure_status is None:
+                    # like dropped VPN connection
+                    self.close_connection = True
+                    server.count_request("failed", 0)
+                else:
+                    self.send_json("failed", server.failure_status, error_result("Service unavailable",
+                                                                                 "exception.webservices.unavailable"))
+                return
+            self.send_json("getData", 200, ok_result(server.get_data(ref, query)))
+        else:
+            self.send_json("unknown", 404, error_result("Unknown URL {}".format(path), "exception.webservices.notfound"))
+
+
+@click.command()
+@click.option('--host', default="127.0.0.1", help='Address to listen on')
+@click.option('--port', default=8080, type=int, help='Port to listen on')
+@click.option('--username', default="admin", help='Username accepted by login')
+@click.option('--password', default="delphix", help='Password accepted by login')
+@click.option('--time_zone', default="UTC", help='Engine time zone')
+@click.option('--current_time', default="2019-07-22T12:00:00.000Z", help='Engine current time in ISO format in UTC')
+@click.option('--nics', default=2, type=int, help='Number of network interfaces')
+@click.option('--latency', default=0.0, type=float, help='Delay of each getData response in seconds')
+@click.option('--max_points', default=None, type=int, help='Max datapoints per stream before engine reports overflow')
+@click.option('--no_compression', is_flag=True, help="Don't compress responses")
+def main(host, port, username, password, time_zone, current_time, nics, latency, max_points, no_compression):
+    server = EngineServer((host, port), username=username, password=password, time_zone=time_zone,
+                          current_time=current_time, nics=nics, latency=latency, max_points=max_points,
+                          compression=not no_compression)
+    print("Stand-in engine listening on {}".format(server.address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import numpy
+import pandas
+from pandas.testing import assert_frame_equal
+from unittest import TestCase
+from unittest import main
+from dxanalyze.dxdata.accumulator import ColumnAccumulator
+from dxanalyze.dxdata.histogram import LatencyHistograms
+
+
+class Test_accumulator(TestCase):
+    def test_to_dataframe(self):
+        page1 = pandas.DataFrame({
+            "#timestamp": [ "2019-07-22 14:55:00", "2019-07-22 14:56:00" ],
+            "util": [ 25.81, 26.29 ]
+        })
+        page2 = pandas.DataFrame({
+            "#timestamp": [ "2019-07-22 14:57:00" ],
+            "util": [ 24.89 ]
+        })
+        accumulator = ColumnAccumulator()
+        self.assertTrue(accumulator.empty)
+        accumulator.add(page1)
+        accumulator.add(None)
+        accumulator.add(pandas.DataFrame())
+        accumulator.add(page2)
+        self.assertFalse(accumulator.empty)
+        assert_frame_equal(accumulator.to_dataframe(), pandas.concat([page1, page2], ignore_index=True))
+
+    def test_histograms(self):
+        pages = []
+        for counts in [ [[ 1, 0 ], [ 0, 2 ]], [[ 3, 1 ]] ]:
+            page = pandas.DataFrame({ "ops_read": [ sum(c) for c in counts ] })
+            page.attrs["histograms"] = { "read": LatencyHistograms.from_matrix(numpy.array([10000.0, 100000.0]),
+                                                                               numpy.array(counts)) }
+            pages.append(page)
+        accumulator = ColumnAccumulator()
+        for page in pages:
+            accumulator.add(page)
+        histograms = accumulator.to_dataframe().attrs["histograms"]
+        numpy.testing.assert_array_equal(histograms["read"].percentile(50), [0.02, 0.15, 0.02])
+
+        # histograms are dropped if a page is without them
+        accumulator.add(pandas.DataFrame({ "ops_read": [ 0 ] }))
+        self.assertNotIn("histograms", accumulator.to_dataframe().attrs)
+
+    def test_max_memory(self):
+        page = pandas.DataFrame({ "util": range(1000) })
+        accumulator = ColumnAccumulator(max_memory=10000)
+        accumulator.add(page)
+        with self.assertRaises(MemoryError):
+            accumulator.add(page)
+
+if __name__ == '__main__':
+    main()
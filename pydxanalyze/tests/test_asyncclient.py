@@ -0,0 +1,161 @@
+import asyncio
+import time
+from unittest import TestCase
+from unittest import main
+from unittest import mock
+from engine_server import EngineServer
+from pandas.testing import assert_frame_equal
+import dxanalyze.dxdata.engine as engine
+from dxanalyze.dxdata.asyncclient import AsyncEngineClient
+from dxanalyze.dxdata.asyncclient import ConnectionPool
+from dxanalyze.dxdata.asyncclient import EventLoopThread
+from dxanalyze.dxdata.engine import AsyncEngineSession
+from dxanalyze.dxdata.engine import EngineSession
+from dxanalyze.dxdata.fleet import collect_fleet
+from test_online import assert_stats_equal
+
+
+class Test_asyncclient(TestCase):
+
+    def test_client(self):
+        async def client_calls(address):
+            pool = ConnectionPool()
+            client = AsyncEngineClient(address, "admin", "delphix", pool)
+            await client.login()
+            timeobj = await client.get_time()
+            analytics = await client.get_analytics()
+            data = await client.get_data("ANALYTICS_STATISTIC_SLICE-1", 60, "2019-07-22T10:00:00.000Z",
+                                         "2019-07-22T11:00:00.000Z")
+            client.close()
+            return (timeobj, analytics, data, client.stats)
+
+        with EngineServer(time_zone="Europe/Dublin") as server:
+            (timeobj, analytics, data, stats) = asyncio.run(client_calls(server.address))
+            self.assertEqual(timeobj["systemTimeZone"], "Europe/Dublin")
+            self.assertEqual(analytics[0]["name"], "default.cpu")
+            self.assertEqual(data.resolution, 60)
+            self.assertEqual(len(data.datapoint_streams[0]["datapoints"]["timestamp"]), 60)
+            # all sequential requests are using one keep-alive connection
+            self.assertEqual(stats.requests, 5)
+            self.assertEqual(stats.connections, 1)
+
+    def test_cancelled_request(self):
+        async def cancelled_request(address):
+            pool = ConnectionPool(max_connections=1)
+            client = AsyncEngineClient(address, "admin", "delphix", pool)
+            await client.login()
+            task = asyncio.ensure_future(client.get_data("ANALYTICS_STATISTIC_SLICE-1", 60, "2019-07-22T10:00:00.000Z",
+                                                         "2019-07-22T11:00:00.000Z"))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # connection of cancelled request is closed and its slot is returned to pool
+            data = await asyncio.wait_for(client.get_data("ANALYTICS_STATISTIC_SLICE-1", 60, "2019-07-22T10:00:00.000Z",
+                                                          "2019-07-22T11:00:00.000Z"), 5)
+            client.close()
+            return (data, client.stats)
+
+        with EngineServer(latency=1.0) as server:
+            (data, stats) = asyncio.run(cancelled_request(server.address))
+            self.assertEqual(len(data.datapoint_streams[0]["datapoints"]["timestamp"]), 60)
+            self.assertEqual(stats.connections, 2)
+
+    def test_iterate(self):
+        produced = []
+        async def items():
+            for i in range(3):
+                await asyncio.sleep(0.1)
+                produced.append(i)
+                yield i
+
+        runner = EventLoopThread()
+        iterator = runner.iterate(items())
+        self.assertEqual(next(iterator), 0)
+        # next item is produced while caller is processing previous one
+        time.sleep(0.5)
+        self.assertListEqual(produced, [0, 1])
+        self.assertListEqual(list(iterator), [1, 2])
+        runner.close()
+
+    def test_wrong_password(self):
+        with EngineServer() as server:
+            session = AsyncEngineSession(server.address, "admin", "wrong")
+            with self.assertRaises(SystemExit):
+                session.connect()
+            session.close()
+
+    def test_collect_analytics(self):
+        with EngineServer(hostname="engine1", time_zone="Europe/Dublin") as server:
+            session = EngineSession(server.address, "admin", "delphix")
+            session.connect()
+            expected = session.collect_dataframe("nfs", "2019-07-22 08:00:00", "2019-07-22 11:00:00", 1)
+
+            async_session = AsyncEngineSession(server.address, "admin", "delphix")
+            async_session.connect()
+            self.assertEqual(async_session.engine_name, "engine1")
+            self.assertEqual(async_session.current_time, session.current_time)
+            nfs = async_session.collect_dataframe("nfs", "2019-07-22 08:00:00", "2019-07-22 11:00:00", 1)
+            assert_frame_equal(nfs, expected)
+
+            collected = dict(async_session.collect_analytics(async_session.get_available_analytics(),
+                                                             "2019-07-22 08:00:00", "2019-07-22 11:00:00", 60))
+            self.assertListEqual(sorted(collected), ["cpu", "disk", "iscsi", "network", "nfs"])
+            self.assertIn("latency", [ list(s.keys())[0] for s in collected["nfs"] ])
+            # requests of all analytics are using few keep-alive connections
+            stats = async_session.client.stats
+            self.assertLessEqual(stats.connections, async_session.client.max_requests)
+            self.assertLess(stats.connections, stats.requests)
+            async_session.close()
+
+    def test_sweep(self):
+        with EngineServer() as server:
+            session = EngineSession(server.address, "admin", "delphix")
+            session.connect()
+            analytic_list = session.get_available_analytics()
+            expected = dict(session.collect_analytics(analytic_list, "2019-07-22 08:00:00", "2019-07-22 11:00:00", 1))
+            requests = server.stats()["requests"]["getData"]
+
+            async_session = AsyncEngineSession(server.address, "admin", "delphix")
+            async_session.connect()
+            swept = dict(async_session.sweep_analytics(analytic_list, "2019-07-22 08:00:00", "2019-07-22 11:00:00", 1))
+            assert_stats_equal(self, swept, expected)
+            self.assertEqual(server.stats()["requests"]["getData"] - requests, 3 * len(analytic_list))
+            async_session.close()
+
+    @mock.patch.object(engine, 'retry_delay', 0)
+    def test_retry(self):
+        for failure_status in [None, 401, 503]:
+            with EngineServer(failing_requests=[1, 2], failure_status=failure_status) as server:
+                session = AsyncEngineSession(server.address, "admin", "delphix")
+                session.connect()
+                cpu = session.collect_dataframe("cpu", "2019-07-22 09:00:00", "2019-07-22 11:00:00", 1, parallel=1)
+                self.assertEqual(len(cpu), 7200)
+                self.assertEqual(server.stats()["requests"]["getData"], 2)
+                session.close()
+
+    @mock.patch.object(engine, 'retry_delay', 0)
+    @mock.patch.object(engine, 'page_retries', 1)
+    def test_failed_page(self):
+        with EngineServer(failing_requests=range(1, 10), failure_status=503) as server:
+            session = AsyncEngineSession(server.address, "admin", "delphix")
+            session.connect()
+            with self.assertRaises(SystemExit):
+                session.collect_dataframe("cpu", "2019-07-22 09:00:00", "2019-07-22 11:00:00", 1)
+            session.close()
+
+    def test_fleet(self):
+        with EngineServer(hostname="engine1") as server1, EngineServer(hostname="engine2") as server2:
+            engine_list = [(server1.address, "admin", "delphix"), (server2.address, "admin", "wrong")]
+            collected = { address: (session, stats) for (address, session, stats)
+                          in collect_fleet(engine_list, "2019-07-22 08:00:00", "2019-07-22 11:00:00",
+                                           async_client=True) }
+            (session, stats) = collected[server1.address]
+            self.assertEqual(session.engine_name, "engine1")
+            self.assertListEqual(sorted([ name for (name, _) in stats ]), ["cpu", "disk", "iscsi", "network", "nfs"])
+            # failed login is not stopping collection from other engines
+            self.assertEqual(collected[server2.address], (None, None))
+
+
+if __name__ == '__main__':
+    main()
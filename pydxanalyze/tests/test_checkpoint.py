@@ -0,0 +1,67 @@
+import os
+import numpy
+import pandas
+from os.path import join
+from tempfile import TemporaryDirectory
+from pandas.testing import assert_frame_equal
+from unittest import TestCase
+from unittest import main
+from dxanalyze.dxdata.checkpoint import Checkpoint
+from dxanalyze.dxdata.histogram import LatencyHistograms
+
+
+class Test_checkpoint(TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.file_name = join(self.tempdir.name, "checkpoint")
+        self.key = ("engine1", "ANALYTICS_STATISTIC_SLICE-1", 1, "2019-07-22T13:00:00.000Z", "2019-07-22T14:00:00.000Z")
+        self.page = pandas.DataFrame({
+            "#timestamp": [ "2019-07-22 14:55:00", "2019-07-22 14:56:00" ],
+            "util": [ 10.5, 20.0 ]
+        })
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_store_load(self):
+        checkpoint = Checkpoint(self.file_name)
+        self.assertIsNone(checkpoint.load("cpu", self.key))
+        checkpoint.store("cpu", self.key, self.page)
+        assert_frame_equal(checkpoint.load("cpu", self.key), self.page)
+        self.assertIsNone(checkpoint.load("network", self.key))
+
+        # completed pages are loaded by next run
+        checkpoint = Checkpoint(self.file_name)
+        self.assertEqual(len(checkpoint), 1)
+        assert_frame_equal(checkpoint.load("cpu", self.key), self.page)
+
+    def test_histograms(self):
+        checkpoint = Checkpoint(self.file_name)
+        self.page.attrs["histograms"] = { "write": LatencyHistograms.from_matrix(numpy.array([1000.0, 100000.0]),
+                                                                                 numpy.array([[ 1, 1 ], [ 2, 0 ]])) }
+        checkpoint.store("nfs", self.key, self.page)
+        # histograms of completed pages are loaded by next run
+        page = Checkpoint(self.file_name).load("nfs", self.key)
+        numpy.testing.assert_array_equal(page.attrs["histograms"]["write"].percentile(99), [0.15, 0.0])
+
+    def test_interrupted_write(self):
+        checkpoint = Checkpoint(self.file_name)
+        checkpoint.store("cpu", self.key, self.page)
+        with open(self.file_name, "a") as f:
+            f.write('{"analytic": "cpu", "key": ["engine1", "ANALY')
+
+        checkpoint = Checkpoint(self.file_name)
+        self.assertEqual(len(checkpoint), 1)
+        self.assertIsNotNone(checkpoint.load("cpu", self.key))
+
+    def test_remove(self):
+        checkpoint = Checkpoint(self.file_name)
+        checkpoint.store("cpu", self.key, self.page)
+        checkpoint.remove()
+        self.assertFalse(os.path.exists(self.file_name))
+        self.assertFalse(os.path.exists(self.file_name + ".pages"))
+        self.assertEqual(len(Checkpoint(self.file_name)), 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,22 @@
+import gzip
+import lzma
 import pandas
+import shutil
 from os.path import join
+from os.path import isdir
+from tempfile import TemporaryDirectory
 from unittest import TestCase
 from unittest import main
 from dxanalyze.dxdata.datafiles import process_file
 from dxanalyze.dxdata.datafiles import create_dataframes
 from dxanalyze.dxdata.datafiles import files_mapping
 from dxanalyze.dxdata.datafiles import detect_files
+from dxanalyze.dxdata.datafiles import process_files
+import dxanalyze.dxdata.rawreader as rawreader
+from dxanalyze.dxdata.rawreader import load_raw_file
+from dxanalyze.dxdata.rawreader import read_raw_file
+from dxanalyze.dxdata.rawreader import read_sidecar
+from dxanalyze.dxdata.rawreader import sidecar_name
 from pandas.util.testing import assert_frame_equal
 
 class Test_datafile(TestCase):
@@ -15,9 +26,113 @@ class Test_datafile(TestCase):
 
     def test_process_file(self):
         files_mapping = {"cpu": join("tests","test-analytics-cpu-raw.csv")}
-        stat = process_file("cpu", files_mapping)
+        stat = process_file("cpu", files_mapping, sidecar=False)
         self.assertListEqual(list(stat[0].keys()), ["utilization"])
 
+    def test_read_raw_file(self):
+        cpu = read_raw_file(join("tests","test-analytics-cpu-raw.csv"), "cpu")
+        # columns not used by statistics are not read
+        self.assertListEqual(list(cpu.columns), ["#timestamp", "util"])
+        self.assertEqual(str(cpu["#timestamp"].dtype), "datetime64[ns]")
+        self.assertEqual(cpu["#timestamp"].iloc[0], pandas.Timestamp("2019-03-20 11:55:00"))
+
+        disk = read_raw_file(join("tests","test-analytics-disk-raw.csv"), "disk")
+        self.assertNotIn("total_throughput", disk.columns)
+        self.assertNotIn("total_ops", disk.columns)
+        self.assertEqual(str(disk["ops_read"].dtype), "float64")
+        # file read in small chunks is same as file read at once
+        assert_frame_equal(read_raw_file(join("tests","test-analytics-disk-raw.csv"), "disk", chunk_rows=1000), disk)
+
+        stat = process_file("disk", {"disk": join("tests","test-analytics-disk-raw.csv")}, sidecar=False)
+        self.assertListEqual([ list(s.keys())[0] for s in stat ], ["throughput", "ops", "latency"])
+
+    def test_sidecar(self):
+        with TemporaryDirectory() as tempdir:
+            file_name = join(tempdir, "test-analytics-disk-raw.csv")
+            shutil.copy(join("tests","test-analytics-disk-raw.csv"), file_name)
+            self.assertIsNone(read_sidecar(file_name, "disk"))
+            disk = load_raw_file(file_name, "disk")
+            self.assertTrue(isdir(sidecar_name(file_name)))
+
+            # next read is memory-mapping sidecar
+            cached = read_sidecar(file_name, "disk")
+            assert_frame_equal(cached, disk)
+            self.assertIsNone(read_sidecar(file_name, "nfs"))
+            # dataframe can be changed without changing sidecar
+            cached.loc[:, "read_throughput"] = cached.loc[:, "read_throughput"] * 2
+            assert_frame_equal(load_raw_file(file_name, "disk"), disk)
+
+            # sidecar is not used when raw file was changed
+            with open(file_name, "a") as f:
+                f.write("2019-03-20 12:01:00,1,2,3,4,5,6,7,8\n")
+            self.assertIsNone(read_sidecar(file_name, "disk"))
+            self.assertEqual(len(load_raw_file(file_name, "disk")), len(disk) + 1)
+            self.assertEqual(len(read_sidecar(file_name, "disk")), len(disk) + 1)
+
+            # sidecar directory is not detected as raw file
+            detect_files(tempdir, "test")
+            self.assertEqual(files_mapping["disk"], file_name)
+
+    def test_process_files(self):
+        with TemporaryDirectory() as tempdir:
+            mapping = {}
+            for analytic_name in ["cpu", "disk"]:
+                mapping[analytic_name] = join(tempdir, "test-analytics-{}-raw.csv".format(analytic_name))
+                shutil.copy(join("tests","test-analytics-{}-raw.csv".format(analytic_name)), mapping[analytic_name])
+            expected = { a: process_file(a, mapping, sidecar=False) for a in mapping }
+
+            # files parsed by worker processes are sent as columns or loaded from sidecars
+            for sidecar in [False, True, True]:
+                collected = dict(process_files(["cpu", "disk"], mapping, sidecar, parallel=2))
+                self.assertListEqual(sorted(collected), ["cpu", "disk"])
+                for analytic_name in mapping:
+                    for (stat, expected_stat) in zip(collected[analytic_name], expected[analytic_name]):
+                        for (name, series) in expected_stat.items():
+                            for key in series:
+                                assert_frame_equal(stat[name][key], series[key])
+                self.assertEqual(isdir(sidecar_name(mapping["cpu"])), sidecar)
+
+            with open(mapping["disk"], "a") as f:
+                f.write("2019-03-20 12:01:00,x,2,3,4,5,6,7,8\n")
+            with self.assertRaises(SystemExit):
+                list(process_files(["cpu", "disk"], mapping, parallel=2))
+
+    def test_compressed_files(self):
+        with TemporaryDirectory() as tempdir:
+            source = join("tests","test-analytics-disk-raw.csv")
+            expected = read_raw_file(source, "disk")
+            with open(source, "rb") as f:
+                data = f.read()
+            for (suffix, compress) in [(".gz", gzip.compress), (".xz", lzma.compress)]:
+                file_name = join(tempdir, "test-analytics-disk-raw.csv" + suffix)
+                with open(file_name, "wb") as f:
+                    f.write(compress(data))
+                assert_frame_equal(read_raw_file(file_name, "disk", chunk_rows=1000), expected)
+                assert_frame_equal(load_raw_file(file_name, "disk"), expected)
+
+            detect_files(tempdir, "test")
+            self.assertIn(files_mapping["disk"], [ join(tempdir, "test-analytics-disk-raw.csv" + s) for s in [".gz", ".xz"] ])
+            # uncompressed file is preferred
+            shutil.copy(source, join(tempdir, "test-analytics-disk-raw.csv"))
+            detect_files(tempdir, "test")
+            self.assertEqual(files_mapping["disk"], join(tempdir, "test-analytics-disk-raw.csv"))
+
+            # truncated file is reported as file which can't be parsed
+            file_name = join(tempdir, "test-analytics-cpu-raw.csv.gz")
+            with open(file_name, "wb") as f:
+                f.write(gzip.compress(data)[:60])
+            with self.assertRaises(SystemExit):
+                process_file("cpu", {"cpu": file_name}, sidecar=False)
+
+            if rawreader.zstandard is None:
+                with self.assertRaises(ValueError):
+                    read_raw_file(join(tempdir, "test-analytics-disk-raw.csv.zst"), "disk")
+            else:
+                file_name = join(tempdir, "test-analytics-disk-raw.csv.zst")
+                with open(file_name, "wb") as f:
+                    f.write(rawreader.zstandard.ZstdCompressor().compress(data))
+                assert_frame_equal(read_raw_file(file_name, "disk"), expected)
+
     def test_create_dataframes(self):
         csvdata = pandas.read_csv(join("tests","test-analytics-cpu-raw.csv"))
         datadict = {
@@ -0,0 +1,71 @@
+import json
+import numpy
+from os.path import join
+from pandas.testing import assert_frame_equal
+from unittest import TestCase
+from unittest import main
+from unittest import mock
+from delphixpy.v1_8_0.exceptions import RequestError
+from dxanalyze.dxdata.datapoints import decode_datapoint_set
+from dxanalyze.dxdata.datapoints import get_data
+from dxanalyze.dxdata.datapoints import read_datapoint_set
+from dxanalyze.dxdata.engine import process_io
+
+
+class Test_datapoints(TestCase):
+    def setUp(self):
+        f = open(join("tests","nfs.json"), "rb")
+        self.body = f.read()
+        f.close()
+
+    def test_decode_nfs(self):
+        d = read_datapoint_set(join("tests","nfs.json"))
+        self.assertEqual(d.resolution, 60)
+        self.assertFalse(d.overflow)
+        self.assertListEqual([ s["op"] for s in d.datapoint_streams ], ["read", "write"])
+
+        columns = d.datapoint_streams[0]["datapoints"]
+        self.assertNotIn("type", columns)
+        self.assertEqual(columns["count"].dtype, numpy.int64)
+        self.assertEqual(columns["timestamp"][0], "2019-07-22T13:55:00.000Z")
+        self.assertEqual(columns["latency"][0]["< 10000"], "14")
+        self.assertEqual(len(columns["timestamp"]), 21)
+
+        # decoded columns are giving same result as datapoint dicts
+        jsondata = json.loads(self.body)
+        assert_frame_equal(process_io(d.datapoint_streams, "UTC"),
+                           process_io(jsondata["result"]["datapointStreams"], "UTC"))
+
+    def test_decode_missing_fields(self):
+        body = json.dumps({ "type": "DatapointSet", "resolution": 1, "overflow": True, "datapointStreams": [
+            { "type": "CpuUtilDatapointStream", "datapoints": [
+                { "type": "CpuUtilDatapoint", "timestamp": "2019-07-22T13:55:00.000Z", "idle": 1 },
+                { "type": "CpuUtilDatapoint", "timestamp": "2019-07-22T13:55:01.000Z", "user": 2 } ] },
+            { "type": "CpuUtilDatapointStream", "datapoints": [] }
+        ]})
+        d = decode_datapoint_set(body)
+        self.assertTrue(d.overflow)
+        columns = d.datapoint_streams[0]["datapoints"]
+        self.assertListEqual(list(columns["idle"]), [1, None])
+        self.assertListEqual(list(columns["user"]), [None, 2])
+        self.assertDictEqual(d.datapoint_streams[1]["datapoints"], {})
+
+    def test_decode_error(self):
+        body = json.dumps({ "type": "ErrorResult", "status": "ERROR", "error": {
+            "type": "APIError", "details": "Invalid reference", "id": "exception.webservices.object.notfound" }})
+        with self.assertRaises(RequestError):
+            decode_datapoint_set(body)
+
+    def test_get_data(self):
+        engineobject = mock.Mock()
+        engineobject._authenticate_and_perform.side_effect = lambda action: action()
+        engineobject._http_session.get.return_value = (200, {}, self.body)
+        d = get_data(engineobject, "ANALYTICS_STATISTIC_SLICE-1", resolution=60, start_time="2019-07-22T13:00:00.000Z")
+        engineobject._http_session.get.assert_called_once_with(
+            "/resources/json/delphix/analytics/ANALYTICS_STATISTIC_SLICE-1/getData"
+            "?resolution=60&startTime=2019-07-22T13%3A00%3A00.000Z")
+        self.assertEqual(len(d.datapoint_streams), 2)
+
+
+if __name__ == '__main__':
+    main()
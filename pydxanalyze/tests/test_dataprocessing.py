@@ -9,6 +9,9 @@ from dxanalyze.dxdata.dataprocessing import generate_cache_hit_ratio
 from dxanalyze.dxdata.dataprocessing import generate_cpu_summary
 from dxanalyze.dxdata.dataprocessing import generate_network_summary
 from dxanalyze.dxdata.dataprocessing import create_dataframes
+from dxanalyze.dxdata.dataprocessing import generate_daily_percentile
+from dxanalyze.dxdata.dataprocessing import DailyPercentile
+from dxanalyze.dxdata.dataprocessing import generate_farmanalyze_engine_summary
 
 
 
@@ -60,6 +63,46 @@ class Test_datafile(TestCase):
                 assert_frame_equal(s["ops"]["ops_read"], df[["#timestamp", "ops_read"]])
                 assert_frame_equal(s["ops"]["ops_write"], df[["#timestamp", "ops_write"]])
 
+    def test_create_dataframes_percentiles(self):
+        nfsio = {
+            "#timestamp" : [ "2019-03-20 11:55:00", "2019-03-20 11:56:00" ],
+            "read_throughput":  [ 20, 80 ],
+            "write_throughput": [ 2, 8 ],
+            "ops_read": [1000, 2000],
+            "ops_write": [100, 200],
+            "read_latency": [2, 3],
+            "write_latency": [1, 3],
+            "read_latency_p50": [1, 2],
+            "read_latency_p95": [4, 5],
+            "read_latency_p99": [7, 8],
+            "write_latency_p50": [1, 1],
+            "write_latency_p95": [2, 2],
+            "write_latency_p99": [3, 3]
+        }
+
+        df = pandas.DataFrame(nfsio)
+        series_list = create_dataframes('nfs', df)
+        self.assertListEqual([ list(s.keys())[0] for s in series_list ], ["throughput", "ops", "latency", "latency_percentiles"])
+        assert_frame_equal(series_list[3]["latency_percentiles"]["read_latency_p99"], df[["#timestamp", "read_latency_p99"]])
+
+    def test_create_dataframes_network_per_nic(self):
+        network = {
+            "#timestamp" : [ "2019-03-20 11:55:00", "2019-03-20 11:56:00" ],
+            "inBytes": [ 3 * 1048576, 1048576 ],
+            "outBytes": [ 4 * 1048576, 2 * 1048576 ],
+            "inBytes_eth0": [ 1048576, 1048576 ],
+            "outBytes_eth0": [ 2 * 1048576, 2 * 1048576 ],
+            "inBytes_eth1": [ 2 * 1048576, None ],
+            "outBytes_eth1": [ 2 * 1048576, None ]
+        }
+
+        series_list = create_dataframes('network', pandas.DataFrame(network))
+        self.assertListEqual([ list(s.keys())[0] for s in series_list ], ["throughput", "nic_read_throughput", "nic_write_throughput"])
+        self.assertListEqual(list(series_list[1]["nic_read_throughput"]), ["outBytes_eth0", "outBytes_eth1"])
+        self.assertListEqual(list(series_list[2]["nic_write_throughput"]["inBytes_eth0"]["inBytes_eth0"]), [1, 1])
+        # timestamps without interface data are not charted
+        self.assertListEqual(list(series_list[2]["nic_write_throughput"]["inBytes_eth1"]["inBytes_eth1"]), [2])
+
     def test_generate_cpu_summary(self):
         datadict = {
             "#timestamp" : [ "2019-03-20 11:55:00", "2019-03-20 11:56:00", "2019-03-20 11:57:00",
@@ -92,6 +135,21 @@ class Test_datafile(TestCase):
             df_min = pandas.DataFrame(result_dict[s])
             assert_frame_equal(df_min, series)
 
+    def test_generate_cpu_summary_datetime(self):
+        datadict = {
+            "#timestamp" : [ "2019-03-20 11:55:00", "2019-03-20 11:56:00", "2019-03-20 11:57:00",
+                             "2019-03-21 11:58:00", "2019-03-21 11:59:00", "2019-03-21 12:00:00" ],
+            "util": [ 25.81, 26.29, 24.89, 25.57, 34.68, 49.87]
+        }
+        expected = generate_cpu_summary(pandas.DataFrame(datadict))
+
+        # timestamps parsed by offline mode are grouped into same days
+        df = pandas.DataFrame(datadict)
+        df["#timestamp"] = pandas.to_datetime(df["#timestamp"])
+        series_dict = generate_cpu_summary(df)
+        for s in ["min", "max", "85percentile"]:
+            pandas.testing.assert_series_equal(series_dict[s], expected[s])
+
     def test_generate_network_summary(self):
         inbytes = {
             "#timestamp" : [ "2019-03-20 11:55:00", "2019-03-20 11:56:00", "2019-03-20 11:57:00",
@@ -335,6 +393,55 @@ class Test_datafile(TestCase):
         self.assertEqual(2500, y_axis)
         y_axis = get_max_y_axis("network","throughput", True)
         self.assertEqual(2500, y_axis)
+    def test_generate_daily_percentile(self):
+        datadict = {
+            "#timestamp" : [ "2019-03-20 11:00:00", "2019-03-20 12:00:00", "2019-03-20 13:00:00",
+                             "2019-03-21 11:00:00", "2019-03-21 12:00:00" ],
+            "util": [ 10.0, 20.0, 30.0, 40.0, 60.0 ]
+        }
+        daily = generate_daily_percentile(pandas.DataFrame(datadict), { "util": "utilization_85pct" })
+        result = pandas.DataFrame({
+            "#time": [ "2019-03-20", "2019-03-21" ],
+            "utilization_85pct": [ 27.0, 57.0 ]
+        })
+        assert_frame_equal(daily, result)
+
+    def test_daily_percentile(self):
+        timestamps = [ "2019-03-{} {:02d}:00:00".format(d, h) for d in range(20, 23) for h in range(24) ]
+        df = pandas.DataFrame({ "#timestamp": timestamps, "util": [ float(h * h % 17) for h in range(72) ] })
+        daily = DailyPercentile({ "util": "utilization_85pct" })
+        self.assertTrue(daily.empty)
+        # pages are not aligned to days, only rows of the last day are kept
+        for start in range(0, 72, 10):
+            daily.add(df.iloc[start:start + 10])
+            self.assertLessEqual(sum([ len(d) for d in daily.current ]), 24)
+        assert_frame_equal(daily.to_dataframe(), generate_daily_percentile(df, { "util": "utilization_85pct" }))
+
+    def test_daily_percentile_day_pages(self):
+        timestamps = [ "2019-03-{} {:02d}:00:00".format(d, h) for d in range(20, 25) for h in range(24) ]
+        df = pandas.DataFrame({ "#timestamp": timestamps, "util": [ float(h * h % 17) for h in range(120) ] })
+        daily = DailyPercentile({ "util": "utilization_85pct" })
+        # every page is one day, so a day is completed by the next page
+        for start in range(0, 120, 24):
+            daily.add(df.iloc[start:start + 24])
+            self.assertLessEqual(sum([ len(d) for d in daily.current ]), 24)
+            self.assertEqual(len(daily.days), start // 24)
+        assert_frame_equal(daily.to_dataframe(), generate_daily_percentile(df, { "util": "utilization_85pct" }))
+
+    def test_generate_farmanalyze_engine_summary(self):
+        dfc = pandas.DataFrame({ "#time": [ "2019-03-20", "2019-03-21" ], "utilization_85pct": [ 27.2, 57.4 ] })
+        dfn = pandas.DataFrame({ "#time": [ "2019-03-19", "2019-03-20" ],
+                                 "inBytes_85pct": [ 1024*1024*10, 1024*1024*5 ],
+                                 "outBytes_85pct": [ 1024*1024*20, 1024*1024*40 ] })
+        (engine_dict, fmindate, fmaxdate) = generate_farmanalyze_engine_summary("engine1", dfc, dfn)
+        self.assertDictEqual(engine_dict, { "engine": "engine1", "cpu": 57, "network": 45 })
+        self.assertEqual(str(fmindate.date()), "2019-03-19")
+        self.assertEqual(str(fmaxdate.date()), "2019-03-21")
+
+        (engine_dict, fmindate, fmaxdate) = generate_farmanalyze_engine_summary("engine2", dfc, None, fmindate, fmaxdate)
+        self.assertDictEqual(engine_dict, { "engine": "engine2", "cpu": 57 })
+        self.assertEqual(str(fmindate.date()), "2019-03-19")
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
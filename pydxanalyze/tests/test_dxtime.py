@@ -0,0 +1,21 @@
+from unittest import TestCase
+from unittest import main
+from dxanalyze.dxdata.dxtime import convert_from_utc
+from dxanalyze.dxdata.dxtime import convert_from_utc_array
+
+
+class Test_dxtime(TestCase):
+    timestamps = [ "2019-03-31T00:59:00.000Z", "2019-03-31T01:00:00.000Z", "2019-07-22T13:55:00.000Z",
+                   "2019-10-27T00:59:00.000Z", "2019-10-27T01:00:00.000Z", "2019-12-31 23:30:00" ]
+
+    def test_convert_from_utc_array(self):
+        for timezone in [ "UTC", "Europe/Dublin", "America/New_York", "Asia/Kolkata", "GMT+05:30", "GMT-08:00" ]:
+            for printtz in [ None, True ]:
+                result = [ convert_from_utc(ts, timezone, printtz) for ts in self.timestamps ]
+                self.assertListEqual(list(convert_from_utc_array(self.timestamps, timezone, printtz)), result)
+
+    def test_convert_from_utc_array_empty(self):
+        self.assertEqual(len(convert_from_utc_array([], "UTC")), 0)
+
+if __name__ == '__main__':
+    main()
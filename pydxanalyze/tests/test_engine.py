@@ -1,3 +1,4 @@
+import numpy
 import pandas
 import json
 from os.path import join
@@ -5,27 +6,69 @@ from pandas.util.testing import assert_frame_equal
 from pandas.util.testing import assert_almost_equal
 from unittest import TestCase
 from unittest import main
-from unittest.mock import patch
 from unittest import mock
+from time import sleep
 from dxanalyze.dxdata.engine import process_io
-from dxanalyze.dxdata.engine import generate_pages
-from dxanalyze.dxdata.engine import process_analytics
-import dxanalyze.dxdata.engine as engine
-from delphixpy.v1_8_0.web.analytics import analytics
-from delphixpy.v1_8_0.web.objects.DatapointSet import DatapointSet 
-from delphixpy.v1_8_0.web.objects.DatapointStream import DatapointStream 
+from dxanalyze.dxdata.engine import process_network
+from dxanalyze.dxdata.engine import EngineSession
+from dxanalyze.dxdata.engine import get_page_length
+from dxanalyze.dxdata.engine import PagePlanner
+from dxanalyze.dxdata.engine import ResolutionPlanner
+from dxanalyze.dxdata.engine import plan_resolutions
+from dxanalyze.dxdata.engine import decode_latency_histograms
+from dxanalyze.dxdata.engine import average_latency
+from datetime import datetime, timedelta
+import dxanalyze.dxdata.datapoints as datapoints
+from dxanalyze.dxdata.datapoints import decode_datapoint_set
 
 
+def engine_session(time_zone):
+    # session which is not connected, all engine calls are mocked
+    session = EngineSession("engine", "admin", "password")
+    session.time_zone = time_zone
+    return session
+
 def analytic_mock(a, b, **kwargs):
-    f = open(join("tests","nfs.json"))
-    jsondata = json.load(f)
+    f = open(join("tests","nfs.json"), "rb")
+    body = f.read()
     f.close()
-    s = DatapointSet()
-    s = s.from_dict(jsondata["result"])
-    return s
+    return decode_datapoint_set(body)
+
+def cpu_page_mock(a, b, **kwargs):
+    # later pages are returned first to check if pages are reassembled in order
+    sleep(0.01 * (24 - int(kwargs["start_time"][11:13])))
+    return cpu_datapoint_set(kwargs["start_time"], kwargs["resolution"], False)
+
+def cpu_overflow_mock(a, b, **kwargs):
+    # engine is reporting overflow for pages longer than 15 minutes
+    start_time = datetime.strptime(kwargs["start_time"], "%Y-%m-%dT%H:%M:%S.000Z")
+    end_time = datetime.strptime(kwargs["end_time"], "%Y-%m-%dT%H:%M:%S.000Z")
+    overflow = end_time - start_time > timedelta(minutes=15)
+    return cpu_datapoint_set(kwargs["start_time"], kwargs["resolution"], overflow)
+
+def cpu_datapoint_set(timestamp, resolution, overflow):
+    jsondata = {
+        "type": "DatapointSet",
+        "resolution": resolution,
+        "overflow": overflow,
+        "datapointStreams": [
+            {
+                "type": "CpuUtilDatapointStream",
+                "datapoints": [
+                    {
+                        "type": "CpuUtilDatapoint",
+                        "timestamp": timestamp,
+                        "idle": 50,
+                        "user": 25,
+                        "kernel": 25
+                    }
+                ]
+            }
+        ]
+    }
+    return decode_datapoint_set(json.dumps(jsondata))
 
 class Test_datafile(TestCase):
-    @patch('dxanalyze.dxdata.engine.__engine_time_zone', "Europe/Dublin")
     def test_process_io(self):
         nfsio = {
             "#timestamp" : [ "2019-07-22 14:55:00", "2019-07-22 14:56:00", "2019-07-22 14:57:00", "2019-07-22 14:58:00",
@@ -43,20 +86,18 @@ class Test_datafile(TestCase):
                               0.02,0.02,0.02,0.02,0.02,0.02,0.02,0.02,0.02,0.02,0.02,0.02,0.02]
         }
 
-        engine.__engine_time_zone = "Europe/Dublin"
         f = open(join("tests","nfs.json"))
         jsondata = json.load(f)
         f.close()
 
         df = pandas.DataFrame(nfsio)
-        csvlikepanda = process_io(jsondata["result"]["datapointStreams"])
-        assert_almost_equal(df, csvlikepanda[["#timestamp","read_latency","read_throughput"]], check_less_precise=True )
+        csvlikepanda = process_io(jsondata["result"]["datapointStreams"], "Europe/Dublin")
+        assert_almost_equal(df, csvlikepanda[["#timestamp","read_throughput","read_latency"]], check_less_precise=True )
 
-    @patch('dxanalyze.dxdata.engine.__engine_time_zone', "Europe/Dublin")
-    def test_generate_pages(self):
-        page_list = []
-        for i in generate_pages("2019-01-01 00:00:00", "2019-01-01 12:00:00"):
-            page_list.append(i)
+    def test_page_planner_pages(self):
+        # 1 second resolution is fetched in 1 hour pages
+        planner = PagePlanner("2019-01-01 00:00:00", "2019-01-01 12:00:00", 1)
+        page_list = list(iter(planner.next_page, None))
 
         result_list = [('2019-01-01 00:00:00', '2019-01-01 01:00:00'), ('2019-01-01 01:00:00', '2019-01-01 02:00:00'), 
                        ('2019-01-01 02:00:00', '2019-01-01 03:00:00'), ('2019-01-01 03:00:00', '2019-01-01 04:00:00'), 
@@ -67,9 +108,15 @@ class Test_datafile(TestCase):
 
         self.assertListEqual(page_list, result_list)
 
-    @patch('dxanalyze.dxdata.engine.__engine_time_zone', "Europe/Dublin")
+    def test_page_planner_aligned(self):
+        planner = PagePlanner("2019-01-01 00:35:10", "2019-01-01 02:20:00", 1, align=True)
+        page_list = list(iter(planner.next_page, None))
+        result_list = [('2019-01-01 00:35:10', '2019-01-01 01:00:00'), ('2019-01-01 01:00:00', '2019-01-01 02:00:00'),
+                       ('2019-01-01 02:00:00', '2019-01-01 02:20:00')]
+        self.assertListEqual(page_list, result_list)
+
     @mock.patch.object(
-        analytics, 'get_data', new=analytic_mock
+        datapoints, 'get_data', new=analytic_mock
     )
     def test_process_analytics(self):
         nfsio = {
@@ -89,7 +136,7 @@ class Test_datafile(TestCase):
         }
 
         df = pandas.DataFrame(nfsio)
-        stats_list = process_analytics("nfs", "2019-07-22 14:55:00", "2019-07-22 15:13:00")
+        stats_list = engine_session("Europe/Dublin").process_analytics("nfs", "2019-07-22 14:55:00", "2019-07-22 15:13:00")
         for stat in stats_list:
             if "throughput" in stat:
                 result_df = stat["throughput"]["read_throughput"]
@@ -98,5 +145,129 @@ class Test_datafile(TestCase):
                 result_df = stat["latency"]["read_latency"]
                 assert_almost_equal(df[["#timestamp","read_latency"]], result_df, check_less_precise=True )
 
+    @mock.patch.object(
+        datapoints, 'get_data', new=cpu_page_mock
+    )
+    def test_process_analytics_parallel(self):
+        stats_list = engine_session("UTC").process_analytics("cpu", "2019-07-22 00:00:00", "2019-07-22 12:00:00", resolution=1, parallel=4)
+        result_df = stats_list[0]["utilization"]["util"]
+        timestamps = [ "2019-07-22 {:02d}:00:00".format(h) for h in range(12) ]
+        self.assertListEqual(list(result_df["#timestamp"]), timestamps)
+        self.assertListEqual(list(result_df["util"]), [50.0] * 12)
+
+    @mock.patch.object(
+        datapoints, 'get_data', new=cpu_page_mock
+    )
+    def test_collect_analytics(self):
+        collected = dict(engine_session("UTC").collect_analytics(["cpu"], "2019-07-22 00:00:00", "2019-07-22 03:00:00", resolution=1))
+        self.assertListEqual(list(collected.keys()), ["cpu"])
+        result_df = collected["cpu"][0]["utilization"]["util"]
+        self.assertEqual(len(result_df), 3)
+
+    def test_get_page_length(self):
+        self.assertEqual(get_page_length(1), timedelta(hours=1))
+        self.assertEqual(get_page_length(60), timedelta(days=1))
+        self.assertEqual(get_page_length(3600), timedelta(days=30))
+
+    def test_page_planner(self):
+        planner = PagePlanner("2019-01-01 00:30:00", "2019-01-03 12:00:00", 1, align=True)
+        self.assertTupleEqual(planner.next_page(), ("2019-01-01 00:30:00", "2019-01-01 01:00:00"))
+        self.assertTupleEqual(planner.next_page(), ("2019-01-01 01:00:00", "2019-01-01 02:00:00"))
+        # engine returned 1 minute data, so next pages are 1 day long
+        planner.feedback(60)
+        self.assertTupleEqual(planner.next_page(), ("2019-01-01 02:00:00", "2019-01-02 00:00:00"))
+        self.assertTupleEqual(planner.next_page(), ("2019-01-02 00:00:00", "2019-01-03 00:00:00"))
+        self.assertTupleEqual(planner.next_page(), ("2019-01-03 00:00:00", "2019-01-03 12:00:00"))
+        self.assertIsNone(planner.next_page())
+
+    def test_plan_resolutions(self):
+        # older data are planned with hourly resolution, split is aligned to hourly page length
+        self.assertListEqual(plan_resolutions("2019-01-01 00:30:00", "2019-03-01 12:30:00", 60, 7),
+                             [ ("2019-01-01 00:30:00", "2019-02-13 00:00:00", 3600),
+                               ("2019-02-13 00:00:00", "2019-03-01 12:30:00", 60) ])
+        # split is not moving with end time inside of one page
+        self.assertListEqual(plan_resolutions("2019-01-01 00:30:00", "2019-03-02 18:30:00", 60, 7),
+                             [ ("2019-01-01 00:30:00", "2019-02-13 00:00:00", 3600),
+                               ("2019-02-13 00:00:00", "2019-03-02 18:30:00", 60) ])
+        self.assertListEqual(plan_resolutions("2019-02-25 00:00:00", "2019-03-01 12:30:00", 60, 7),
+                             [ ("2019-02-25 00:00:00", "2019-03-01 12:30:00", 60) ])
+        self.assertListEqual(plan_resolutions("2019-01-01 00:00:00", "2019-03-01 12:30:00", 60, 0),
+                             [ ("2019-01-01 00:00:00", "2019-03-01 12:30:00", 60) ])
+        self.assertListEqual(plan_resolutions("2019-01-01 00:00:00", "2019-03-01 12:30:00", 3600, 7),
+                             [ ("2019-01-01 00:00:00", "2019-03-01 12:30:00", 3600) ])
+
+    def test_resolution_planner(self):
+        planner = ResolutionPlanner("2018-11-01 00:00:00", "2018-12-17 12:00:00", 60, align=True, detail_days=1)
+        first = planner.next_page()
+        self.assertTupleEqual(first, (("2018-11-01 00:00:00", "2018-11-15 00:00:00"), 3600))
+        self.assertTupleEqual(planner.next_page(), (("2018-11-15 00:00:00", "2018-12-15 00:00:00"), 3600))
+        detail = planner.next_page()
+        self.assertTupleEqual(detail, (("2018-12-15 00:00:00", "2018-12-16 00:00:00"), 60))
+        # feedback for coarse page is not changing pages of detailed part
+        planner.feedback(first[0], 3600)
+        self.assertTupleEqual(planner.next_page(), (("2018-12-16 00:00:00", "2018-12-17 00:00:00"), 60))
+        self.assertTupleEqual(planner.next_page(), (("2018-12-17 00:00:00", "2018-12-17 12:00:00"), 60))
+        self.assertIsNone(planner.next_page())
+
+    @mock.patch.object(
+        datapoints, 'get_data', new=cpu_overflow_mock
+    )
+    def test_process_analytics_overflow(self):
+        stats_list = engine_session("UTC").process_analytics("cpu", "2019-07-22 00:00:00", "2019-07-22 01:00:00")
+        result_df = stats_list[0]["utilization"]["util"]
+        timestamps = [ "2019-07-22 00:00:00", "2019-07-22 00:15:00", "2019-07-22 00:30:00", "2019-07-22 00:45:00" ]
+        self.assertListEqual(list(result_df["#timestamp"]), timestamps)
+
+    def test_average_latency(self):
+        # bucket latency is bucket boundary plus half of bucket width, < 10000 bucket is set to 1000
+        latency_list = [ {"100000": 3}, {"100000": 3, "1000000": 1}, {"< 10000": 2, "1000000": 2}, {}, None ]
+        (boundaries, matrix) = decode_latency_histograms(latency_list)
+        self.assertListEqual(list(boundaries), [100000.0, 1000000.0, 1000.0])
+        self.assertListEqual(matrix.tolist(), [[3, 0, 0], [3, 1, 0], [0, 2, 2], [0, 0, 0], [0, 0, 0]])
+        latency = average_latency(boundaries, matrix)
+        self.assertListEqual([ None if numpy.isnan(l) else l for l in latency ], [0.15, 0.49, 0.75, None, None])
+
+    def test_process_io_percentiles(self):
+        f = open(join("tests","nfs.json"))
+        jsondata = json.load(f)
+        f.close()
+
+        csvlikepanda = process_io(jsondata["result"]["datapointStreams"], "Europe/Dublin")
+        # histograms are kept with data, one row per timestamp
+        histograms = csvlikepanda.attrs["histograms"]
+        self.assertEqual(len(histograms["read"]), len(csvlikepanda))
+        numpy.testing.assert_array_equal(histograms["write"].percentile(95), csvlikepanda["write_latency_p95"])
+        self.assertListEqual(list(csvlikepanda["read_latency_p50"][:3]), [0.02, 0.02, 0.02])
+        self.assertListEqual(list(csvlikepanda["read_latency_p99"][:3]), [0.06, 0.06, 0.15])
+        self.assertListEqual(list(csvlikepanda["write_latency_p95"][:3]), [3.5, 2.5, 1.5])
+
+    def test_process_network(self):
+        def nic_stream(nic, timestamps, inbytes):
+            return {
+                "networkInterface": nic,
+                "type": "NetworkInterfaceUtilDatapointStream",
+                "datapoints": [ { "timestamp": t, "inBytes": b, "outBytes": b * 2, "inPackets": 1, "outPackets": 1,
+                                  "type": "NetworkInterfaceUtilDatapoint" } for (t, b) in zip(timestamps, inbytes) ]
+            }
+
+        streams = [
+            nic_stream("eth0", ["2019-05-01T10:00:00.000Z", "2019-05-01T10:01:00.000Z", "2019-05-01T10:02:00.000Z"], [1, 2, 3]),
+            nic_stream("eth1", ["2019-05-01T10:00:00.000Z", "2019-05-01T10:02:00.000Z"], [10, 30]),
+            nic_stream("eth2", [], [])
+        ]
+
+        network = process_network(streams, "Europe/Dublin")
+        self.assertListEqual(list(network["#timestamp"]), ["2019-05-01 11:00:00", "2019-05-01 11:01:00", "2019-05-01 11:02:00"])
+        self.assertListEqual(list(network["inBytes"]), [11, 2, 33])
+        self.assertListEqual(list(network["outBytes"]), [22, 4, 66])
+        self.assertListEqual(list(network["inPackets"]), [2, 1, 2])
+        self.assertNotIn("inBytes_eth1", network.columns)
+
+        network = process_network(streams, "Europe/Dublin", per_nic=True)
+        self.assertListEqual(list(network["inBytes_eth0"]), [1, 2, 3])
+        assert_almost_equal(network["outBytes_eth1"].values, numpy.array([20, numpy.nan, 60]))
+        self.assertIsNone(process_network([], "Europe/Dublin"))
+
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
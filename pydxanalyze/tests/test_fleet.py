@@ -0,0 +1,116 @@
+import json
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest import main
+from unittest import mock
+import dxanalyze.dxdata.datapoints as datapoints
+from dxanalyze.dxdata.datapoints import decode_datapoint_set
+from dxanalyze.dxdata.engine import EngineSession
+from dxanalyze.dxdata.fleet import collect_fleet
+from dxanalyze.dxdata.fleet import collect_farmanalyze_summary
+from dxanalyze.dxdata.fleet import read_engine_list
+
+
+engine_time_zones = {
+    "engine1": "UTC",
+    "engine2": "Europe/Dublin"
+}
+
+def connect_mock(self):
+    if self.engine_address not in engine_time_zones:
+        exit(1)
+    self.time_zone = engine_time_zones[self.engine_address]
+    self.current_time = "2019-07-22 12:00:00"
+    self.engine_name = self.engine_address
+    self.analytic_map["cpu"]["ref"] = "ANALYTICS_STATISTIC_SLICE-1"
+    self.analytic_map["network"]["ref"] = "ANALYTICS_STATISTIC_SLICE-2"
+
+def farm_page_mock(a, ref, **kwargs):
+    # hourly data for one day with cpu utilization and network throughput growing each hour
+    timestamps = [ "2019-07-22T{:02d}:00:00.000Z".format(h) for h in range(24) ]
+    if ref == "ANALYTICS_STATISTIC_SLICE-1":
+        stream = {
+            "type": "CpuUtilDatapointStream",
+            "datapoints": [ { "type": "CpuUtilDatapoint", "timestamp": t, "idle": 100 - h, "user": h, "kernel": 0 }
+                            for (h, t) in enumerate(timestamps) ]
+        }
+    else:
+        stream = {
+            "type": "NetworkInterfaceUtilDatapointStream",
+            "networkInterface": "eth0",
+            "datapoints": [ { "type": "NetworkInterfaceUtilDatapoint", "timestamp": t, "inBytes": h * 1024 * 1024,
+                              "outBytes": h * 1024 * 1024, "inPackets": 1, "outPackets": 1 }
+                            for (h, t) in enumerate(timestamps) ]
+        }
+    jsondata = {
+        "type": "DatapointSet",
+        "resolution": kwargs["resolution"],
+        "overflow": False,
+        "datapointStreams": [ stream ]
+    }
+    return decode_datapoint_set(json.dumps(jsondata))
+
+
+class Test_fleet(TestCase):
+
+    def test_read_engine_list(self):
+        with TemporaryDirectory() as tempdir:
+            config_file = join(tempdir, "dxtools.conf")
+            with open(config_file, "w") as f:
+                json.dump({ "data": [
+                    { "hostname": "engine1", "ip_address": "10.0.0.1", "username": "admin", "password": "secret" },
+                    { "hostname": "engine2" },
+                    { "hostname": "engine3", "username": "admin", "password": "xxx", "encrypted": "true" }
+                ]}, f)
+
+            engine_list = read_engine_list(config_file, "delphix_admin", "delphix")
+            self.assertListEqual(engine_list, [ ("10.0.0.1", "admin", "secret"), ("engine2", "delphix_admin", "delphix") ])
+
+            engine_list = read_engine_list(config_file)
+            self.assertListEqual(engine_list, [ ("10.0.0.1", "admin", "secret") ])
+
+    @mock.patch.object(EngineSession, 'connect', new=connect_mock)
+    @mock.patch.object(datapoints, 'get_data', new=farm_page_mock)
+    def test_collect_fleet(self):
+        engine_list = [ (name, "admin", "password") for name in ["engine1", "engine2", "engine3"] ]
+        collected = { name: (session, stats) for (name, session, stats)
+                      in collect_fleet(engine_list, "2019-07-22 10:00:00", "2019-07-22 11:00:00", fleet_parallel=3) }
+
+        self.assertEqual(set(collected.keys()), set(["engine1", "engine2", "engine3"]))
+        self.assertEqual(collected["engine3"], (None, None))
+
+        # each engine is using own session and time zone
+        for (name, first_timestamp) in [ ("engine1", "2019-07-22 00:00:00"), ("engine2", "2019-07-22 01:00:00") ]:
+            (session, stats) = collected[name]
+            self.assertEqual(session.engine_name, name)
+            self.assertEqual(dict(stats)["cpu"][0]["utilization"]["util"]["#timestamp"].iloc[0], first_timestamp)
+
+    @mock.patch.object(EngineSession, 'connect', new=connect_mock)
+    @mock.patch.object(datapoints, 'get_data', new=farm_page_mock)
+    def test_collect_farmanalyze_summary(self):
+        engine_list = [ (name, "admin", "password") for name in ["engine2", "engine1", "engine3"] ]
+        (engine_dict_list, fmindate, fmaxdate) = collect_farmanalyze_summary(engine_list, "2019-07-22 00:00:00",
+                                                                             "2019-07-23 00:00:00")
+        # 85 percentile of 0..23 is 19.55, for engine2 in Europe/Dublin the last hour is in next day
+        self.assertListEqual(engine_dict_list, [ { "engine": "engine1", "cpu": 20, "network": 39 },
+                                                 { "engine": "engine2", "cpu": 23, "network": 46 } ])
+        self.assertEqual(str(fmindate.date()), "2019-07-22")
+        self.assertEqual(str(fmaxdate.date()), "2019-07-23")
+
+    @mock.patch.object(EngineSession, 'connect', new=connect_mock)
+    def test_collect_farmanalyze_resolution(self):
+        # days older than detail days are not collected as hourly data, all days have same resolution
+        resolutions = []
+        def page_mock(a, ref, **kwargs):
+            resolutions.append(kwargs["resolution"])
+            return farm_page_mock(a, ref, **kwargs)
+        with mock.patch.object(datapoints, 'get_data', new=page_mock):
+            collect_farmanalyze_summary([ ("engine1", "admin", "password") ], "2019-07-01 00:00:00",
+                                        "2019-07-22 00:00:00", resolution=60)
+        self.assertEqual(len(resolutions), 42)
+        self.assertEqual(set(resolutions), set([60]))
+
+
+if __name__ == '__main__':
+    main()
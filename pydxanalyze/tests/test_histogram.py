@@ -0,0 +1,73 @@
+import numpy
+from unittest import TestCase
+from unittest import main
+from dxanalyze.dxdata.histogram import LatencyHistograms
+from dxanalyze.dxdata.histogram import arrays_histograms
+from dxanalyze.dxdata.histogram import concat_histograms
+from dxanalyze.dxdata.histogram import histogram_arrays
+
+
+class Test_histogram(TestCase):
+    def setUp(self):
+        # buckets 1000 (< 10000), 10000, 20000 and 100000 ns
+        self.boundaries = numpy.array([10000.0, 1000.0, 100000.0, 20000.0])
+        self.matrix = numpy.array([
+            [ 90, 0, 1, 9 ],
+            [ 0, 0, 0, 0 ],
+            [ 0, 100, 0, 0 ]
+        ], dtype=float)
+
+    def test_percentile(self):
+        histograms = LatencyHistograms.from_matrix(self.boundaries, self.matrix)
+        self.assertEqual(len(histograms), 3)
+        self.assertListEqual(list(histograms.boundaries), [1000.0, 10000.0, 20000.0, 100000.0])
+        # only not empty buckets are kept
+        self.assertListEqual(list(histograms.indptr), [0, 3, 3, 4])
+        p50 = histograms.percentile(50)
+        self.assertEqual(p50[0], 0.02)
+        self.assertTrue(numpy.isnan(p50[1]))
+        self.assertEqual(p50[2], 0.0)
+        self.assertEqual(histograms.percentile(95)[0], 0.02)
+        self.assertEqual(histograms.percentile(99)[0], 0.02)
+        self.assertEqual(histograms.percentile(100)[0], 0.15)
+
+    def test_invalid_buckets(self):
+        # bucket with boundary 0 is ignored, histograms without buckets are empty
+        histograms = LatencyHistograms.from_matrix(numpy.array([0.0, 1000.0, 5000.0]), numpy.array([[ 10, 9, 1 ]], dtype=float))
+        numpy.testing.assert_array_equal(histograms.percentile(90), [0.0])
+        histograms = LatencyHistograms.from_matrix(numpy.array([5000.0, 100000.0]), numpy.array([[ 9, 1 ]], dtype=float))
+        numpy.testing.assert_array_equal(histograms.percentile(95), [0.15])
+        histograms = LatencyHistograms.from_matrix(numpy.array([]), numpy.zeros((2, 0)))
+        numpy.testing.assert_array_equal(histograms.percentile(50), [numpy.nan, numpy.nan])
+
+    def test_concat(self):
+        first = LatencyHistograms.from_matrix(self.boundaries, self.matrix)
+        second = LatencyHistograms.from_matrix(numpy.array([5000.0, 1000.0]), numpy.array([[ 1, 3 ]], dtype=float))
+        histograms = LatencyHistograms.concat([first, second])
+        self.assertEqual(len(histograms), 4)
+        self.assertListEqual(list(histograms.boundaries), [1000.0, 5000.0, 10000.0, 20000.0, 100000.0])
+        numpy.testing.assert_array_equal(histograms.percentile(50), [0.02, numpy.nan, 0.0, 0.0])
+        numpy.testing.assert_array_equal(histograms.percentile(90), [0.02, numpy.nan, 0.0, 0.01])
+
+    def test_concat_pages(self):
+        page = { "read": LatencyHistograms.from_matrix(self.boundaries, self.matrix) }
+        self.assertEqual(len(concat_histograms([page, page])["read"]), 6)
+        # rows would not match if a page is without histograms
+        self.assertIsNone(concat_histograms([page, None]))
+        self.assertIsNone(concat_histograms([]))
+        self.assertDictEqual(concat_histograms([page, {}]), {})
+
+    def test_arrays(self):
+        histograms = { "read": LatencyHistograms.from_matrix(self.boundaries, self.matrix),
+                       "write": LatencyHistograms.from_matrix(numpy.array([1000.0]), numpy.array([[ 4 ]], dtype=float)) }
+        arrays = histogram_arrays(histograms)
+        self.assertIn("#histogram_read_counts", arrays)
+        arrays["util"] = numpy.zeros(3)
+        loaded = arrays_histograms(arrays)
+        self.assertListEqual(sorted(loaded), ["read", "write"])
+        for op in histograms:
+            numpy.testing.assert_array_equal(loaded[op].percentile(50), histograms[op].percentile(50))
+        self.assertEqual(loaded["read"].nbytes, histograms["read"].nbytes)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import gzip
+import json
+import zlib
+from unittest import TestCase
+from unittest import main
+from engine_server import EngineServer
+from dxanalyze.dxdata.httppool import HttpConnectionPool
+from dxanalyze.dxdata.httppool import decode_body
+
+
+class Test_httppool(TestCase):
+
+    def test_decode_body(self):
+        body = b'{"type": "OKResult"}'
+        self.assertEqual(decode_body({ "content-encoding": "gzip" }, gzip.compress(body)), body)
+        self.assertEqual(decode_body({ "content-encoding": "deflate" }, zlib.compress(body)), body)
+        self.assertEqual(decode_body({}, body), body)
+
+    def test_keep_alive(self):
+        with EngineServer() as server:
+            pool = HttpConnectionPool(server.address)
+            for i in range(3):
+                (status, headers, body) = pool.request("GET", "/standin/stats", {})
+                self.assertEqual(status, 200)
+                self.assertEqual(headers["content-encoding"], "gzip")
+            self.assertEqual(pool.stats.requests, 3)
+            self.assertEqual(pool.stats.connections, 1)
+            self.assertIn("requests", json.loads(body))
+
+            # connection closed by engine is replaced by a new one
+            pool.idle[0].sock.close()
+            (status, _, _) = pool.request("GET", "/standin/stats", {})
+            self.assertEqual(status, 200)
+            self.assertEqual(pool.stats.connections, 2)
+            pool.close()
+
+
+if __name__ == '__main__':
+    main()
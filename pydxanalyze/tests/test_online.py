@@ -0,0 +1,225 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest import main
+from unittest import mock
+from engine_server import EngineServer
+import pandas
+from pandas.testing import assert_frame_equal
+import dxanalyze.dxdata.datafiles as datafiles
+import dxanalyze.dxdata.engine as engine
+import dxanalyze.dxdata.httppool as httppool
+from dxanalyze.dxdata.checkpoint import Checkpoint
+from dxanalyze.dxdata.engine import EngineSession
+from dxanalyze.dxdata.pagecache import PageCache
+from dxanalyze.dxdata.rawfiles import RawFiles
+from dxanalyze.dxdata.rawfiles import raw_file_name
+from dxanalyze.dxdata.rawreader import read_histograms
+from dxanalyze.dxdata.rawreader import read_raw_file
+from dxanalyze.dxdata.rawreader import read_sidecar
+
+
+def connected_session(server, password="delphix"):
+    session = EngineSession(server.address, "admin", password)
+    session.connect()
+    return session
+
+
+def assert_stats_equal(test, collected, expected):
+    for analytic_name in expected:
+        test.assertEqual(len(collected[analytic_name]), len(expected[analytic_name]))
+        for (stat, expected_stat) in zip(collected[analytic_name], expected[analytic_name]):
+            test.assertListEqual(list(stat), list(expected_stat))
+            for (name, series) in expected_stat.items():
+                test.assertListEqual(sorted(stat[name]), sorted(series))
+                for key in series:
+                    assert_frame_equal(stat[name][key], series[key])
+
+
+class Test_online(TestCase):
+
+    def test_connect(self):
+        with EngineServer(hostname="engine1", time_zone="Europe/Dublin") as server:
+            session = connected_session(server)
+            self.assertEqual(session.engine_name, "engine1")
+            self.assertEqual(session.time_zone, "Europe/Dublin")
+            self.assertEqual(session.current_time, "2019-07-22 13:00:00")
+            self.assertListEqual(session.get_available_analytics(), ["cpu", "network", "disk", "nfs", "iscsi"])
+
+    def test_wrong_password(self):
+        with EngineServer() as server:
+            with self.assertRaises(SystemExit):
+                connected_session(server, "wrong")
+
+    def test_collect_dataframe(self):
+        with EngineServer(time_zone="Europe/Dublin", nics=3) as server:
+            session = connected_session(server)
+            cpu = session.collect_dataframe("cpu", "2019-07-21 13:00:00", "2019-07-22 13:00:00", 60, parallel=4)
+            self.assertEqual(len(cpu), 1440)
+            self.assertEqual(cpu["#timestamp"].iloc[0], "2019-07-21 13:00:00")
+            self.assertEqual(cpu["#timestamp"].iloc[-1], "2019-07-22 12:59:00")
+            self.assertTrue(cpu["#timestamp"].is_monotonic_increasing)
+
+            network = session.collect_dataframe("network", "2019-07-22 12:00:00", "2019-07-22 13:00:00", 60)
+            self.assertEqual(len(network), 60)
+            self.assertListEqual(list(network.columns[:3]), ["#timestamp", "inBytes", "outBytes"])
+
+            # worker threads are sharing login of connected session, one day of minute data is a single page
+            stats = server.stats()
+            self.assertEqual(stats["requests"]["login"], 1)
+            self.assertEqual(stats["requests"]["getData"], 2)
+
+    def test_network_per_nic(self):
+        with TemporaryDirectory() as tempdir, EngineServer(nics=3) as server:
+            cache = PageCache(tempdir)
+            session = connected_session(server)
+            network = session.collect_dataframe("network", "2019-07-22 10:00:00", "2019-07-22 11:00:00", 60, cache=cache)
+            self.assertNotIn("inBytes_vmxnet3s0", network.columns)
+
+            # pages with per interface columns are not shared with summed pages in cache
+            session = EngineSession(server.address, "admin", "delphix", network_per_nic=True)
+            session.connect()
+            network = session.collect_dataframe("network", "2019-07-22 10:00:00", "2019-07-22 11:00:00", 60, cache=cache)
+            self.assertEqual(server.stats()["requests"]["getData"], 2)
+            nic_columns = [ "inBytes_vmxnet3s{}".format(nic) for nic in range(3) ]
+            self.assertTrue(set(nic_columns).issubset(network.columns))
+            assert_frame_equal(network[nic_columns].sum(axis=1).to_frame("inBytes"), network[["inBytes"]],
+                               check_dtype=False)
+
+            network = session.collect_dataframe("network", "2019-07-22 10:00:00", "2019-07-22 11:00:00", 60, cache=cache)
+            self.assertTrue(set(nic_columns).issubset(network.columns))
+            self.assertEqual(server.stats()["requests"]["getData"], 2)
+
+    def test_detail_days(self):
+        with EngineServer() as server:
+            session = connected_session(server)
+            network = session.collect_dataframe("network", "2019-04-23 12:00:00", "2019-07-22 12:00:00", 60,
+                                                detail_days=7)
+            # hourly data until split aligned to hourly page length, followed by 9.5 days of minute data
+            coarse = 80 * 24 + 12
+            self.assertEqual(len(network), coarse + 9 * 1440 + 720)
+            self.assertTrue(network["#timestamp"].is_monotonic_increasing)
+            self.assertEqual(network["#timestamp"].iloc[coarse - 1], "2019-07-12 23:00:00")
+            self.assertEqual(network["#timestamp"].iloc[coarse], "2019-07-13 00:00:00")
+            self.assertEqual(network["#timestamp"].iloc[coarse + 1], "2019-07-13 00:01:00")
+            planned_bytes = server.stats()["sentBytes"]
+
+            session.collect_dataframe("network", "2019-04-23 12:00:00", "2019-07-22 12:00:00", 60, detail_days=0)
+            # transfer for whole range with minute data is more than 8 times bigger
+            self.assertGreater(server.stats()["sentBytes"] - planned_bytes, 8 * planned_bytes)
+
+    def test_compressed_transfer(self):
+        with EngineServer() as server:
+            session = connected_session(server)
+            connect_bytes = server.stats()["sentBytes"]
+            nfs = session.collect_dataframe("nfs", "2019-07-22 06:00:00", "2019-07-22 12:00:00", 1, parallel=2)
+            compressed_bytes = server.stats()["sentBytes"] - connect_bytes
+            self.assertEqual(session.transfer.wire_bytes, compressed_bytes)
+            # pages of all worker threads are fetched using kept-alive connections
+            self.assertEqual(session.transfer.requests, 6)
+            self.assertLessEqual(session.transfer.connections, 2)
+
+            with mock.patch.object(httppool, 'compressed_transfer', False):
+                session = connected_session(server)
+                plain = session.collect_dataframe("nfs", "2019-07-22 06:00:00", "2019-07-22 12:00:00", 1, parallel=2)
+            assert_frame_equal(nfs, plain)
+            self.assertEqual(session.transfer.wire_bytes, session.transfer.body_bytes)
+            self.assertGreater(session.transfer.wire_bytes, 5 * compressed_bytes)
+
+    def test_sweep(self):
+        with EngineServer(time_zone="Europe/Dublin") as server:
+            session = connected_session(server)
+            analytic_list = session.get_available_analytics()
+            expected = dict(session.collect_analytics(analytic_list, "2019-07-22 06:00:00", "2019-07-22 12:00:00", 1))
+            requests = server.stats()["requests"]["getData"]
+
+            swept = dict(session.sweep_analytics(analytic_list, "2019-07-22 06:00:00", "2019-07-22 12:00:00", 1,
+                                                 parallel=len(analytic_list)))
+            self.assertListEqual(sorted(swept), sorted(expected))
+            assert_stats_equal(self, swept, expected)
+            # each of 6 hourly windows is fetched once for every analytic
+            self.assertEqual(server.stats()["requests"]["getData"] - requests, 6 * len(analytic_list))
+
+    def test_overflow(self):
+        with EngineServer(max_points=1000) as server:
+            session = connected_session(server)
+            nfs = session.collect_dataframe("nfs", "2019-07-22 11:00:00", "2019-07-22 12:00:00", 1)
+            self.assertEqual(len(nfs), 3600)
+            self.assertTrue(nfs["#timestamp"].is_unique)
+            self.assertIn("read_latency_p95", nfs.columns)
+            # page is split into halves until engine is not reporting overflow
+            self.assertEqual(server.stats()["requests"]["getData"], 7)
+
+    def test_lower_resolution(self):
+        with EngineServer(resolutions=[60, 3600]) as server:
+            session = connected_session(server)
+            cpu = session.collect_dataframe("cpu", "2019-07-22 08:00:00", "2019-07-22 12:00:00", 1, parallel=1)
+            self.assertEqual(len(cpu), 240)
+            # after first page pages are planned for resolution returned by engine
+            self.assertEqual(server.stats()["requests"]["getData"], 2)
+
+    @mock.patch.object(engine, 'retry_delay', 0)
+    def test_retry(self):
+        for failure_status in [None, 503]:
+            with EngineServer(failing_requests=[1, 2], failure_status=failure_status) as server:
+                session = connected_session(server)
+                cpu = session.collect_dataframe("cpu", "2019-07-22 09:00:00", "2019-07-22 11:00:00", 1, parallel=1)
+                self.assertEqual(len(cpu), 7200)
+                self.assertEqual(server.stats()["requests"]["getData"], 2)
+
+    @mock.patch.object(engine, 'retry_delay', 0)
+    @mock.patch.object(engine, 'page_retries', 1)
+    def test_checkpoint_resume(self):
+        with TemporaryDirectory() as tempdir:
+            checkpoint_file = join(tempdir, "checkpoint")
+            with EngineServer(failing_requests=range(3, 10)) as server:
+                session = connected_session(server)
+                with self.assertRaises(SystemExit):
+                    session.collect_dataframe("cpu", "2019-07-22 05:00:00", "2019-07-22 11:00:00", 1, parallel=1,
+                                              checkpoint=Checkpoint(checkpoint_file))
+
+            # interrupted run is resumed from the last completed page
+            checkpoint = Checkpoint(checkpoint_file)
+            self.assertEqual(len(checkpoint), 2)
+            with EngineServer() as server:
+                session = connected_session(server)
+                cpu = session.collect_dataframe("cpu", "2019-07-22 05:00:00", "2019-07-22 11:00:00", 1, parallel=1,
+                                                checkpoint=checkpoint)
+                self.assertEqual(len(cpu), 21600)
+                self.assertTrue(cpu["#timestamp"].is_unique)
+                self.assertEqual(server.stats()["requests"]["getData"], 4)
+
+    def test_save_raw(self):
+        with TemporaryDirectory() as tempdir, EngineServer(hostname="engine1") as server:
+            session = connected_session(server)
+            raw_files = RawFiles(tempdir, columnar=True)
+            for analytic_name in ["cpu", "nfs"]:
+                csvdata = session.collect_dataframe(analytic_name, "2019-07-22 08:00:00", "2019-07-22 11:00:00", 1,
+                                                    raw_files=raw_files)
+                file_name = raw_file_name(tempdir, "engine1", analytic_name)
+                assert_frame_equal(pandas.read_csv(file_name), csvdata, check_dtype=False)
+                assert_frame_equal(read_sidecar(file_name, analytic_name), read_raw_file(file_name, analytic_name))
+
+            # raw files are processed by offline mode like files exported from engine
+            datafiles.detect_files(tempdir, "engine1")
+            stats = datafiles.process_file("nfs", datafiles.get_files_mapping())
+            self.assertIn("latency", [ list(s.keys())[0] for s in stats ])
+
+
+    def test_histograms(self):
+        with TemporaryDirectory() as tempdir, EngineServer(hostname="engine1") as server:
+            cache = PageCache(join(tempdir, "cache"))
+            session = connected_session(server)
+            nfs = session.collect_dataframe("nfs", "2019-07-22 08:00:00", "2019-07-22 11:00:00", 60, cache=cache,
+                                            raw_files=RawFiles(tempdir))
+            requests = server.stats()["requests"]["getData"]
+            # latency histograms are kept with pages in cache and next to raw file
+            cached = session.collect_dataframe("nfs", "2019-07-22 08:00:00", "2019-07-22 11:00:00", 60, cache=cache)
+            self.assertEqual(server.stats()["requests"]["getData"], requests)
+            saved = read_histograms(raw_file_name(tempdir, "engine1", "nfs"), rows=len(nfs))
+            for histograms in [nfs.attrs["histograms"], cached.attrs["histograms"], saved]:
+                self.assertListEqual(list(histograms["read"].percentile(99)), list(nfs["read_latency_p99"]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import os
+import numpy
+import pandas
+from tempfile import TemporaryDirectory
+from pandas.testing import assert_frame_equal
+from unittest import TestCase
+from unittest import main
+from dxanalyze.dxdata.histogram import LatencyHistograms
+from dxanalyze.dxdata.pagecache import PageCache
+
+
+class Test_pagecache(TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.key = ("engine1", "ANALYTICS_STATISTIC_SLICE-1", 60, "2019-07-22T13:00:00.000Z", "2019-07-22T14:00:00.000Z")
+        self.page = pandas.DataFrame({
+            "#timestamp": [ "2019-07-22 14:55:00", "2019-07-22 14:56:00" ],
+            "read_throughput": [ 0.041926, 0.032812 ],
+            "ops_read": [ 2, 3 ],
+            "read_latency": [ 0.02, None ]
+        })
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_store_load(self):
+        cache = PageCache(self.tempdir.name)
+        self.assertIsNone(cache.load(self.key))
+        cache.store(self.key, self.page)
+        page = cache.load(self.key)
+        result = self.page.copy()
+        result["read_latency"] = result["read_latency"].astype(float)
+        assert_frame_equal(page, result)
+
+    def test_store_load_histograms(self):
+        cache = PageCache(self.tempdir.name)
+        histograms = LatencyHistograms.from_matrix(numpy.array([10000.0, 20000.0]), numpy.array([[ 1, 3 ], [ 0, 0 ]]))
+        self.page.attrs["histograms"] = { "read": histograms }
+        cache.store(self.key, self.page)
+        page = cache.load(self.key)
+        # histograms are not loaded as columns
+        self.assertListEqual(list(page.columns), list(self.page.columns))
+        numpy.testing.assert_array_equal(page.attrs["histograms"]["read"].percentile(50), [0.02, numpy.nan])
+        self.assertEqual(page.attrs["histograms"]["read"].nbytes, histograms.nbytes)
+
+    def test_refresh(self):
+        cache = PageCache(self.tempdir.name)
+        cache.store(self.key, self.page)
+        cache = PageCache(self.tempdir.name, refresh=True)
+        self.assertIsNone(cache.load(self.key))
+
+    def test_evict(self):
+        cache = PageCache(self.tempdir.name)
+        cache.store(self.key, self.page)
+        newkey = self.key[:3] + ("2019-07-22T14:00:00.000Z", "2019-07-22T15:00:00.000Z")
+        cache.store(newkey, self.page)
+        os.utime(cache.page_file(self.key), (0, 0))
+        cache.max_size = os.path.getsize(cache.page_file(newkey))
+        cache.evict()
+        self.assertIsNone(cache.load(self.key))
+        self.assertIsNotNone(cache.load(newkey))
+
+    def test_evict_temporary(self):
+        cache = PageCache(self.tempdir.name)
+        cache.store(self.key, self.page)
+        directory = os.path.dirname(cache.page_file(self.key))
+        # file of store in progress is kept, file left by interrupted store is removed
+        for (name, mtime) in [("current.tmp", None), ("stale.tmp", (0, 0))]:
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(b"0" * 10000)
+            if mtime is not None:
+                os.utime(os.path.join(directory, name), mtime)
+        cache.max_size = 0
+        cache.evict()
+        self.assertIsNone(cache.load(self.key))
+        self.assertTrue(os.path.isfile(os.path.join(directory, "current.tmp")))
+        self.assertFalse(os.path.isfile(os.path.join(directory, "stale.tmp")))
+
+if __name__ == '__main__':
+    main()
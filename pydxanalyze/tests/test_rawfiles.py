@@ -0,0 +1,90 @@
+import os
+import numpy
+import pandas
+from tempfile import TemporaryDirectory
+from pandas.testing import assert_frame_equal
+from unittest import TestCase
+from unittest import main
+from dxanalyze.dxdata.histogram import LatencyHistograms
+from dxanalyze.dxdata.rawfiles import RawFiles
+from dxanalyze.dxdata.rawfiles import raw_file_name
+from dxanalyze.dxdata.rawreader import read_histograms
+from dxanalyze.dxdata.rawreader import read_raw_file
+from dxanalyze.dxdata.rawreader import read_sidecar
+
+
+class Test_rawfiles(TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.pages = [
+            pandas.DataFrame({ "#timestamp": [ "2019-07-22 13:00:00", "2019-07-22 13:01:00" ],
+                               "ops_read": [ 2, 3 ], "read_latency": [ 0.5, 1.25 ] }),
+            pandas.DataFrame({ "#timestamp": [ "2019-07-22 14:00:00" ],
+                               "ops_read": [ 4 ], "read_latency": [ 2.0 ] })
+        ]
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_write_pages(self):
+        writer = RawFiles(self.tempdir.name, columnar=True).writer("engine1", "nfs")
+        file_name = raw_file_name(self.tempdir.name, "engine1", "nfs")
+        self.assertEqual(os.path.basename(file_name), "engine1-analytics-nfs-raw.csv")
+
+        writer.add(self.pages[0])
+        writer.add(None)
+        writer.add(self.pages[1])
+        writer.close()
+
+        expected = pandas.concat(self.pages, ignore_index=True)
+        assert_frame_equal(pandas.read_csv(file_name), expected)
+        # sidecar is same as parsed raw file, so offline mode is not parsing it again
+        assert_frame_equal(read_sidecar(file_name, "nfs"), read_raw_file(file_name, "nfs"))
+
+    def test_histograms(self):
+        boundaries = numpy.array([10000.0, 100000.0])
+        self.pages[0].attrs["histograms"] = { "read": LatencyHistograms.from_matrix(boundaries, numpy.array([[ 2, 0 ], [ 1, 2 ]])) }
+        self.pages[1].attrs["histograms"] = { "read": LatencyHistograms.from_matrix(boundaries, numpy.array([[ 0, 4 ]])) }
+        writer = RawFiles(self.tempdir.name).writer("engine1", "nfs")
+        file_name = raw_file_name(self.tempdir.name, "engine1", "nfs")
+        for page in self.pages:
+            writer.add(page)
+        writer.close()
+
+        histograms = read_histograms(file_name, rows=3)
+        numpy.testing.assert_array_equal(histograms["read"].percentile(50), [0.02, 0.15, 0.15])
+        self.assertIsNone(read_histograms(file_name, rows=2))
+
+        # histograms of previous run are removed with raw file
+        writer = RawFiles(self.tempdir.name).writer("engine1", "nfs")
+        writer.add(pandas.DataFrame({ "#timestamp": [ "2019-07-22 15:00:00" ], "ops_read": [ 1 ] }))
+        writer.close()
+        self.assertIsNone(read_histograms(file_name))
+
+    def test_new_columns(self):
+        # write operations are seen only in second page
+        self.pages[1]["ops_write"] = [ 1 ]
+        writer = RawFiles(self.tempdir.name).writer("engine1", "nfs")
+        file_name = raw_file_name(self.tempdir.name, "engine1", "nfs")
+        for page in self.pages:
+            writer.add(page)
+        expected = pandas.concat(self.pages, ignore_index=True)
+        writer.close(expected)
+
+        assert_frame_equal(pandas.read_csv(file_name), expected)
+        self.assertIsNone(read_sidecar(file_name, "nfs"))
+
+    def test_new_columns_sidecar(self):
+        self.pages[1]["ops_write"] = [ 1 ]
+        writer = RawFiles(self.tempdir.name, columnar=True).writer("engine1", "nfs")
+        file_name = raw_file_name(self.tempdir.name, "engine1", "nfs")
+        for page in self.pages:
+            writer.add(page)
+        writer.close(pandas.concat(self.pages, ignore_index=True))
+
+        # sidecar is written for rewritten raw file
+        assert_frame_equal(read_sidecar(file_name, "nfs"), read_raw_file(file_name, "nfs"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest import main
+from unittest import mock
+from delphixpy.v1_8_0.delphix_engine import DelphixEngine
+from dxanalyze.dxdata.sessionadapter import UnsupportedDelphixpyError
+from dxanalyze.dxdata.sessionadapter import authenticated_get
+from dxanalyze.dxdata.sessionadapter import reset_connection
+from dxanalyze.dxdata.sessionadapter import share_login_session
+
+
+class Test_sessionadapter(TestCase):
+    def test_share_login_session(self):
+        src = DelphixEngine("engine1", "admin", "delphix", "DOMAIN")
+        dst = DelphixEngine("engine1", "admin", "delphix", "DOMAIN")
+        # engine object which is not logged in is not shared
+        share_login_session(src, dst)
+        self.assertIsNone(dst._delphix_session)
+
+        src._delphix_session = "session"
+        src._http_session._cookie = "cookie"
+        src._login_helper._time_at_last_login = 1000
+        share_login_session(src, dst)
+        self.assertEqual(dst._delphix_session, "session")
+        self.assertEqual(dst._http_session._cookie, "cookie")
+        self.assertEqual(dst._login_helper._time_at_last_login, 1000)
+
+    def test_reset_connection(self):
+        engineobject = DelphixEngine("engine1", "admin", "delphix", "DOMAIN")
+        engineobject._http_session._client._time_since_last_reconnection = 1000
+        reset_connection(engineobject)
+        self.assertIsNone(engineobject._http_session._client._time_since_last_reconnection)
+
+    def test_authenticated_get(self):
+        engineobject = mock.Mock()
+        engineobject._authenticate_and_perform.side_effect = lambda action: action()
+        engineobject._http_session._create_headers.return_value = { "Cookie": "cookie" }
+        engineobject._http_session._handle_response.return_value = (200, {}, b"body")
+        pool = mock.Mock()
+        pool.request.return_value = "response"
+        # request is sent by pool with headers and response handling of engine object
+        self.assertEqual(authenticated_get(engineobject, "/resources/json/delphix/system", pool), b"body")
+        pool.request.assert_called_once_with("GET", "/resources/json/delphix/system", { "Cookie": "cookie" })
+        engineobject._http_session._handle_response.assert_called_once_with("response", "GET",
+                                                                             "/resources/json/delphix/system")
+
+    def test_unsupported_delphixpy(self):
+        # objects of other delphixpy version without used private attributes
+        engineobject = SimpleNamespace(_http_session=SimpleNamespace())
+        with self.assertRaisesRegex(UnsupportedDelphixpyError, "has no attribute _client"):
+            reset_connection(engineobject)
+        with self.assertRaisesRegex(UnsupportedDelphixpyError, "_delphix_session"):
+            share_login_session(engineobject, engineobject)
+        with self.assertRaisesRegex(UnsupportedDelphixpyError, "_authenticate_and_perform"):
+            authenticated_get(engineobject, "/resources/json/delphix/system")
+
+
+if __name__ == '__main__':
+    main()
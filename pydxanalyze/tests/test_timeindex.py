@@ -0,0 +1,108 @@
+import gzip
+import shutil
+from os.path import isfile
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+from unittest import main
+from unittest import mock
+from pandas.testing import assert_frame_equal
+import dxanalyze.dxdata.timeindex as timeindex
+from dxanalyze.dxdata.datafiles import process_files
+from dxanalyze.dxdata.rawreader import filter_time_range
+from dxanalyze.dxdata.rawreader import load_raw_file
+from dxanalyze.dxdata.rawreader import read_raw_file
+from dxanalyze.dxdata.rawreader import time_bound
+from dxanalyze.dxdata.rawreader import timestamp_format
+from dxanalyze.dxdata.timeindex import TimeIndex
+from dxanalyze.dxdata.timeindex import index_name
+
+
+@mock.patch.object(timeindex, 'default_index_step', 100)
+class Test_timeindex(TestCase):
+    def setUp(self):
+        self.tempdir = TemporaryDirectory()
+        self.file_name = join(self.tempdir.name, "test-analytics-disk-raw.csv")
+        shutil.copy(join("tests", "test-analytics-disk-raw.csv"), self.file_name)
+        self.disk = read_raw_file(self.file_name, "disk")
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def test_build(self):
+        index = TimeIndex.build(self.file_name, 0, timestamp_format)
+        self.assertEqual(index.total_rows, len(self.disk))
+        self.assertEqual(len(index.offsets), (len(self.disk) + 99) // 100)
+        self.assertEqual(index.timestamps[1], self.disk["#timestamp"].values[100])
+        with open(self.file_name, "rb") as f:
+            f.seek(index.offsets[1])
+            self.assertTrue(f.readline().startswith(b"2019-03-20 13:36:00,"))
+
+        # range is read from the last indexed row before start up to the first indexed row after end
+        (offset, rows) = index.row_range(time_bound("2019-03-21 00:00:00"), time_bound("2019-03-21 06:00:00"))
+        self.assertEqual(offset, index.offsets[7])
+        self.assertEqual(rows, 400)
+
+        # rows after the last indexed row are read and filtered
+        (offset, rows) = index.row_range(time_bound("2019-04-01 00:00:00"), None)
+        self.assertEqual(offset, index.offsets[-1])
+        self.assertEqual(rows, len(self.disk) - 10000)
+
+    def test_unordered(self):
+        with open(self.file_name, "a") as f:
+            f.write("2019-03-01 00:00:00,1,2,3,4,5,6,7,8\n")
+        # order is checked for indexed rows
+        with mock.patch.object(timeindex, 'default_index_step', 1):
+            self.assertIsNone(TimeIndex.build(self.file_name, 0, timestamp_format))
+
+            # file which can't be indexed is parsed whole and filtered
+            disk = read_raw_file(self.file_name, "disk", start_time="2019-03-01 00:00:00", end_time="2019-03-02 00:00:00")
+            self.assertEqual(len(disk), 1)
+            self.assertFalse(isfile(index_name(self.file_name)))
+
+    def test_read_range(self):
+        for (start_time, end_time) in [("2019-03-21 00:00:00", "2019-03-21 06:00:00"), (None, "2019-03-20 12:00:00"),
+                                       ("2019-03-27 11:00:00", None), ("2019-03-21 00:00:30", "2019-03-21 00:01:30")]:
+            expected = filter_time_range(self.disk, start_time, end_time).reset_index(drop=True)
+            disk = read_raw_file(self.file_name, "disk", chunk_rows=1000, start_time=start_time, end_time=end_time)
+            assert_frame_equal(disk, expected)
+
+        # index is saved next to raw file and reused until raw file is changed
+        self.assertTrue(isfile(index_name(self.file_name)))
+        self.assertIsNotNone(TimeIndex.load(self.file_name))
+        with open(self.file_name, "a") as f:
+            f.write("2019-03-27 11:55:00,1,2,3,4,5,6,7,8\n")
+        self.assertIsNone(TimeIndex.load(self.file_name))
+        disk = read_raw_file(self.file_name, "disk", start_time="2019-03-27 11:54:00")
+        self.assertEqual(len(disk), 2)
+
+        # there is no data without rows in range
+        self.assertTrue(read_raw_file(self.file_name, "disk", start_time="2019-04-01 00:00:00").empty)
+
+    def test_sidecar_range(self):
+        load_raw_file(self.file_name, "disk")
+        expected = filter_time_range(self.disk, "2019-03-21 00:00:00", "2019-03-21 06:00:00")
+        assert_frame_equal(load_raw_file(self.file_name, "disk", start_time="2019-03-21 00:00:00",
+                                         end_time="2019-03-21 06:00:00"), expected)
+        self.assertFalse(isfile(index_name(self.file_name)))
+
+    def test_compressed_range(self):
+        compressed = self.file_name + ".gz"
+        with open(self.file_name, "rb") as f, gzip.open(compressed, "wb") as g:
+            g.write(f.read())
+        expected = read_raw_file(self.file_name, "disk", start_time="2019-03-21 00:00:00", end_time="2019-03-21 06:00:00")
+        disk = read_raw_file(compressed, "disk", start_time="2019-03-21 00:00:00", end_time="2019-03-21 06:00:00")
+        assert_frame_equal(disk, expected)
+        self.assertFalse(isfile(index_name(compressed)))
+
+    def test_process_files(self):
+        mapping = {"disk": self.file_name}
+        collected = dict(process_files(["disk"], mapping, sidecar=False, start_time="2019-03-21 00:00:00",
+                                       end_time="2019-03-22 00:00:00"))
+        throughput = collected["disk"][0]["throughput"]["read_throughput"]
+        self.assertEqual(len(throughput), 1440)
+        self.assertEqual(str(throughput["#timestamp"].iloc[0]), "2019-03-21 00:00:00")
+
+
+if __name__ == '__main__':
+    main()